@@ -1,10 +1,56 @@
-from importlib.metadata import PackageNotFoundError, version
+"""Convert XLSX workbooks to HTML.
 
-from xx2html.core import apply_openpyxl_patches, create_xlsx_transform
+Public names are resolved on first access, so `import xx2html` (or
+`xx2html.cova`) does not load openpyxl, bs4, lxml, PIL, condif2css or
+xlsx2html, and the openpyxl patches are applied on first use (see
+`xx2html.core`).
+"""
 
-try:
-    __version__ = version("xx2html")
-except PackageNotFoundError:
-    __version__ = "0.0.0"
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
-__all__ = ["__version__", "apply_openpyxl_patches", "create_xlsx_transform"]
+if TYPE_CHECKING:
+    from xx2html.core import create_xlsx_transform, render_xlsx_html
+    from xx2html.core.patches import apply_openpyxl_patches
+    from xx2html.core.report import TransformReport
+
+# Public name -> module that defines it.
+_LAZY_ATTRIBUTES = {
+    "TransformReport": "xx2html.core.report",
+    "apply_openpyxl_patches": "xx2html.core.patches",
+    "create_xlsx_transform": "xx2html.core",
+    "render_xlsx_html": "xx2html.core",
+}
+
+__all__ = [
+    "TransformReport",
+    "__version__",
+    "apply_openpyxl_patches",
+    "create_xlsx_transform",
+    "render_xlsx_html",
+]
+
+
+def _get_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("xx2html")
+    except PackageNotFoundError:
+        return "0.0.0"
+
+
+def __getattr__(name: str) -> Any:
+    if name == "__version__":
+        value: Any = _get_version()
+    elif name in _LAZY_ATTRIBUTES:
+        value = getattr(import_module(_LAZY_ATTRIBUTES[name]), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Cache on the module so later lookups skip this hook.
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,7 @@
+"""Run the `xx2html` command with `python -m xx2html`."""
+
+import sys
+
+from xx2html.cli import main
+
+sys.exit(main())
@@ -0,0 +1,744 @@
+"""`xx2html` command: convert files, globs or directory trees to HTML.
+
+With `--sync` (or `--watch`, which repeats the sync whenever a workbook
+changes), a manifest in the output directory records each source's size,
+mtime and ZIP part CRC digest, so only new or changed workbooks are
+reconverted and outputs of deleted sources are removed.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import signal
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from time import perf_counter
+from types import FrameType
+from typing import Any
+from zipfile import BadZipFile, ZipFile
+
+from xx2html.cova import initialize
+from xx2html.watch import DEFAULT_POLL_INTERVAL, create_waiter
+
+MANIFEST_NAME = ".xx2html-manifest.json"
+SOURCE_SUFFIX = ".xlsx"
+HASH_CHUNK_SIZE = 1024 * 1024
+EXIT_FAILED = 1
+
+DEFAULT_TEMPLATES = {
+    "sheet_html": (
+        '<section id="{enc_sheet_name}" data-sheet-name="{sheet_name}">'
+        "{table_generated_html}</section>"
+    ),
+    "sheetname_html": '<a class="sheet-nav" href="#{enc_sheet_name}">{sheet_name}</a>',
+    "index_html": (
+        '<!doctype html><html><head><meta charset="utf-8">'
+        "{fonts_html}{core_css_html}{user_css_html}{generated_css_html}"
+        "{generated_incell_css_html}{conditional_css_html}"
+        '</head><body data-source="{source_filename}">'
+        "{sheets_names_generated_html}{sheets_generated_html}{safari_js}</body></html>"
+    ),
+    "fonts_html": "",
+    "core_css": "",
+    "user_css": "",
+    "safari_js": "",
+}
+
+# `create_xlsx_transform` keyword arguments settable from the CLI or config.
+TRANSFORM_OPTIONS = (
+    "apply_cf",
+    "compact",
+    "lazy_images",
+    "multi_file",
+    "precompress",
+    "image_scale",
+    "image_format",
+    "max_sheets",
+    "max_rows",
+    "max_cols",
+)
+
+# Config file keys: template file paths (None -> built-in), transform options,
+# locale and skip mode. CLI flags override the file.
+DEFAULT_CONFIG: dict[str, Any] = {
+    **{name: None for name in DEFAULT_TEMPLATES},
+    "apply_cf": False,
+    "compact": False,
+    "lazy_images": False,
+    "multi_file": False,
+    "precompress": False,
+    "image_scale": None,
+    "image_format": None,
+    "max_sheets": None,
+    "max_rows": None,
+    "max_cols": None,
+    "mmap_source": False,
+    "locale": "en_US",
+    "skip": "none",
+}
+
+
+@dataclass(frozen=True)
+class ConversionJob:
+    source: str
+    dest: str
+    # Hash mode: manifest key (destination relative to the output root) and
+    # the entry stored under it once the conversion ran.
+    key: str | None = None
+    manifest_entry: dict[str, Any] | None = None
+
+
+@dataclass(frozen=True)
+class ConversionResult:
+    job: ConversionJob
+    ok: bool
+    error: str | None
+    seconds: float
+    input_bytes: int
+    output_bytes: int
+    cells: int
+
+
+_WORKER_TRANSFORM: Any = None
+
+
+def _create_transform(templates: dict[str, str], options: dict[str, Any]) -> Any:
+    from xx2html import create_xlsx_transform
+
+    kwargs: dict[str, Any] = {**templates, **options}
+    return create_xlsx_transform(**kwargs)
+
+
+def _init_worker(templates: dict[str, str], options: dict[str, Any]) -> None:
+    """Build the transform once per worker process."""
+    global _WORKER_TRANSFORM
+    # The parent handles Ctrl+C and lets running conversions finish.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _WORKER_TRANSFORM = _create_transform(templates, options)
+
+
+def _convert(transform: Any, job: ConversionJob, locale: str) -> ConversionResult:
+    from xx2html import TransformReport
+
+    report = TransformReport()
+    os.makedirs(os.path.dirname(os.path.abspath(job.dest)), exist_ok=True)
+    # Sized up front: in watch mode the source may be gone once converted.
+    try:
+        input_bytes = os.path.getsize(job.source)
+    except OSError:
+        input_bytes = 0
+    started_at = perf_counter()
+    ok, error = transform(job.source, job.dest, locale, report=report)
+    return ConversionResult(
+        job=job,
+        ok=ok,
+        error=error,
+        seconds=perf_counter() - started_at,
+        input_bytes=input_bytes,
+        output_bytes=report.output_bytes,
+        cells=report.counters.get("cells", 0),
+    )
+
+
+def _convert_in_worker(job: ConversionJob, locale: str) -> ConversionResult:
+    return _convert(_WORKER_TRANSFORM, job, locale)
+
+
+def _glob_root(pattern: str) -> str:
+    """Return the leading directories of `pattern` that contain no wildcard."""
+    parts = Path(pattern).parts
+    root_parts: list[str] = []
+    for part in parts[:-1]:
+        if glob.has_magic(part):
+            break
+        root_parts.append(part)
+    return os.path.join(*root_parts) if root_parts else "."
+
+
+def _is_source(path: str) -> bool:
+    name = os.path.basename(path)
+    # Skip Excel's "~$name.xlsx" lock files.
+    return name.lower().endswith(SOURCE_SUFFIX) and not name.startswith("~$")
+
+
+def collect_sources(inputs: list[str]) -> list[tuple[str, str]]:
+    """Return `(source, path relative to its input root)` for each workbook.
+
+    Directories are searched recursively, globs are expanded (`**` included)
+    and files are taken as-is. Duplicates keep their first occurrence.
+    """
+    sources: dict[str, str] = {}
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = [
+                os.path.join(directory, name)
+                for directory, _, names in os.walk(item)
+                for name in names
+            ]
+            root = item
+        elif glob.has_magic(item):
+            matches = glob.glob(item, recursive=True)
+            root = _glob_root(item)
+        else:
+            matches = [item]
+            root = os.path.dirname(item)
+        for match in sorted(matches):
+            if os.path.isfile(match) and (_is_source(match) or match == item):
+                sources.setdefault(os.path.abspath(match), os.path.relpath(match, root))
+    return list(sources.items())
+
+
+def _get_dest(source: str, relative: str, output_dir: str | None) -> str:
+    html_name = os.path.splitext(relative)[0] + ".html"
+    if output_dir is None:
+        return os.path.join(os.path.dirname(source), os.path.basename(html_name))
+    return os.path.join(output_dir, html_name)
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as source_file:
+        for chunk in iter(lambda: source_file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_source_state(
+    path: str, previous: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    """Return the manifest state of `path`: size, mtime and a content digest.
+
+    The digest covers the names, CRCs and sizes of the ZIP parts, read from
+    the central directory only; other files are hashed whole. When size and
+    mtime match `previous`, its digest is reused without opening the file.
+    """
+    stat = os.stat(path)
+    state: dict[str, Any] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if previous is not None and "source_digest" in previous:
+        if all(previous.get(name) == value for name, value in state.items()):
+            state["source_digest"] = previous["source_digest"]
+            return state
+    try:
+        with ZipFile(path) as archive:
+            parts = sorted(
+                (info.filename, info.CRC, info.file_size)
+                for info in archive.infolist()
+            )
+    except (OSError, BadZipFile):
+        state["source_digest"] = f"sha256:{_hash_file(path)}"
+    else:
+        parts_json = json.dumps(parts).encode("utf-8")
+        state["source_digest"] = f"parts:{hashlib.sha256(parts_json).hexdigest()}"
+    return state
+
+
+def _load_manifest(path: str) -> dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _write_manifest(path: str, manifest: dict[str, Any]) -> None:
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def _load_templates(config: dict[str, Any]) -> dict[str, str]:
+    templates = {}
+    for name, default in DEFAULT_TEMPLATES.items():
+        template_path = config.get(name)
+        if template_path is None:
+            templates[name] = default
+        else:
+            templates[name] = Path(template_path).read_text(encoding="utf-8")
+    return templates
+
+
+def _get_settings_fingerprint(
+    templates: dict[str, str], options: dict[str, Any], locale: str
+) -> str:
+    from xx2html import __version__
+
+    settings = json.dumps(
+        [templates, options, locale, __version__], sort_keys=True, default=str
+    )
+    return hashlib.sha256(settings.encode("utf-8")).hexdigest()
+
+
+def _get_settings_mtime(config: dict[str, Any], config_path: str | None) -> float:
+    paths = [config[name] for name in DEFAULT_TEMPLATES if config.get(name)]
+    if config_path is not None:
+        paths.append(config_path)
+    return max((os.path.getmtime(path) for path in paths), default=0.0)
+
+
+def _is_up_to_date_by_mtime(job: ConversionJob, settings_mtime: float) -> bool:
+    try:
+        dest_mtime = os.path.getmtime(job.dest)
+    except OSError:
+        return False
+    return dest_mtime >= max(os.path.getmtime(job.source), settings_mtime)
+
+
+def _get_manifest_key(relative: str) -> str:
+    return os.path.splitext(relative)[0] + ".html"
+
+
+def _is_unchanged(
+    entry: dict[str, Any],
+    state: dict[str, Any],
+    fingerprint: str,
+    dest: str,
+    retry_failed: bool,
+) -> bool:
+    if entry.get("source_digest") != state["source_digest"]:
+        return False
+    if entry.get("settings_sha256") != fingerprint:
+        return False
+    if entry.get("ok", True):
+        return os.path.exists(dest)
+    return not retry_failed
+
+
+def _plan_jobs(
+    inputs: list[str],
+    output_dir: str | None,
+    skip_mode: str,
+    manifest: dict[str, Any],
+    fingerprint: str,
+    settings_mtime: float,
+    retry_failed: bool = True,
+) -> tuple[list[ConversionJob], int]:
+    """Return the jobs to run and how many sources were skipped as up to date."""
+    jobs: list[ConversionJob] = []
+    skipped = 0
+    for source, relative in collect_sources(inputs):
+        dest = _get_dest(source, relative, output_dir)
+        if skip_mode == "hash":
+            key = _get_manifest_key(relative)
+            entry = manifest.get(key)
+            if not isinstance(entry, dict) or entry.get("source") != source:
+                entry = None
+            try:
+                state = get_source_state(source, entry)
+            except OSError:
+                continue  # removed since it was listed
+            if entry is not None and _is_unchanged(
+                entry, state, fingerprint, dest, retry_failed
+            ):
+                manifest[key] = {**entry, **state}
+                skipped += 1
+                continue
+            manifest_entry = {
+                "source": source,
+                **state,
+                "settings_sha256": fingerprint,
+            }
+            jobs.append(ConversionJob(source, dest, key, manifest_entry))
+            continue
+        job = ConversionJob(source, dest)
+        if skip_mode == "mtime" and _is_up_to_date_by_mtime(job, settings_mtime):
+            skipped += 1
+            continue
+        jobs.append(job)
+    return jobs, skipped
+
+
+def _remove_outputs(dest: str) -> None:
+    from xx2html.core.outputs import PRECOMPRESSED_SUFFIXES, get_class_map_path
+    from xx2html.core.multifile import get_assets_dir, prune_stale_assets
+
+    paths = [dest, get_class_map_path(dest)]
+    paths.extend(f"{dest}{suffix}" for suffix in PRECOMPRESSED_SUFFIXES)
+    for path in paths:
+        if os.path.isfile(path):
+            os.unlink(path)
+    assets_dir = get_assets_dir(dest)
+    if os.path.isdir(assets_dir):
+        # Only xx2html's content-hashed assets; other files keep the directory.
+        prune_stale_assets(assets_dir, set())
+        if not os.listdir(assets_dir):
+            os.rmdir(assets_dir)
+
+
+def remove_stale_outputs(manifest: dict[str, Any], output_dir: str) -> int:
+    """Delete the outputs of manifest entries whose source no longer exists."""
+    removed = 0
+    for key, entry in list(manifest.items()):
+        source = entry.get("source") if isinstance(entry, dict) else None
+        if source is None or os.path.exists(source):
+            continue
+        logging.info("xx2html: %s was removed; deleting its outputs", source)
+        _remove_outputs(os.path.join(output_dir, key))
+        del manifest[key]
+        removed += 1
+    return removed
+
+
+def _get_watch_dirs(inputs: list[str]) -> list[str]:
+    directories: dict[str, None] = {}
+    for item in inputs:
+        if os.path.isdir(item):
+            directory = item
+        elif glob.has_magic(item):
+            directory = _glob_root(item)
+        else:
+            directory = os.path.dirname(item) or "."
+        directories.setdefault(os.path.abspath(directory), None)
+    return list(directories)
+
+
+def _get_watch_exclude(output: str, watch_dirs: list[str]) -> list[str]:
+    """Return `[output]`, unless it is a watched directory or an ancestor of one.
+
+    Excluding an in-place output tree would hide every input event; there, the
+    only extra wake-ups come from new `{stem}_files` directories, and the pass
+    they trigger finds nothing changed.
+    """
+    output = os.path.abspath(output)
+    if any(
+        directory == output or directory.startswith(output.rstrip(os.sep) + os.sep)
+        for directory in watch_dirs
+    ):
+        return []
+    return [output]
+
+
+def _snapshot_sources(inputs: list[str]) -> frozenset[tuple[str, int, int]]:
+    snapshot = set()
+    for source, _ in collect_sources(inputs):
+        try:
+            stat = os.stat(source)
+        except OSError:
+            continue
+        snapshot.add((source, stat.st_size, stat.st_mtime_ns))
+    return frozenset(snapshot)
+
+
+class _StopRequest:
+    """Records the first SIGINT/SIGTERM so the run can stop between files."""
+
+    def __init__(self) -> None:
+        self.signum: int | None = None
+
+    def __call__(self, signum: int, frame: FrameType | None) -> None:
+        if self.signum is None:
+            print(
+                "xx2html: stopping after running conversions finish...",
+                file=sys.stderr,
+            )
+        self.signum = signum
+
+
+class _Converter:
+    """Runs jobs in-process, or on a process pool kept for the whole session."""
+
+    def __init__(
+        self,
+        templates: dict[str, str],
+        options: dict[str, Any],
+        locale: str,
+        workers: int,
+    ) -> None:
+        self.locale = locale
+        self._transform: Any = None
+        self._executor: ProcessPoolExecutor | None = None
+        if workers <= 1:
+            self._transform = _create_transform(templates, options)
+        else:
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(templates, options),
+            )
+
+    def run(
+        self, jobs: list[ConversionJob], stop: _StopRequest
+    ) -> list[ConversionResult]:
+        results: list[ConversionResult] = []
+        if self._executor is None:
+            for job in jobs:
+                if stop.signum is not None:
+                    break
+                results.append(_convert(self._transform, job, self.locale))
+                _report_result(results[-1])
+            return results
+
+        pending: set[Future[ConversionResult]] = {
+            self._executor.submit(_convert_in_worker, job, self.locale) for job in jobs
+        }
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                if not future.cancelled():
+                    results.append(future.result())
+                    _report_result(results[-1])
+            if stop.signum is not None:
+                for future in pending:
+                    future.cancel()
+                pending = {future for future in pending if not future.cancelled()}
+        return results
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _report_result(result: ConversionResult) -> None:
+    if result.ok:
+        logging.info(
+            "xx2html: %s -> %s (%.2f s)", result.job.source, result.job.dest, result.seconds
+        )
+    else:
+        print(f"xx2html: FAILED {result.job.source}: {result.error}", file=sys.stderr)
+
+
+def format_summary(
+    results: list[ConversionResult],
+    skipped: int,
+    not_started: int,
+    seconds: float,
+    removed: int = 0,
+) -> str:
+    """Return the one-line throughput summary printed at the end of a run."""
+    converted = [result for result in results if result.ok]
+    failed = len(results) - len(converted)
+    input_bytes = sum(result.input_bytes for result in converted)
+    cells = sum(result.cells for result in converted)
+    rate = 1 / seconds if seconds > 0 else 0.0
+    removed_text = f", {removed} removed" if removed else ""
+    summary = (
+        f"xx2html: {len(converted)} converted, {skipped} skipped, {failed} failed"
+        f"{removed_text} in {seconds:.2f} s ({len(converted) * rate:.2f} files/s, "
+        f"{cells * rate:,.0f} cells/s, {input_bytes * rate / 1e6:.2f} MB/s input)"
+    )
+    if not_started:
+        summary += f"; interrupted, {not_started} not started"
+    return summary
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="xx2html",
+        description="Convert XLSX workbooks (files, globs or directory trees) to HTML.",
+    )
+    parser.add_argument("inputs", nargs="+", help="workbook files, globs or directories")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="output directory; mirrors each input's tree (default: next to each source)",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1, help="worker processes (default: 1)"
+    )
+    parser.add_argument(
+        "--config",
+        help="JSON config file (created with defaults if missing); flags override it",
+    )
+    parser.add_argument(
+        "--skip",
+        choices=("none", "mtime", "hash"),
+        help="skip sources whose output is newer (mtime) or whose content and "
+        f"settings match {MANIFEST_NAME} in the output directory (hash)",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="like --skip hash, and delete outputs whose source was removed",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="sync, then sync again whenever a workbook changes (until Ctrl+C)",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help="seconds between stat scans when inotify is unavailable "
+        f"(default: {DEFAULT_POLL_INTERVAL:g})",
+    )
+    parser.add_argument(
+        "--mmap",
+        dest="mmap_source",
+        action="store_true",
+        default=None,
+        help="memory-map source workbooks instead of reading them",
+    )
+    parser.add_argument("--locale", help="locale for number formats (default: en_US)")
+    for name in DEFAULT_TEMPLATES:
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            dest=name,
+            metavar="PATH",
+            help=f"file with the `{name}` template (loaded once)",
+        )
+    for name in ("apply_cf", "compact", "lazy_images", "multi_file", "precompress"):
+        parser.add_argument(
+            f"--{name.replace('_', '-')}", dest=name, action="store_true", default=None
+        )
+    parser.add_argument("--image-scale", dest="image_scale", type=float)
+    parser.add_argument("--image-format", dest="image_format")
+    for name in ("max_sheets", "max_rows", "max_cols"):
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=int)
+    parser.add_argument("-v", "--verbose", action="store_true", help="log each file")
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("-j/--jobs must be at least 1")
+    if args.poll_interval <= 0:
+        parser.error("--poll-interval must be positive")
+    return args
+
+
+def _get_config(args: argparse.Namespace) -> dict[str, Any]:
+    overrides = {
+        name: getattr(args, name)
+        for name in DEFAULT_CONFIG
+        if getattr(args, name, None) is not None
+    }
+    if args.config is None:
+        return {**DEFAULT_CONFIG, **overrides}
+    config_path = os.path.abspath(args.config)
+    return initialize(
+        os.path.dirname(config_path),
+        os.path.basename(config_path),
+        DEFAULT_CONFIG,
+        overrides,
+    )
+
+
+def _run_once(
+    args: argparse.Namespace,
+    converter: _Converter,
+    stop: _StopRequest,
+    skip_mode: str,
+    fingerprint: str,
+    settings_mtime: float,
+    retry_failed: bool = True,
+) -> int:
+    """Plan, convert and summarize one pass over the inputs."""
+    started_at = perf_counter()
+    manifest_path = (
+        os.path.join(args.output, MANIFEST_NAME) if args.output is not None else None
+    )
+    manifest = (
+        _load_manifest(manifest_path)
+        if skip_mode == "hash" and manifest_path is not None
+        else {}
+    )
+    jobs, skipped = _plan_jobs(
+        args.inputs,
+        args.output,
+        skip_mode,
+        manifest,
+        fingerprint,
+        settings_mtime,
+        retry_failed=retry_failed,
+    )
+    results = converter.run(jobs, stop)
+
+    removed = 0
+    if skip_mode == "hash" and manifest_path is not None:
+        for result in results:
+            if result.job.key is not None and result.job.manifest_entry is not None:
+                manifest[result.job.key] = {
+                    **result.job.manifest_entry,
+                    "ok": result.ok,
+                }
+        if args.sync or args.watch:
+            removed = remove_stale_outputs(manifest, args.output)
+        os.makedirs(args.output, exist_ok=True)
+        _write_manifest(manifest_path, manifest)
+
+    print(
+        format_summary(
+            results,
+            skipped,
+            len(jobs) - len(results),
+            perf_counter() - started_at,
+            removed=removed,
+        ),
+        flush=True,
+    )
+    return EXIT_FAILED if any(not result.ok for result in results) else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the `xx2html` command and return its exit code."""
+    args = _parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(message)s",
+    )
+    config = _get_config(args)
+    templates = _load_templates(config)
+    options = {name: config[name] for name in TRANSFORM_OPTIONS}
+    locale = config["locale"]
+    skip_mode = "hash" if args.sync or args.watch else config["skip"]
+    if skip_mode == "hash" and args.output is None:
+        print("xx2html: --skip hash, --sync and --watch need -o/--output", file=sys.stderr)
+        return EXIT_FAILED
+    fingerprint = _get_settings_fingerprint(templates, options, locale)
+    # How sources are read does not change the output, so it is not fingerprinted.
+    options["mmap_source"] = config["mmap_source"]
+    settings_mtime = _get_settings_mtime(config, args.config)
+
+    stop = _StopRequest()
+    previous_handlers = {
+        signum: signal.signal(signum, stop) for signum in (signal.SIGINT, signal.SIGTERM)
+    }
+    converter = _Converter(templates, options, locale, args.jobs)
+    try:
+        watch_dirs = _get_watch_dirs(args.inputs) if args.watch else []
+        # Start watching before the first pass so no change is missed.
+        waiter = (
+            create_waiter(
+                watch_dirs,
+                lambda: _snapshot_sources(args.inputs),
+                args.poll_interval,
+                exclude=_get_watch_exclude(args.output, watch_dirs),
+            )
+            if args.watch
+            else None
+        )
+        try:
+            exit_code = _run_once(
+                args, converter, stop, skip_mode, fingerprint, settings_mtime
+            )
+            while waiter is not None and waiter.wait(lambda: stop.signum is not None):
+                # Unchanged workbooks that failed are not retried until they change.
+                exit_code = _run_once(
+                    args,
+                    converter,
+                    stop,
+                    skip_mode,
+                    fingerprint,
+                    settings_mtime,
+                    retry_failed=False,
+                )
+        finally:
+            if waiter is not None:
+                waiter.close()
+    finally:
+        converter.close()
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+
+    if stop.signum is not None:
+        # Shell convention: 128 + signal number (130 for Ctrl+C).
+        return 128 + stop.signum
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Shared, indexed access to the XLSX (ZIP) source archive."""
+
+import errno
+import mmap
+import os
+from collections.abc import Set
+from typing import IO, Any, NamedTuple
+from zipfile import ZipFile
+
+from openpyxl.reader.excel import SUPPORTED_FORMATS, ExcelReader
+from openpyxl.utils.exceptions import InvalidFileException
+from openpyxl.workbook.workbook import Workbook
+
+from .patches import apply_openpyxl_patches
+
+
+class ArchiveMember(NamedTuple):
+    """Central-directory facts about one archive member."""
+
+    file_size: int
+    compress_size: int
+    crc: int
+
+
+class IndexedArchive(ZipFile):
+    """Read-only `ZipFile` whose members are indexed once when it is opened.
+
+    `member_names` gives O(1) membership checks and `members` maps each name to
+    its sizes and CRC, so callers never rebuild `namelist()` per lookup.
+    """
+
+    def __init__(self, file: str | IO[bytes]) -> None:
+        super().__init__(file, "r")
+        self.members: dict[str, ArchiveMember] = {
+            info.filename: ArchiveMember(info.file_size, info.compress_size, info.CRC)
+            for info in self.infolist()
+        }
+        self.member_names: frozenset[str] = frozenset(self.members)
+
+
+class _ReadOnlyMapping(mmap.mmap):
+    """Read-only `mmap` that seeks like a binary file, as `zipfile` expects.
+
+    `mmap.mmap` only has `seekable()` from Python 3.13 on, and raises
+    `ValueError` where files raise `OSError` (seeking before the start, which
+    `zipfile` does when probing inputs shorter than an end-of-archive record).
+    """
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, pos: int, whence: int = os.SEEK_SET) -> None:
+        try:
+            super().seek(pos, whence)  # type: ignore[arg-type]
+        except ValueError as exc:
+            raise OSError(errno.EINVAL, str(exc)) from exc
+
+
+class MappedArchive(IndexedArchive):
+    """`IndexedArchive` that reads a file through one read-only memory mapping.
+
+    ZIP reads are served from the OS page cache without a syscall per read,
+    and concurrent processes mapping the same file share its pages. Member
+    data is still copied out of the mapping (and inflated) when read. The
+    archive owns `mapping` and releases it in `close()`; build it with
+    `open_source_archive(path, use_mmap=True)`.
+    """
+
+    def __init__(self, mapping: _ReadOnlyMapping) -> None:
+        self.mapping = mapping
+        super().__init__(mapping)  # type: ignore[arg-type]
+
+    def close(self) -> None:
+        super().close()
+        self.mapping.close()
+
+
+def _map_file(path: str) -> _ReadOnlyMapping:
+    with open(path, "rb") as source_file:
+        # Raises ValueError for empty files; the mapping outlives the fd.
+        return _ReadOnlyMapping(source_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def open_source_archive(path: str, use_mmap: bool = False) -> IndexedArchive:
+    """Open the workbook at `path`, memory-mapped when `use_mmap` allows it.
+
+    Files that cannot be mapped (empty files, special files, platforms
+    without `mmap` support for them) are read through a regular file object.
+    Like `openpyxl.load_workbook`, raises `InvalidFileException` for file
+    extensions openpyxl does not read (`.xls`, `.xlsb`, `.csv`, ...).
+    """
+    file_format = os.path.splitext(path)[-1].lower()
+    if file_format not in SUPPORTED_FORMATS:
+        raise InvalidFileException(
+            f"openpyxl does not support {file_format or 'extensionless'} files. "
+            f"Supported formats are: {','.join(SUPPORTED_FORMATS)}"
+        )
+    if use_mmap:
+        try:
+            mapping = _map_file(path)
+        except (OSError, ValueError):
+            # Unmappable (or missing) files are retried, and reported, below.
+            pass
+        else:
+            try:
+                return MappedArchive(mapping)
+            except BaseException:
+                mapping.close()
+                raise
+    return IndexedArchive(path)
+
+
+def get_member_names(archive: ZipFile) -> Set[str]:
+    """Return the member names of `archive` as a set, reusing its index if any."""
+    if isinstance(archive, IndexedArchive):
+        return archive.member_names
+    return set(archive.namelist())
+
+
+class _SharedArchive:
+    """Proxy that hides `close()` so openpyxl cannot close the shared archive."""
+
+    def __init__(self, archive: ZipFile) -> None:
+        self._archive = archive
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._archive, name)
+
+    def close(self) -> None:
+        pass
+
+
+class _SharedArchiveExcelReader(ExcelReader):
+    """`ExcelReader` over an already open archive instead of a path."""
+
+    def __init__(
+        self, archive: ZipFile, data_only: bool = False, rich_text: bool = False
+    ) -> None:
+        # Mirrors ExcelReader.__init__ (openpyxl 3.1) without reopening the file;
+        # tests/test_archive.py compares the fields with a real ExcelReader.
+        self.archive = _SharedArchive(archive)  # type: ignore[assignment]
+        self.valid_files = get_member_names(archive)  # type: ignore[assignment]
+        self.read_only = False
+        self.keep_vba = False
+        self.data_only = data_only
+        self.keep_links = True
+        self.rich_text = rich_text
+        self.shared_strings = []
+
+
+def load_workbook_from_archive(
+    archive: ZipFile, data_only: bool = False, rich_text: bool = False
+) -> Workbook:
+    """Load a workbook from an open archive, leaving the archive open."""
+    # The vm-aware cell parsing lives in the patches.
+    apply_openpyxl_patches()
+    reader = _SharedArchiveExcelReader(
+        archive, data_only=data_only, rich_text=rich_text
+    )
+    reader.read()
+    return reader.wb
@@ -1,23 +1,27 @@
 """Conditional-formatting HTML post-processing."""
 
 import logging
+from typing import TYPE_CHECKING
 
-from bs4 import BeautifulSoup
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
-from xx2html.core.types import ConditionalFormattingRelation
+from xx2html.core.types import ConditionalFormattingRelation, WorksheetContents
 
 
 def apply_cf_styles(
     html: str, cf_style_relations: list[ConditionalFormattingRelation]
 ) -> str:
     """Attach generated conditional-formatting class names to target cells."""
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, "lxml")
     apply_cf_styles_in_soup(soup, cf_style_relations)
     return str(soup)
 
 
 def apply_cf_styles_in_soup(
-    soup: BeautifulSoup, cf_style_relations: list[ConditionalFormattingRelation]
+    soup: "BeautifulSoup", cf_style_relations: list[ConditionalFormattingRelation]
 ) -> None:
     """Attach generated conditional-formatting classes in-place."""
     cells_by_id: dict[str, list] = {}
@@ -40,3 +44,20 @@ def apply_cf_styles_in_soup(
                 if class_name not in previous_classes:
                     previous_classes.append(class_name)
             cell_tag["class"] = previous_classes
+
+
+def apply_cf_styles_to_contents(
+    contents: WorksheetContents,
+    cf_style_relations: list[ConditionalFormattingRelation],
+) -> None:
+    """Attach conditional-formatting classes to worksheet render data in-place.
+
+    Used when cells are not part of the HTML DOM (virtualized rendering).
+    """
+    cells_by_id = {
+        cell["attrs"].get("id"): cell for row in contents["rows"] for cell in row
+    }
+    for sheet_name, cell_ref, class_names in cf_style_relations:
+        cell = cells_by_id.get(f"{sheet_name}!{cell_ref}")
+        if cell is not None:
+            cell["classes"].update(class_names)
@@ -0,0 +1,179 @@
+"""Size-optimized ("compact") output helpers: attribute rendering and CSS minification."""
+
+import re
+from collections.abc import Container, Iterable, Mapping
+
+SIZES_ROW_CLASS = "xx2h-sizes"
+COMPACT_TABLE_CSS = f".{SIZES_ROW_CLASS}>td{{padding:0}}"
+
+# Inline style values that match the browser default and can be omitted.
+_DEFAULT_STYLE_VALUES = {"visibility": "visible"}
+
+_CSS_STRING = r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\''
+_CSS_MINIFY_PATTERN = re.compile(rf"({_CSS_STRING})|/\*.*?\*/|\s+", re.S)
+_CSS_TRAILING_SEMICOLON_PATTERN = re.compile(rf"({_CSS_STRING})|;(?=\}})")
+_CSS_STRUCTURE_PATTERN = re.compile(rf"{_CSS_STRING}|[{{}};]")
+_CSS_CLASS_PATTERN = re.compile(r"\.(-?[_a-zA-Z][\w-]*)")
+# No space is needed after / before these characters.
+_NO_SPACE_AFTER = frozenset("{};,>(: ")
+_NO_SPACE_BEFORE = frozenset("{};,>)!")
+
+
+def render_compact_inline_styles(styles: Mapping[str, object] | None) -> str:
+    """Render `styles` as `k:v;k:v`, skipping unset and default values."""
+    if not styles:
+        return ""
+    return ";".join(
+        f"{name}:{value}"
+        for name, value in sorted(styles.items())
+        if value is not None and _DEFAULT_STYLE_VALUES.get(name) != value
+    )
+
+
+def render_compact_attrs(
+    attrs: Mapping[str, object] | None,
+    styles: Mapping[str, object] | None = None,
+    classes: Iterable[str] = (),
+) -> str:
+    """Render ` k="v"` attributes, omitting empty values, `style` and `class`."""
+    rendered = [
+        f' {name}="{value}"' for name, value in sorted((attrs or {}).items()) if value
+    ]
+    inline_styles = render_compact_inline_styles(styles)
+    if inline_styles:
+        rendered.append(f' style="{inline_styles}"')
+    class_names = " ".join(sorted(classes))
+    if class_names:
+        rendered.append(f' class="{class_names}"')
+    return "".join(rendered)
+
+
+def _collapse_css_whitespace(css: str) -> str:
+    parts: list[str] = []
+    last_char = ""
+    position = 0
+    for match in _CSS_MINIFY_PATTERN.finditer(css):
+        literal = css[position : match.start()]
+        if literal:
+            parts.append(literal)
+            last_char = literal[-1]
+        position = match.end()
+        string_token = match.group(1)
+        if string_token is not None:
+            parts.append(string_token)
+            last_char = string_token[-1]
+            continue
+        # Comments and whitespace runs both collapse to at most one space.
+        next_char = css[position : position + 1]
+        if (
+            last_char
+            and next_char
+            and last_char not in _NO_SPACE_AFTER
+            and next_char not in _NO_SPACE_BEFORE
+        ):
+            parts.append(" ")
+            last_char = " "
+    parts.append(css[position:])
+    return _CSS_TRAILING_SEMICOLON_PATTERN.sub(
+        lambda match: match.group(1) or "", "".join(parts)
+    ).strip()
+
+
+def _rule_can_match(prelude: str, used_classes: Container[str]) -> bool:
+    prelude = prelude.strip()
+    if not prelude or prelude.startswith("@") or "(" in prelude or "[" in prelude:
+        return True
+    return any(
+        all(
+            class_name in used_classes
+            for class_name in _CSS_CLASS_PATTERN.findall(selector)
+        )
+        for selector in prelude.split(",")
+    )
+
+
+def _prune_unused_rules(css: str, used_classes: Container[str]) -> str:
+    kept: list[str] = []
+    depth = 0
+    statement_start = 0
+    prelude_end = 0
+    for match in _CSS_STRUCTURE_PATTERN.finditer(css):
+        token = match.group()
+        if token == "{":
+            if depth == 0:
+                prelude_end = match.start()
+            depth += 1
+        elif token == "}" and depth > 0:
+            depth -= 1
+            if depth == 0:
+                if _rule_can_match(css[statement_start:prelude_end], used_classes):
+                    kept.append(css[statement_start : match.end()])
+                statement_start = match.end()
+        elif token == ";" and depth == 0:
+            kept.append(css[statement_start : match.end()])
+            statement_start = match.end()
+    kept.append(css[statement_start:])
+    return "".join(kept)
+
+
+def minify_css(css: str, used_classes: Container[str] | None = None) -> str:
+    """Return `css` without comments and redundant whitespace or semicolons.
+
+    Quoted strings (including data URIs) are copied unchanged. When
+    `used_classes` is given, top-level rules whose every selector requires a
+    class outside that set are dropped; at-rules and selectors with attribute
+    or functional parts are always kept.
+    """
+    minified = _collapse_css_whitespace(css)
+    if used_classes is None:
+        return minified
+    return _prune_unused_rules(minified, used_classes)
+
+
+_BASE36_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+_CSS_CLASS_OR_STRING_PATTERN = re.compile(rf"({_CSS_STRING})|\.(-?[_a-zA-Z][\w-]*)")
+MANGLED_CLASS_PREFIXES = ("xx2h_", "vm-richvaluerel_rid")
+
+
+def _to_base36(number: int) -> str:
+    digits = ""
+    while True:
+        number, remainder = divmod(number, 36)
+        digits = _BASE36_DIGITS[remainder] + digits
+        if number == 0:
+            return digits
+
+
+class ClassNameMangler:
+    """Map generated class names to short `_{base36}` tokens.
+
+    Only names with one of `MANGLED_CLASS_PREFIXES` (style registry,
+    conditional formatting and in-cell image classes) are mangled; layout
+    classes that templates or scripts may reference are left unchanged.
+    Tokens are assigned in first-seen order, so identical input produces the
+    same mapping.
+    """
+
+    def __init__(self, prefixes: tuple[str, ...] = MANGLED_CLASS_PREFIXES) -> None:
+        self._prefixes = prefixes
+        self.mapping: dict[str, str] = {}
+
+    def mangle(self, class_name: str) -> str:
+        """Return the short token for `class_name`, or the name itself."""
+        token = self.mapping.get(class_name)
+        if token is not None:
+            return token
+        if not class_name.startswith(self._prefixes):
+            return class_name
+        token = f"_{_to_base36(len(self.mapping))}"
+        self.mapping[class_name] = token
+        return token
+
+    def mangle_classes(self, class_names: Iterable[str]) -> set[str]:
+        return {self.mangle(class_name) for class_name in class_names}
+
+    def mangle_css(self, css: str) -> str:
+        """Rewrite `.class` selectors in `css`; quoted strings are left as-is."""
+        return _CSS_CLASS_OR_STRING_PATTERN.sub(
+            lambda match: match.group(1) or f".{self.mangle(match.group(2))}", css
+        )
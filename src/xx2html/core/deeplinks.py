@@ -0,0 +1,106 @@
+"""Cell ids on demand and client-side resolution of `#Sheet!A1` deep links."""
+
+import re
+
+from openpyxl.worksheet.worksheet import Worksheet
+
+_CELL_LOCATION_PATTERN = re.compile(
+    r"^(?:(?P<sheet>'(?:[^']|'')+'|[^!]+)!)?\$?(?P<col>[A-Za-z]{1,3})\$?(?P<row>\d+)"
+)
+
+CELL_LINKS_JS = """
+(function () {
+  function parse(hash) {
+    var ref = decodeURIComponent(hash.replace(/^#/, ""));
+    var bang = ref.lastIndexOf("!");
+    var match = /^\\$?([A-Za-z]+)\\$?(\\d+)$/.exec(ref.slice(bang + 1));
+    if (bang < 1 || !match) {
+      return null;
+    }
+    var sheet = ref.slice(0, bang).replace(/^'(.*)'$/, "$1").replace(/''/g, "'");
+    var col = 0, letters = match[1].toUpperCase();
+    for (var i = 0; i < letters.length; i++) {
+      col = col * 26 + letters.charCodeAt(i) - 64;
+    }
+    return { id: sheet + "!" + letters + match[2], sheet: sheet, row: +match[2], col: col };
+  }
+  function cellAt(table, row, col) {
+    // Row 0 of the first body is the column sizes row; row N is sheet row N.
+    var rows = table.tBodies[0].rows, covered = {};
+    for (var r = 1; r <= row && r < rows.length; r++) {
+      var c = 1, cells = rows[r].cells;
+      for (var i = 0; i < cells.length; i++) {
+        while (covered[r + ":" + c]) {
+          c++;
+        }
+        var cell = cells[i];
+        for (var dr = 0; dr < (cell.rowSpan || 1); dr++) {
+          for (var dc = 0; dc < (cell.colSpan || 1); dc++) {
+            covered[(r + dr) + ":" + (c + dc)] = cell;
+          }
+        }
+        c += cell.colSpan || 1;
+      }
+    }
+    return covered[row + ":" + col] || null;
+  }
+  function resolve() {
+    var target = location.hash && parse(location.hash);
+    if (!target || document.getElementById(target.id)) {
+      return;
+    }
+    var tables = document.querySelectorAll("table[data-sheet]");
+    for (var i = 0; i < tables.length; i++) {
+      if (tables[i].getAttribute("data-sheet") === target.sheet) {
+        var cell = cellAt(tables[i], target.row, target.col);
+        if (cell) {
+          if (!cell.id) {
+            cell.id = target.id;
+          }
+          cell.scrollIntoView();
+        }
+        return;
+      }
+    }
+  }
+  window.addEventListener("hashchange", resolve);
+  // Sheets loaded later (multi-file output) announce their new content.
+  document.addEventListener("xx2html:content", resolve);
+  resolve();
+})();
+"""
+
+
+def parse_cell_location(location: str, default_sheet: str) -> str | None:
+    """Return the `Sheet!A1` cell id a hyperlink location points at, if any.
+
+    Quoted sheet names and absolute (`$A$1`) or range (`A1:B2`) references
+    are accepted; a range resolves to its first cell.
+    """
+    match = _CELL_LOCATION_PATTERN.match(location.strip().lstrip("#"))
+    if match is None:
+        return None
+    sheet = match.group("sheet")
+    if sheet is None:
+        sheet = default_sheet
+    elif sheet.startswith("'") and sheet.endswith("'"):
+        sheet = sheet[1:-1].replace("''", "'")
+    return f"{sheet}!{match.group('col').upper()}{match.group('row')}"
+
+
+def get_hyperlink_target_ids(worksheet: Worksheet) -> set[str]:
+    """Return the ids of cells that hyperlinks on `worksheet` point at."""
+    target_ids: set[str] = set()
+    for cell in worksheet._cells.values():
+        hyperlink = getattr(cell, "hyperlink", None)
+        location = getattr(hyperlink, "location", None)
+        if isinstance(location, str) and location:
+            target_id = parse_cell_location(location, worksheet.title)
+            if target_id is not None:
+                target_ids.add(target_id)
+    return target_ids
+
+
+def get_cell_links_html() -> str:
+    """Return the script that resolves deep links to cells rendered without ids."""
+    return f"<script>{CELL_LINKS_JS}</script>"
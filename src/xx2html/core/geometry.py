@@ -0,0 +1,70 @@
+"""Per-sheet row/column pixel geometry with prefix sums."""
+
+from collections.abc import Iterable
+from itertools import accumulate
+
+
+class SheetGeometry:
+    """Effective row heights and column widths of one rendered worksheet.
+
+    Rows and columns are 1-based. Prefix sums make span sizes and absolute
+    offsets O(1); positions past the indexed range use the default size.
+    """
+
+    def __init__(
+        self,
+        row_heights: Iterable[int],
+        col_widths: Iterable[int],
+        default_row_height: int,
+        default_col_width: int,
+    ) -> None:
+        self.row_heights = list(row_heights)
+        self.col_widths = list(col_widths)
+        self.default_row_height = default_row_height
+        self.default_col_width = default_col_width
+        self._row_offsets = [0, *accumulate(self.row_heights)]
+        self._col_offsets = [0, *accumulate(self.col_widths)]
+
+    @property
+    def row_count(self) -> int:
+        return len(self.row_heights)
+
+    @property
+    def col_count(self) -> int:
+        return len(self.col_widths)
+
+    @staticmethod
+    def _offset(offsets: list[int], default: int, index: int) -> int:
+        # Offset of the leading edge of 1-based `index`.
+        if index < 1:
+            raise ValueError(f"Geometry index must be >= 1, got {index}.")
+        indexed = len(offsets) - 1
+        if index - 1 <= indexed:
+            return offsets[index - 1]
+        return offsets[indexed] + (index - 1 - indexed) * default
+
+    def row_offset(self, row: int) -> int:
+        """Return the top offset (px) of `row` from the top of the sheet."""
+        return self._offset(self._row_offsets, self.default_row_height, row)
+
+    def col_offset(self, col: int) -> int:
+        """Return the left offset (px) of `col` from the left of the sheet."""
+        return self._offset(self._col_offsets, self.default_col_width, col)
+
+    def rows_height(self, start_row: int, count: int = 1) -> int:
+        """Return the total height of `count` rows starting at `start_row`."""
+        return self.row_offset(start_row + count) - self.row_offset(start_row)
+
+    def cols_width(self, start_col: int, count: int = 1) -> int:
+        """Return the total width of `count` columns starting at `start_col`."""
+        return self.col_offset(start_col + count) - self.col_offset(start_col)
+
+    @property
+    def height(self) -> int:
+        """Total height of the indexed rows."""
+        return self._row_offsets[-1]
+
+    @property
+    def width(self) -> int:
+        """Total width of the indexed columns."""
+        return self._col_offsets[-1]
@@ -0,0 +1,388 @@
+"""Image helpers: header-only size probing and streaming data-URI encoding."""
+
+import base64
+import hashlib
+import logging
+import math
+import mimetypes
+import os
+import struct
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+from typing import IO, Protocol, TypeVar
+
+from xx2html.core.types import ImageSize
+
+DATAURI_CHUNK_SIZE = 3 * 16 * 1024  # multiple of 3 -> no padding between chunks
+DEFAULT_IMAGE_MIME = "application/octet-stream"
+
+SUPPORTED_OUTPUT_IMAGE_FORMATS = {"png": "PNG", "jpeg": "JPEG", "jpg": "JPEG", "webp": "WEBP"}
+_IMAGE_FORMAT_EXTENSIONS = {"PNG": ".png", "JPEG": ".jpg", "WEBP": ".webp", "GIF": ".gif"}
+_IMAGE_CACHE_SIZE = 256
+_IMAGE_CACHE_BYTES = 64 * 1024 * 1024
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_GIF_SIGNATURES = (b"GIF87a", b"GIF89a")
+_JPEG_SOF_MARKERS = frozenset(
+    range(0xC0, 0xD0)
+) - {0xC4, 0xC8, 0xCC}
+_JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+
+class _Readable(Protocol):
+    def read(self, size: int = -1, /) -> bytes: ...
+
+
+def _read_exact(stream: _Readable, size: int) -> bytes | None:
+    """Read exactly `size` bytes, returning `None` on a short read."""
+    data = b""
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def _probe_png(header: bytes) -> ImageSize | None:
+    if len(header) < 24 or header[12:16] != b"IHDR":
+        return None
+    width, height = struct.unpack(">II", header[16:24])
+    return width, height
+
+
+def _probe_gif(header: bytes) -> ImageSize | None:
+    if len(header) < 10:
+        return None
+    width, height = struct.unpack("<HH", header[6:10])
+    return width, height
+
+
+def _probe_webp(header: bytes) -> ImageSize | None:
+    if len(header) < 30:
+        return None
+    chunk_type = header[12:16]
+    if chunk_type == b"VP8 " and header[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk_type == b"VP8L" and header[20] == 0x2F:
+        bits = int.from_bytes(header[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk_type == b"VP8X":
+        width = int.from_bytes(header[24:27], "little") + 1
+        height = int.from_bytes(header[27:30], "little") + 1
+        return width, height
+    return None
+
+
+def _probe_jpeg(stream: _Readable) -> ImageSize | None:
+    """Walk JPEG marker segments (after SOI) until a start-of-frame marker."""
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            return None
+        if byte != b"\xff":
+            return None
+        marker = stream.read(1)
+        while marker == b"\xff":
+            marker = stream.read(1)
+        if not marker:
+            return None
+        marker_code = marker[0]
+        if marker_code in _JPEG_STANDALONE_MARKERS:
+            continue
+        length_bytes = _read_exact(stream, 2)
+        if length_bytes is None:
+            return None
+        (segment_length,) = struct.unpack(">H", length_bytes)
+        if segment_length < 2:
+            return None
+        if marker_code in _JPEG_SOF_MARKERS:
+            frame_header = _read_exact(stream, 5)
+            if frame_header is None:
+                return None
+            height, width = struct.unpack(">HH", frame_header[1:5])
+            return width, height
+        if _read_exact(stream, segment_length - 2) is None:
+            return None
+
+
+def probe_image_size(stream: IO[bytes]) -> ImageSize | None:
+    """Return `(width, height)` from PNG, JPEG, GIF or WebP headers.
+
+    Only the header bytes are read from `stream`. Returns `None` for other
+    formats, truncated headers or non-positive sizes.
+    """
+    header = stream.read(30)
+    size: ImageSize | None = None
+    if header.startswith(_PNG_SIGNATURE):
+        size = _probe_png(header)
+    elif header[:6] in _GIF_SIGNATURES:
+        size = _probe_gif(header)
+    elif header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        size = _probe_webp(header)
+    elif header[:2] == b"\xff\xd8":
+        size = _probe_jpeg(_PrefixedStream(header[2:], stream))
+
+    if size is None or size[0] <= 0 or size[1] <= 0:
+        return None
+    return size
+
+
+def get_image_size(stream: IO[bytes]) -> ImageSize | None:
+    """Probe image headers first and fall back to PIL for other formats.
+
+    `stream` must be seekable for the PIL fallback. PIL errors
+    (`UnidentifiedImageError`, `OSError`) are propagated to the caller.
+    """
+    size = probe_image_size(stream)
+    if size is not None:
+        return size
+    from PIL import Image
+
+    stream.seek(0)
+    with Image.open(stream) as image:
+        width, height = image.size
+    if width <= 0 or height <= 0:
+        return None
+    return width, height
+
+
+def guess_image_mime(name: str) -> str:
+    """Return the MIME type for an image path, based on its extension."""
+    mime, _ = mimetypes.guess_type(name)
+    return mime if mime is not None else DEFAULT_IMAGE_MIME
+
+
+def write_datauri(
+    write: Callable[[str], object],
+    stream: IO[bytes],
+    name: str,
+    chunk_size: int = DATAURI_CHUNK_SIZE,
+) -> None:
+    """Stream `stream` as a base64 data URI into `write`, chunk by chunk.
+
+    No full-size copy of the payload or of its base64 form is built.
+    """
+    if chunk_size <= 0 or chunk_size % 3 != 0:
+        raise ValueError("chunk_size must be a positive multiple of 3.")
+    write(f"data:{guess_image_mime(name)};base64,")
+    pending = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        if pending:
+            chunk = pending + chunk
+        usable_length = len(chunk) - (len(chunk) % 3)
+        pending = chunk[usable_length:]
+        if usable_length:
+            write(base64.b64encode(chunk[:usable_length]).decode("ascii"))
+    if pending:
+        write(base64.b64encode(pending).decode("ascii"))
+
+
+def map_images_in_order(
+    func: Callable[[_T], _R],
+    items: Iterable[_T],
+    max_workers: int | None = None,
+) -> Iterator[_R]:
+    """Yield `func(item)` for each item, in input order.
+
+    With `max_workers > 1` items are processed on a bounded thread pool (image
+    decode, resize and zlib inflate release the GIL). At most
+    `2 * max_workers` results are in flight, which bounds memory use.
+    """
+    if max_workers is None or max_workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    pending: deque[Future[_R]] = deque()
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="xx2html-images"
+    ) as executor:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= 2 * max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def datauri_from_bytes(data: bytes, name: str) -> str:
+    """Return `data` as a base64 data URI string."""
+    return f"data:{guess_image_mime(name)};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+class ImageOptimizer:
+    """Resample embedded images to their rendered size and optionally re-encode them.
+
+    Images are only ever downsized, to `scale` times the largest box they are
+    rendered in. Results are cached (LRU, thread-safe) by content hash and
+    target size, so repeated pictures are processed once; the cache holds at
+    most `cache_size` entries and `cache_bytes` bytes of payloads.
+    """
+
+    def __init__(
+        self,
+        scale: float | None = 2.0,
+        image_format: str | None = None,
+        quality: int = 85,
+        cache_size: int = _IMAGE_CACHE_SIZE,
+        cache_bytes: int = _IMAGE_CACHE_BYTES,
+    ) -> None:
+        if scale is not None and not scale > 0:
+            raise ValueError("scale must be > 0.")
+        output_format = None
+        if image_format is not None:
+            output_format = SUPPORTED_OUTPUT_IMAGE_FORMATS.get(image_format.lower())
+            if output_format is None:
+                raise ValueError(
+                    "image_format must be one of: "
+                    + ", ".join(sorted(SUPPORTED_OUTPUT_IMAGE_FORMATS))
+                )
+        self.scale = scale
+        self.output_format = output_format
+        self.quality = quality
+        self.cache_size = cache_size
+        self.cache_bytes = cache_bytes
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache: OrderedDict[tuple[str, ImageSize | None], tuple[bytes, str]] = (
+            OrderedDict()
+        )
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    def get_target_size(self, box: ImageSize | None) -> ImageSize | None:
+        """Return the maximum output size for an image rendered in `box`."""
+        if self.scale is None or box is None:
+            return None
+        box_width, box_height = box
+        if box_width <= 0 or box_height <= 0:
+            return None
+        return (
+            max(1, math.ceil(box_width * self.scale)),
+            max(1, math.ceil(box_height * self.scale)),
+        )
+
+    def optimize(
+        self, data: bytes, name: str, box: ImageSize | None
+    ) -> tuple[bytes, str]:
+        """Return `(payload, name)` for `data` rendered in `box` (pixels).
+
+        The returned name carries the extension of the output format. The
+        original payload is returned when the image cannot be improved.
+        """
+        target_size = self.get_target_size(box)
+        cache_key = (hashlib.sha256(data).hexdigest(), target_size)
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+                self.cache_hits += 1
+                return cached[0], os.path.splitext(name)[0] + cached[1]
+            self.cache_misses += 1
+
+        result = self._optimize(data, name, target_size)
+        extension = os.path.splitext(result[1])[1]
+        if len(result[0]) > self.cache_bytes:
+            return result
+        with self._lock:
+            replaced = self._cache.pop(cache_key, None)
+            if replaced is not None:
+                self._cached_bytes -= len(replaced[0])
+            self._cache[cache_key] = (result[0], extension)
+            self._cached_bytes += len(result[0])
+            while (
+                len(self._cache) > self.cache_size
+                or self._cached_bytes > self.cache_bytes
+            ):
+                evicted, _ = self._cache.popitem(last=False)[1]
+                self._cached_bytes -= len(evicted)
+        return result
+
+    def _optimize(
+        self, data: bytes, name: str, target_size: ImageSize | None
+    ) -> tuple[bytes, str]:
+        from PIL import Image, UnidentifiedImageError
+
+        try:
+            with Image.open(BytesIO(data)) as image:
+                source_format = image.format
+                if getattr(image, "is_animated", False):
+                    return data, name
+                output_format = self.output_format or source_format
+                if output_format not in _IMAGE_FORMAT_EXTENSIONS:
+                    return data, name
+                needs_resize = target_size is not None and (
+                    image.width > target_size[0] or image.height > target_size[1]
+                )
+                if not needs_resize and output_format == source_format:
+                    return data, name
+
+                output_image: Image.Image = image
+                if needs_resize and target_size is not None:
+                    image.draft(image.mode, target_size)
+                    image.thumbnail(target_size, Image.Resampling.LANCZOS)
+                has_alpha = image.mode in {"RGBA", "LA", "PA"} or (
+                    image.mode == "P" and "transparency" in image.info
+                )
+                if output_format == "JPEG":
+                    if has_alpha:
+                        output_format = (
+                            source_format
+                            if source_format in _IMAGE_FORMAT_EXTENSIONS
+                            else "PNG"
+                        )
+                    elif image.mode != "RGB":
+                        output_image = image.convert("RGB")
+
+                buffer = BytesIO()
+                save_kwargs: dict[str, object] = {"optimize": True}
+                if output_format in {"JPEG", "WEBP"}:
+                    save_kwargs["quality"] = self.quality
+                output_image.save(buffer, format=output_format, **save_kwargs)
+        except (
+            UnidentifiedImageError,
+            Image.DecompressionBombError,
+            OSError,
+            ValueError,
+        ) as image_exc:
+            logging.warning(
+                "ImageOptimizer: Unable to optimize image '%s': %r", name, image_exc
+            )
+            return data, name
+
+        payload = buffer.getvalue()
+        if len(payload) >= len(data) and not needs_resize:
+            return data, name
+        return payload, os.path.splitext(name)[0] + _IMAGE_FORMAT_EXTENSIONS[output_format]
+
+
+class _PrefixedStream:
+    """Minimal read-only stream that replays `prefix` before `stream`."""
+
+    def __init__(self, prefix: bytes, stream: _Readable) -> None:
+        self._prefix = prefix
+        self._stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._prefix:
+            return self._stream.read(size)
+        if size < 0:
+            data = self._prefix + self._stream.read()
+            self._prefix = b""
+            return data
+        data = self._prefix[:size]
+        self._prefix = self._prefix[size:]
+        if len(data) < size:
+            data += self._stream.read(size - len(data))
+        return data
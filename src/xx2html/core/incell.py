@@ -1,33 +1,264 @@
 """Generate CSS rules for Excel in-cell rich-value images."""
 
-from io import BytesIO
+import json
 import logging
+from collections.abc import Callable
+from io import BytesIO, StringIO
 from zipfile import ZipFile
-from PIL import Image, UnidentifiedImageError
-from xlsx2html.utils.image import bytes_to_datauri
 
-from xx2html.core.types import CellDimensions
+from xx2html.core.archive import get_member_names
+from xx2html.core.images import (
+    ImageOptimizer,
+    get_image_size,
+    map_images_in_order,
+    write_datauri,
+)
+from xx2html.core.types import CellDimensions, ImageSize
 
+INCELL_FIT_WIDTH_CLASS = "incell-fit-width"
+INCELL_FIT_HEIGHT_CLASS = "incell-fit-height"
 
-def get_incell_css(
-    vm_ids: set[str],
+_INCELL_SHARED_CSS = """
+.incell-image img {
+    width: 100%;
+    height: 100%;
+    max-width: 100%;
+    max-height: 100%;
+    object-fit: contain;
+}
+.incell-image.incell-fit-width img {
+    width: 100%;
+    height: auto;
+}
+.incell-image.incell-fit-height img {
+    width: auto;
+    height: 100%;
+}
+"""
+
+
+def _read_image_size(archive: ZipFile, target_path: str, rel_id: str) -> ImageSize | None:
+    """Return `(width, height)` of an archive image, or `None` if unreadable.
+
+    Only the image header is decompressed for PNG, JPEG, GIF and WebP.
+    """
+    try:
+        with archive.open(target_path) as ifile:
+            return get_image_size(ifile)
+    # PIL's UnidentifiedImageError is an OSError; PIL stays lazily imported.
+    except OSError as image_exc:
+        logging.warning(
+            "incell: Unable to read image size for vm(rId)=%s (%s): %r",
+            rel_id,
+            target_path,
+            image_exc,
+        )
+        return None
+
+
+def get_incell_fit_class(
+    cell_dimensions: CellDimensions, image_size: ImageSize | None
+) -> str | None:
+    """Return the shared fit class for one in-cell image cell.
+
+    Cells whose box or image size is unknown get `None` and keep the default
+    `.incell-image` fill rules.
+    """
+    if image_size is None:
+        return None
+    cell_width = cell_dimensions.get("width", 0)
+    cell_height = cell_dimensions.get("height", 0)
+    img_width, img_height = image_size
+    if not (
+        isinstance(cell_width, int)
+        and isinstance(cell_height, int)
+        and cell_width > 0
+        and cell_height > 0
+        and img_width > 0
+        and img_height > 0
+    ):
+        return None
+    if img_width / img_height >= cell_width / cell_height:
+        return INCELL_FIT_WIDTH_CLASS
+    return INCELL_FIT_HEIGHT_CLASS
+
+
+def get_incell_image_boxes(
     vm_ids_dimension_references: dict[str, CellDimensions],
     vm_cell_vm_ids: dict[str, str],
+) -> dict[str, ImageSize]:
+    """Return the largest rendered cell box (width, height) for each vm id."""
+    image_boxes: dict[str, ImageSize] = {}
+    for cell_class_name, cell_dimensions in vm_ids_dimension_references.items():
+        vm_id = vm_cell_vm_ids.get(cell_class_name)
+        if vm_id is None:
+            continue
+        box_width, box_height = image_boxes.get(vm_id, (0, 0))
+        image_boxes[vm_id] = (
+            max(box_width, cell_dimensions["width"]),
+            max(box_height, cell_dimensions["height"]),
+        )
+    return image_boxes
+
+
+def get_incell_image_sizes(
     incell_images_refs: dict[str, str],
     archive: ZipFile,
-) -> str:
-    """Create per-vm and per-cell CSS rules for in-cell image rendering."""
-    styles = []
-    archive_namelist = archive.namelist()
-    image_specs: dict[str, dict[str, object]] = {}
+    image_workers: int | None = None,
+) -> dict[str, ImageSize]:
+    """Read intrinsic image sizes for every referenced in-cell image.
+
+    Sizes are needed before worksheet rendering so each cell can be assigned a
+    shared fit class instead of a per-cell sizing rule.
+    """
+    archive_namelist = get_member_names(archive)
+    refs = [
+        (vm_id, target_path)
+        for vm_id, target_path in sorted(incell_images_refs.items())
+        if target_path in archive_namelist
+    ]
+    image_sizes: dict[str, ImageSize] = {}
+    for (vm_id, _), image_size in zip(
+        refs,
+        map_images_in_order(
+            lambda ref: _read_image_size(archive, ref[1], f"rId{ref[0]}"),
+            refs,
+            image_workers,
+        ),
+    ):
+        if image_size is not None:
+            image_sizes[vm_id] = image_size
+    return image_sizes
+
+
+def _write_incell_image_payload(
+    write: Callable[[str], object],
+    archive: ZipFile,
+    target_path: str,
+    image_optimizer: ImageOptimizer | None,
+    image_box: ImageSize | None,
+) -> None:
+    """Write one archive image as a data URI, optimizing it when requested."""
+    with archive.open(target_path) as ifile:
+        if image_optimizer is None:
+            write_datauri(write, ifile, target_path)
+        else:
+            payload, payload_name = image_optimizer.optimize(
+                ifile.read(), target_path, image_box
+            )
+            write_datauri(write, BytesIO(payload), payload_name)
+
+
+def _write_incell_image_rule(
+    write: Callable[[str], object],
+    archive: ZipFile,
+    vm_id: str,
+    target_path: str,
+    incell_image_sizes: dict[str, ImageSize] | None,
+    image_optimizer: ImageOptimizer | None,
+    image_box: ImageSize | None,
+    payload_write: Callable[[str], object] | None = None,
+) -> None:
+    """Write the `.vm-richvaluerel_rid{vm_id}` rule for one image.
+
+    With `payload_write`, the data URI is written there as a `"vm_id":"..."`
+    JSON member instead of a CSS `content:url(...)` declaration.
+    """
+    rel_id = f"rId{vm_id}"
+    logging.info(f"get_incell_css: Reading vm(rId): {rel_id} -> file '{target_path}'")
+
+    image_size = (
+        incell_image_sizes.get(vm_id)
+        if incell_image_sizes is not None
+        else _read_image_size(archive, target_path, rel_id)
+    )
+    aspect_ratio_rule = (
+        f"aspect-ratio: {image_size[0]} / {image_size[1]};"
+        if image_size is not None
+        else ""
+    )
+
+    if payload_write is not None:
+        write(
+            f"\n.vm-richvaluerel_rid{vm_id} img {{\n    display:block;\n    {aspect_ratio_rule}\n}}\n"
+        )
+        payload_write(f'{json.dumps(vm_id)}:"')
+        _write_incell_image_payload(
+            payload_write, archive, target_path, image_optimizer, image_box
+        )
+        payload_write('"')
+        return
+
+    write(f'\n.vm-richvaluerel_rid{vm_id} img {{\n    content:url("')
+    _write_incell_image_payload(write, archive, target_path, image_optimizer, image_box)
+    write(f'");\n    display:block;\n    {aspect_ratio_rule}\n}}\n')
+
+
+def write_incell_css(
+    write: Callable[[str], object],
+    vm_ids: set[str],
+    incell_images_refs: dict[str, str],
+    archive: ZipFile,
+    incell_image_sizes: dict[str, ImageSize] | None = None,
+    image_optimizer: ImageOptimizer | None = None,
+    incell_image_boxes: dict[str, ImageSize] | None = None,
+    image_workers: int | None = None,
+    payload_write: Callable[[str], object] | None = None,
+) -> None:
+    """Write shared fit rules and one content rule per in-cell image to `write`.
+
+    Image payloads are base64-encoded straight from the archive member into
+    `write`, without materializing the image bytes or the data URI. When an
+    `image_optimizer` is given, each image is first resampled for its largest
+    rendered box from `incell_image_boxes`.
+
+    With `image_workers > 1`, images are read, optimized and encoded on a
+    bounded thread pool; each rule is then buffered until it can be written in
+    `vm_id` order, so the output is identical to the sequential one.
+
+    When `payload_write` is given (lazy image loading), the CSS carries no
+    image data and a JSON object mapping `vm_id` to data URI is written to
+    `payload_write` instead.
+    """
+    if payload_write is not None:
+        payload_write("{")
+    _write_incell_css(
+        write,
+        vm_ids,
+        incell_images_refs,
+        archive,
+        incell_image_sizes,
+        image_optimizer,
+        incell_image_boxes,
+        image_workers,
+        payload_write,
+    )
+    if payload_write is not None:
+        payload_write("}")
+
+
+def _write_incell_css(
+    write: Callable[[str], object],
+    vm_ids: set[str],
+    incell_images_refs: dict[str, str],
+    archive: ZipFile,
+    incell_image_sizes: dict[str, ImageSize] | None,
+    image_optimizer: ImageOptimizer | None,
+    incell_image_boxes: dict[str, ImageSize] | None,
+    image_workers: int | None,
+    payload_write: Callable[[str], object] | None,
+) -> None:
+    if not vm_ids:
+        return
+
+    write(_INCELL_SHARED_CSS)
+    archive_namelist = get_member_names(archive)
 
+    image_tasks: list[tuple[str, str]] = []
     for vm_id in sorted(vm_ids):
         rel_id = f"rId{vm_id}"
 
-        # logging.debug(f"Transform (wb|incell): Working with vm(rId): {rel_id}")
         logging.info(f"Transform (wb|incell): Working with vm(rId): {rel_id}")
-        # if rel_id in incell_images:
-        # if vm_id in incell_images_refs:
         target_path = incell_images_refs.get(vm_id, None)
         if target_path is None:
             logging.warning(
@@ -39,82 +270,78 @@ def get_incell_css(
                 f"get_incell_css: vm(rId) -> image '{target_path}' not found in excel file!"
             )
             continue
-        # logging.debug(f"Transform (wb|incell): Reading vm(rId): {rel_id} -> file at {target_path}")
-        logging.info(f"get_incell_css: Reading vm(rId): {rel_id} -> file '{target_path}'")
-        with archive.open(target_path) as ifile:
-            image_bytes = ifile.read()
-
-        src = bytes_to_datauri(BytesIO(image_bytes), target_path)
-        width = None
-        height = None
-        try:
-            with Image.open(BytesIO(image_bytes)) as image:
-                width, height = image.size
-        except (UnidentifiedImageError, OSError) as image_exc:
-            logging.warning(
-                "get_incell_css: Unable to read image size for vm(rId)=%s (%s): %r",
-                rel_id,
-                target_path,
-                image_exc,
-            )
-        image_specs[vm_id] = {"src": src, "width": width, "height": height}
+        image_tasks.append((vm_id, target_path))
 
-        styles.append(
-            """
-.vm-richvaluerel_rid%s img {
-    content:url("%s");
-    display:block;
-}
-                """
-            % (vm_id, src)
+    def write_rule(
+        rule_write: Callable[[str], object],
+        rule_payload_write: Callable[[str], object] | None,
+        vm_id: str,
+        target_path: str,
+    ) -> None:
+        _write_incell_image_rule(
+            rule_write,
+            archive,
+            vm_id,
+            target_path,
+            incell_image_sizes,
+            image_optimizer,
+            incell_image_boxes.get(vm_id) if incell_image_boxes is not None else None,
+            payload_write=rule_payload_write,
         )
 
-    for cell_class_name, cell_dimensions in vm_ids_dimension_references.items():
-        cell_vm_id = vm_cell_vm_ids.get(cell_class_name)
-        image_spec: dict[str, object] = {}
-        if cell_vm_id is not None:
-            image_spec = image_specs.get(cell_vm_id, {})
-        cell_width = cell_dimensions.get("width", 0)
-        cell_height = cell_dimensions.get("height", 0)
-        img_width = image_spec.get("width")
-        img_height = image_spec.get("height")
-
-        width_rule = "width: 100%;"
-        height_rule = "height: 100%;"
-        aspect_ratio_rule = ""
-
-        if (
-            isinstance(cell_width, int)
-            and isinstance(cell_height, int)
-            and cell_width > 0
-            and cell_height > 0
-            and isinstance(img_width, int)
-            and isinstance(img_height, int)
-            and img_width > 0
-            and img_height > 0
-        ):
-            cell_aspect_ratio = cell_width / cell_height
-            image_aspect_ratio = img_width / img_height
-            if image_aspect_ratio >= cell_aspect_ratio:
-                width_rule = "width: 100%;"
-                height_rule = "height: auto;"
-            else:
-                width_rule = "width: auto;"
-                height_rule = "height: 100%;"
-            aspect_ratio_rule = f"aspect-ratio: {img_width} / {img_height};"
-
-        styles.append(
-            """
-.%s img {
-    %s
-    %s
-    max-width: 100%%;
-    max-height: 100%%;
-    object-fit: contain;
-    %s
-}
-            """
-            % (cell_class_name, width_rule, height_rule, aspect_ratio_rule)
+    if image_workers is None or image_workers <= 1:
+        for task_index, (vm_id, target_path) in enumerate(image_tasks):
+            if payload_write is not None and task_index > 0:
+                payload_write(",")
+            write_rule(write, payload_write, vm_id, target_path)
+        return
+
+    def render_rule(image_task: tuple[str, str]) -> tuple[str, str]:
+        rule_buffer = StringIO()
+        payload_buffer = StringIO()
+        write_rule(
+            rule_buffer.write,
+            payload_buffer.write if payload_write is not None else None,
+            *image_task,
         )
+        return rule_buffer.getvalue(), payload_buffer.getvalue()
+
+    for task_index, (rule, payload) in enumerate(
+        map_images_in_order(render_rule, image_tasks, image_workers)
+    ):
+        write(rule)
+        if payload_write is not None:
+            if task_index > 0:
+                payload_write(",")
+            payload_write(payload)
+
+
+def get_incell_css(
+    vm_ids: set[str],
+    incell_images_refs: dict[str, str],
+    archive: ZipFile,
+    incell_image_sizes: dict[str, ImageSize] | None = None,
+    image_optimizer: ImageOptimizer | None = None,
+    incell_image_boxes: dict[str, ImageSize] | None = None,
+    image_workers: int | None = None,
+    payload_write: Callable[[str], object] | None = None,
+) -> str:
+    """Create shared fit rules and one content rule per in-cell image.
 
-    return "\n".join(styles)
+    Cell sizing is expressed through the shared `.incell-image`,
+    `.incell-fit-width` and `.incell-fit-height` classes, so the output grows
+    with the number of distinct images rather than with the number of cells.
+    """
+    buffer = StringIO()
+    write_incell_css(
+        buffer.write,
+        vm_ids,
+        incell_images_refs,
+        archive,
+        incell_image_sizes=incell_image_sizes,
+        image_optimizer=image_optimizer,
+        incell_image_boxes=incell_image_boxes,
+        image_workers=image_workers,
+        payload_write=payload_write,
+    )
+    return buffer.getvalue()
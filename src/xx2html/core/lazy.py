@@ -0,0 +1,59 @@
+"""Browser-side lazy loading of embedded image payloads."""
+
+LAZY_IMAGES_PAYLOADS_ID = "xx2html-incell-images"
+
+LAZY_IMAGES_JS = """
+(function () {
+  var payloadsNode = document.getElementById("%s");
+  var payloads = payloadsNode ? JSON.parse(payloadsNode.textContent || "{}") : {};
+  var observer = "IntersectionObserver" in window
+    ? new IntersectionObserver(function (entries) {
+        entries.forEach(function (entry) {
+          if (entry.isIntersecting) {
+            observer.unobserve(entry.target);
+            load(entry.target);
+          }
+        });
+      }, { rootMargin: "200px" })
+    : null;
+  function load(img) {
+    var src = img.getAttribute("data-xx2html-src");
+    if (!src) {
+      src = payloads[img.getAttribute("data-xx2html-vm")];
+    }
+    if (src) {
+      img.src = src;
+    }
+    img.removeAttribute("data-xx2html-src");
+    img.removeAttribute("data-xx2html-vm");
+  }
+  function watch(scope) {
+    var images = scope.querySelectorAll("img[data-xx2html-src], img[data-xx2html-vm]");
+    Array.prototype.forEach.call(images, function (img) {
+      if (observer) {
+        observer.observe(img);
+      } else {
+        load(img);
+      }
+    });
+  }
+  // Sheets loaded later (multi-file output) announce their new content.
+  document.addEventListener("xx2html:content", function (event) {
+    watch(event.target);
+  });
+  watch(document);
+})();
+""" % LAZY_IMAGES_PAYLOADS_ID
+
+
+def get_lazy_images_html(incell_payloads_json: str) -> str:
+    """Return the payload block and observer script for lazy image loading.
+
+    `incell_payloads_json` is the JSON object (`vm_id -> data URI`) written by
+    `write_incell_css(..., payload_write=...)`.
+    """
+    return (
+        f'<script type="application/json" id="{LAZY_IMAGES_PAYLOADS_ID}">'
+        f"{incell_payloads_json}</script>"
+        f"<script>{LAZY_IMAGES_JS}</script>"
+    )
@@ -1,9 +1,11 @@
 """Rewrite worksheet and external links in generated HTML."""
 
 from copy import deepcopy
+from typing import TYPE_CHECKING
 from urllib.parse import urlparse
 
-from bs4 import BeautifulSoup
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 
 def _normalize_space_tokens(value: object) -> list[str]:
@@ -63,6 +65,8 @@ def update_links(
     update_ext_links: bool = True,
 ) -> str:
     """Rewrite anchor tags for worksheet-local and external navigation."""
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, "lxml")
     update_links_in_soup(
         soup,
@@ -73,8 +77,29 @@ def update_links(
     return str(soup)
 
 
+def update_links_in_fragment(
+    html: str,
+    encoded_sheet_names: dict[str, str],
+    update_local_links: bool = True,
+    update_ext_links: bool = True,
+) -> str:
+    """Rewrite anchor tags in an HTML fragment without adding a document shell."""
+    if "<a" not in html:
+        return html
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    update_links_in_soup(
+        soup,
+        encoded_sheet_names,
+        update_local_links=update_local_links,
+        update_ext_links=update_ext_links,
+    )
+    return str(soup)
+
+
 def update_links_in_soup(
-    soup: BeautifulSoup,
+    soup: "BeautifulSoup",
     encoded_sheet_names: dict[str, str],
     update_local_links: bool = True,
     update_ext_links: bool = True,
@@ -0,0 +1,130 @@
+"""Multi-file output: an index shell, per-sheet fragments and a shared stylesheet."""
+
+import hashlib
+import os
+import re
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+FRAGMENT_SHEET_ATTR = "data-xx2html-sheet"
+FRAGMENT_URL_ATTR = "data-xx2html-fragment"
+CONTENT_EVENT = "xx2html:content"
+
+_CONTENT_HASH_LENGTH = 12
+_ASSET_NAME_PATTERN = re.compile(
+    r"^(?:sheet_[0-9a-f]+|styles)\.[0-9a-f]{%d}\.(?:html|css)(?:\.gz|\.zst)?$"
+    % _CONTENT_HASH_LENGTH
+)
+
+FRAGMENT_LOADER_JS = """
+(function () {
+  var SHEET_ATTR = "%s", URL_ATTR = "%s", CONTENT_EVENT = "%s";
+  var pending = {};
+  function placeholder(sheet) {
+    return document.querySelector("[" + SHEET_ATTR + '="' + sheet + '"]');
+  }
+  function load(sheet) {
+    var node = placeholder(sheet);
+    if (!node || !node.hasAttribute(URL_ATTR) || pending[sheet]) {
+      return;
+    }
+    pending[sheet] = fetch(node.getAttribute(URL_ATTR))
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error("HTTP " + response.status);
+        }
+        return response.text();
+      })
+      .then(function (html) {
+        node.innerHTML = html;
+        node.removeAttribute(URL_ATTR);
+        node.dispatchEvent(new CustomEvent(CONTENT_EVENT, { bubbles: true }));
+        if (location.hash === "#" + sheet) {
+          var target = document.getElementById(sheet);
+          if (target) {
+            target.scrollIntoView();
+          }
+        }
+      })
+      .catch(function (error) {
+        delete pending[sheet];
+        console.error("xx2html: unable to load sheet " + sheet, error);
+      });
+  }
+  function hashSheet(href) {
+    var index = href ? href.lastIndexOf("#") : -1;
+    return index === -1 ? "" : decodeURIComponent(href.slice(index + 1));
+  }
+  document.addEventListener("click", function (event) {
+    var link = event.target.closest ? event.target.closest("a[href*='#']") : null;
+    if (link) {
+      load(hashSheet(link.getAttribute("href")));
+    }
+  });
+  window.addEventListener("hashchange", function () {
+    load(hashSheet(location.hash));
+  });
+  var initial = hashSheet(location.hash);
+  var first = document.querySelector("[" + SHEET_ATTR + "]");
+  load(placeholder(initial) ? initial : first && first.getAttribute(SHEET_ATTR));
+})();
+""" % (FRAGMENT_SHEET_ATTR, FRAGMENT_URL_ATTR, CONTENT_EVENT)
+
+
+def get_assets_dir(dest: str) -> str:
+    """Return the directory that holds the fragments of the `dest` index file."""
+    root, _ = os.path.splitext(dest)
+    return f"{root}_files"
+
+
+def get_content_hashed_name(stem: str, suffix: str, content: str) -> str:
+    """Return `{stem}.{hash}{suffix}`; unchanged content keeps the same name."""
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return f"{stem}.{digest[:_CONTENT_HASH_LENGTH]}{suffix}"
+
+
+def wrap_sheet_section(enc_sheet_name: str, section_html: str) -> str:
+    """Mark one rendered sheet section so it can be split into a fragment."""
+    return f'<div {FRAGMENT_SHEET_ATTR}="{enc_sheet_name}">{section_html}</div>'
+
+
+def split_sheet_fragments(soup: "BeautifulSoup", assets_url: str) -> dict[str, str]:
+    """Move marked sheet sections out of `soup` and return `{file name: html}`.
+
+    Each marker is emptied and pointed at its content-hashed fragment, and the
+    fragment loader script is appended to `<body>`.
+    """
+    fragments: dict[str, str] = {}
+    for marker in soup.find_all(True, attrs={FRAGMENT_SHEET_ATTR: True}):
+        fragment_html = marker.decode_contents()
+        fragment_name = get_content_hashed_name(
+            str(marker[FRAGMENT_SHEET_ATTR]), ".html", fragment_html
+        )
+        fragments[fragment_name] = fragment_html
+        marker.clear()
+        marker[FRAGMENT_URL_ATTR] = f"{assets_url}/{fragment_name}"
+
+    loader = soup.new_tag("script")
+    loader.string = FRAGMENT_LOADER_JS
+    (soup.body or soup).append(loader)
+    return fragments
+
+
+def prune_stale_assets(assets_dir: str, current_names: set[str]) -> None:
+    """Delete fragments and stylesheets from earlier runs that are no longer used.
+
+    Precompressed siblings (`.gz`, `.zst`) of current assets are kept.
+    """
+    with os.scandir(assets_dir) as entries:
+        stale_paths = [
+            entry.path
+            for entry in entries
+            if entry.is_file()
+            and _ASSET_NAME_PATTERN.match(entry.name)
+            and entry.name not in current_names
+            and entry.name.rsplit(".", 1)[0] not in current_names
+        ]
+    for stale_path in stale_paths:
+        os.unlink(stale_path)
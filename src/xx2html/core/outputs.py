@@ -0,0 +1,11 @@
+"""Paths of the sibling files a transform writes next to its destination."""
+
+import os
+
+PRECOMPRESSED_SUFFIXES = (".gz", ".zst")
+
+
+def get_class_map_path(dest: str) -> str:
+    """Return the sidecar path of the class-name mapping for `dest`."""
+    root, _ = os.path.splitext(dest)
+    return f"{root}.classes.json"
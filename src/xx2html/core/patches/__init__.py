@@ -0,0 +1,17 @@
+"""Third-party monkey patches, applied on first use rather than on import."""
+
+import logging
+
+_PATCHES_APPLIED = False
+
+
+def apply_openpyxl_patches() -> None:
+    """Apply required openpyxl monkey patches once per process."""
+    global _PATCHES_APPLIED
+    if _PATCHES_APPLIED:
+        return
+    from .openpyxl import apply_patches
+
+    logging.debug("xx2html: applying required openpyxl monkey patches")
+    apply_patches()
+    _PATCHES_APPLIED = True
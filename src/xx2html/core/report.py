@@ -0,0 +1,168 @@
+"""Opt-in per-call report with phase timings, counters, output sizes and memory."""
+
+import sys
+import tracemalloc
+from collections.abc import Iterator, Mapping
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from time import perf_counter
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore[assignment]
+
+# Phase names, in pipeline order.
+PHASES = (
+    "workbook_load",
+    "theme_resolution",
+    "incell_refs",
+    "sheet_contents",
+    "cf_processing",
+    "sheet_render",
+    "cf_relations",
+    "css_generation",
+    "template_formatting",
+    "post_processing",
+    "write",
+)
+
+# `index_html` slots whose encoded size is recorded in `slot_bytes`.
+SIZED_SLOTS = (
+    "fonts_html",
+    "core_css_html",
+    "user_css_html",
+    "generated_css_html",
+    "generated_incell_css_html",
+    "conditional_css_html",
+    "sheets_names_generated_html",
+    "sheets_generated_html",
+)
+
+
+def get_peak_rss_bytes() -> int:
+    """Return the peak resident set size of this process, or 0 if unknown."""
+    if resource is None:  # pragma: no cover
+        return 0
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+class TransformReport:
+    """Timings (seconds) and counters collected by one transform call.
+
+    Pass an instance as `report=` to the callable returned by
+    `create_xlsx_transform`; it is filled in place, including on failure.
+    `phases` holds the total time per phase, `sheet_phases` the per-sheet
+    share of per-sheet phases, and `counters` cache hits and similar counts.
+
+    Size accounting: `slot_bytes` holds the UTF-8 size of each `index_html`
+    slot in `SIZED_SLOTS`, `sheet_sizes` the rendered bytes, cells, merged
+    ranges, images, CSS rules and CF relations of each sheet, and
+    `output_bytes` the size of the written document.
+
+    With `track_memory=True`, `memory_phases` holds, per phase, the
+    tracemalloc peak and current traced bytes (when the caller has started
+    `tracemalloc`) and the process peak RSS at the end of the phase.
+    """
+
+    # False on the disabled report; guards work that only feeds the report.
+    enabled = True
+
+    def __init__(self, track_memory: bool = False) -> None:
+        self.track_memory = track_memory
+        self.memory_phases: dict[str, dict[str, int]] = {}
+        self.phases: dict[str, float] = {}
+        self.sheet_phases: dict[str, dict[str, float]] = {}
+        self.counters: dict[str, int] = {}
+        self.slot_bytes: dict[str, int] = {}
+        self.sheet_sizes: dict[str, dict[str, int]] = {}
+        self.output_bytes = 0
+        self.total_seconds = 0.0
+
+    @contextmanager
+    def phase(self, name: str, sheet: str | None = None) -> Iterator[None]:
+        """Add the time spent in the `with` block to phase `name`."""
+        tracing = self.track_memory and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            if self.track_memory:
+                self._record_memory(name, tracing)
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+            if sheet is not None:
+                sheet_phases = self.sheet_phases.setdefault(sheet, {})
+                sheet_phases[name] = sheet_phases.get(name, 0.0) + elapsed
+
+    def _record_memory(self, name: str, tracing: bool) -> None:
+        memory = self.memory_phases.setdefault(
+            name, {"peak_bytes": 0, "current_bytes": 0, "peak_rss_bytes": 0}
+        )
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            memory["peak_bytes"] = max(memory["peak_bytes"], peak)
+            memory["current_bytes"] = current
+        memory["peak_rss_bytes"] = get_peak_rss_bytes()
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Add `value` to counter `name`."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_slots(self, slots: Mapping[str, str]) -> None:
+        """Record the encoded size of each sized `index_html` slot in `slots`."""
+        for name in SIZED_SLOTS:
+            if name in slots:
+                self.slot_bytes[name] = len(slots[name].encode("utf-8"))
+
+    def record_sheet(self, sheet: str, **sizes: int) -> None:
+        """Add `sizes` (bytes, cells, images, ...) to the entry of `sheet`."""
+        sheet_sizes = self.sheet_sizes.setdefault(sheet, {})
+        for name, value in sizes.items():
+            sheet_sizes[name] = sheet_sizes.get(name, 0) + value
+
+    def as_dict(self) -> dict[str, object]:
+        """Return a JSON-serializable copy of the report."""
+        return {
+            "total_seconds": self.total_seconds,
+            "phases": dict(self.phases),
+            "sheet_phases": {
+                sheet: dict(phases) for sheet, phases in self.sheet_phases.items()
+            },
+            "counters": dict(self.counters),
+            "output_bytes": self.output_bytes,
+            "slot_bytes": dict(self.slot_bytes),
+            "sheet_sizes": {
+                sheet: dict(sizes) for sheet, sizes in self.sheet_sizes.items()
+            },
+            "memory_phases": {
+                name: dict(memory) for name, memory in self.memory_phases.items()
+            },
+        }
+
+
+class _DisabledReport(TransformReport):
+    """Report used when the caller did not ask for one; records nothing."""
+
+    enabled = False
+    _NULL_PHASE: AbstractContextManager[None] = nullcontext()
+
+    def phase(  # type: ignore[override]
+        self, name: str, sheet: str | None = None
+    ) -> AbstractContextManager[None]:
+        return self._NULL_PHASE
+
+    def count(self, name: str, value: int = 1) -> None:
+        return None
+
+    def record_slots(self, slots: Mapping[str, str]) -> None:
+        return None
+
+    def record_sheet(self, sheet: str, **sizes: int) -> None:
+        return None
+
+
+DISABLED_REPORT: TransformReport = _DisabledReport()
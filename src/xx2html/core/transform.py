@@ -0,0 +1,1064 @@
+"""`create_xlsx_transform`: the XLSX-to-HTML transform and its output helpers."""
+
+import json
+import logging
+import os
+from collections.abc import Iterable
+from contextlib import ExitStack
+from gzip import GzipFile
+from io import BufferedIOBase, BytesIO, RawIOBase, StringIO, TextIOBase
+from string import Formatter
+from tempfile import NamedTemporaryFile
+from time import perf_counter
+from typing import IO, TYPE_CHECKING, Any
+from urllib.parse import quote
+from zipfile import ZipFile
+
+from openpyxl.workbook.workbook import Workbook
+from openpyxl.worksheet.worksheet import Worksheet
+from openpyxl.styles.differential import DifferentialStyleList
+
+from xx2html.core.cf import apply_cf_styles_in_soup, apply_cf_styles_to_contents
+
+from .archive import IndexedArchive, load_workbook_from_archive, open_source_archive
+from .compact import (
+    COMPACT_TABLE_CSS,
+    SIZES_ROW_CLASS,
+    ClassNameMangler,
+    minify_css,
+)
+from .deeplinks import get_cell_links_html, get_hyperlink_target_ids
+from .images import ImageOptimizer
+from .incell import get_incell_css, get_incell_image_boxes, get_incell_image_sizes
+from .lazy import get_lazy_images_html
+from .links import update_links_in_fragment, update_links_in_soup
+from .multifile import (
+    get_assets_dir,
+    get_content_hashed_name,
+    prune_stale_assets,
+    split_sheet_fragments,
+    wrap_sheet_section,
+)
+from .outputs import PRECOMPRESSED_SUFFIXES, get_class_map_path
+from .patches import apply_openpyxl_patches
+from .report import DISABLED_REPORT, TransformReport
+from .types import (
+    CellDimensions,
+    ConditionalFormattingRelation,
+    ImageSize,
+    TransformDest,
+    TransformResult,
+    TransformSource,
+    WorksheetContents,
+    XlsxTransformCallable,
+)
+from .utils import cova_render_table, get_worksheet_contents
+from .virtual import cova_render_virtual_table, get_virtual_table_html
+from .vm import get_incell_images_refs, get_incell_images_refs_streaming
+
+# from .css import CssRegistry, create_get_css_components_from_cell
+from condif2css.processor import process_conditional_formatting
+from condif2css.themes import get_theme_colors
+from condif2css.core import create_themed_css_color_resolver
+from condif2css.color import argb_to_css
+from condif2css.css import CssBuilder, CssRulesRegistry, create_get_css_from_cell
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+GZIP_COMPRESS_LEVEL = 9
+ZSTD_COMPRESS_LEVEL = 12
+_OUTPUT_CHUNK_CHARS = 1024 * 1024
+
+_XX2HTML_VERSION: str | None = None
+_REQUIRED_SHEET_TEMPLATE_FIELDS = {
+    "enc_sheet_name",
+    "sheet_name",
+    "table_generated_html",
+}
+_REQUIRED_SHEETNAME_TEMPLATE_FIELDS = {"enc_sheet_name", "sheet_name"}
+_REQUIRED_INDEX_TEMPLATE_FIELDS = {
+    "sheets_generated_html",
+    "sheets_names_generated_html",
+    "source_filename",
+    "fonts_html",
+    "core_css_html",
+    "user_css_html",
+    "generated_css_html",
+    "generated_incell_css_html",
+    "conditional_css_html",
+}
+
+
+def _paths_refer_to_same_file(path_a: str, path_b: str) -> bool:
+    try:
+        return os.path.samefile(path_a, path_b)
+    except OSError:
+        return os.path.abspath(path_a) == os.path.abspath(path_b)
+
+
+def _get_source_label(source: TransformSource) -> str:
+    """Return the path of `source`, or a placeholder for in-memory input."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return "bytes"
+    name = getattr(source, "name", None)
+    return name if isinstance(name, str) else "stream"
+
+
+def _open_source_archive(
+    source: TransformSource, use_mmap: bool = False
+) -> IndexedArchive:
+    """Open `source` (path, bytes-like or binary file-like) as an archive.
+
+    Paths are memory-mapped when `use_mmap` is set; other sources ignore it.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return open_source_archive(os.fspath(source), use_mmap=use_mmap)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return IndexedArchive(BytesIO(source))
+    # ZIP reading seeks to the central directory.
+    if not source.seekable():
+        return IndexedArchive(BytesIO(source.read()))
+    return IndexedArchive(source)
+
+
+def _write_html_to_stream(dest: IO[Any], html: str) -> None:
+    """Write `html` to a text stream, or UTF-8 encoded to a binary one.
+
+    Only streams known to be binary get bytes; anything else (codecs writers,
+    console wrappers, duck-typed objects) is written `str`.
+    """
+    binary = not isinstance(dest, TextIOBase) and (
+        isinstance(dest, (RawIOBase, BufferedIOBase))
+        or "b" in str(getattr(dest, "mode", ""))
+    )
+    for chunk_start in range(0, len(html), _OUTPUT_CHUNK_CHARS):
+        chunk = html[chunk_start:chunk_start + _OUTPUT_CHUNK_CHARS]
+        dest.write(chunk.encode("utf-8") if binary else chunk)
+
+
+def _get_xx2html_version() -> str:
+    global _XX2HTML_VERSION
+    if _XX2HTML_VERSION is not None:
+        return _XX2HTML_VERSION
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        _XX2HTML_VERSION = version("xx2html")
+    except PackageNotFoundError:
+        _XX2HTML_VERSION = "0.0.0"
+    return _XX2HTML_VERSION
+
+
+def _inject_generator_metadata(soup: "BeautifulSoup", package_version: str) -> None:
+    from bs4 import Comment
+
+    generator_content = f"xx2html {package_version}"
+
+    head = soup.head
+    if head is not None:
+        generator_meta = head.find(
+            "meta", attrs={"name": "generator"}
+        )
+        if generator_meta is None:
+            head.append(
+                soup.new_tag(
+                    "meta",
+                    attrs={"name": "generator", "content": generator_content},
+                )
+            )
+        else:
+            generator_meta["content"] = generator_content
+
+    body = soup.body
+    if body is None:
+        return
+
+    expected_comment = f"Generated by xx2html {package_version}"
+    for existing_comment in body.find_all(
+        string=lambda value: isinstance(value, Comment)
+    ):
+        if expected_comment in str(existing_comment):
+            return
+
+    body.insert(0, Comment(f" {expected_comment} "))
+
+
+def _get_sheet_size_counts(
+    worksheet: Worksheet, contents: WorksheetContents
+) -> dict[str, int]:
+    """Return the cell, merged range, image and CSS rule counts of one sheet."""
+    cells = 0
+    incell_images = 0
+    generated_classes: set[str] = set()
+    for row in contents["rows"]:
+        cells += len(row)
+        for cell in row:
+            if cell["vm_id"] is not None:
+                incell_images += 1
+            generated_classes.update(
+                class_name
+                for class_name in cell["classes"]
+                if class_name.startswith("xx2h_")
+            )
+    return {
+        "cells": cells,
+        "merged_ranges": len(worksheet.merged_cells.ranges),
+        "images": incell_images
+        + sum(len(images) for images in contents["images"].values()),
+        "css_rules": len(generated_classes),
+    }
+
+
+def _get_required_cell_ids(
+    cf_rule_details: dict[str, tuple[Any, ...]],
+    hyperlink_target_ids: set[str],
+    requested_cell_ids: frozenset[str],
+) -> set[str]:
+    cell_ids = {f"{details[0]}!{details[1]}" for details in cf_rule_details.values()}
+    return cell_ids | hyperlink_target_ids | requested_cell_ids
+
+
+def _compact_style_html(css: str) -> str:
+    return f"<style>{css}</style>" if css else ""
+
+
+def _insert_before_body_end(html: str, fragment: str) -> str:
+    body_end = html.rfind("</body>")
+    if body_end == -1:
+        return html + fragment
+    return html[:body_end] + fragment + html[body_end:]
+
+
+def _extract_template_fields(template: str) -> set[str]:
+    fields: set[str] = set()
+    for _, field_name, _, _ in Formatter().parse(template):
+        if field_name is None:
+            continue
+        root_field_name = field_name.split(".", 1)[0].split("[", 1)[0]
+        if root_field_name:
+            fields.add(root_field_name)
+    return fields
+
+
+def _validate_template_fields(
+    template_name: str,
+    template_value: str,
+    required_fields: set[str],
+) -> None:
+    missing_fields = sorted(required_fields - _extract_template_fields(template_value))
+    if missing_fields:
+        missing_fields_csv = ", ".join(missing_fields)
+        raise ValueError(
+            f"{template_name} is missing required placeholders: {missing_fields_csv}"
+        )
+
+
+def _validate_optional_limit(name: str, value: int | None) -> int | None:
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError(f"{name} must be an integer or None.")
+    if value < 1:
+        raise ValueError(f"{name} must be >= 1.")
+    return value
+
+
+def _validate_optional_scale(name: str, value: float | None) -> float | None:
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(f"{name} must be a number or None.")
+    if not value > 0:
+        raise ValueError(f"{name} must be > 0.")
+    return float(value)
+
+
+def _get_zstd_compressor() -> Any | None:
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard.ZstdCompressor(level=ZSTD_COMPRESS_LEVEL)
+
+
+def _get_output_paths(dest: str, precompress: bool) -> list[str]:
+    """Return `dest` and the precompressed siblings a write would produce."""
+    if not precompress:
+        return [dest]
+    suffixes = PRECOMPRESSED_SUFFIXES if _get_zstd_compressor() else (".gz",)
+    return [dest, *(f"{dest}{suffix}" for suffix in suffixes)]
+
+
+def _write_html_atomically(dest: str, html: str, precompress: bool = False) -> None:
+    """Write `html` to `dest` through a temporary file and an atomic rename.
+
+    With `precompress`, `dest.gz` (and `dest.zst` when `zstandard` is
+    importable) are produced from the same encoded chunks and renamed into
+    place before `dest`. Siblings that were not written this time are removed
+    so they can never be served for a newer `dest`.
+    """
+    temp_output_paths: dict[str, str] = {}
+    destination_dir = os.path.dirname(os.path.abspath(dest))
+
+    def open_temp_output(final_path: str) -> IO[bytes]:
+        temp_output_file = NamedTemporaryFile(
+            "wb",
+            dir=destination_dir,
+            delete=False,
+            prefix=".xx2html-",
+            suffix=".tmp",
+        )
+        temp_output_paths[final_path] = temp_output_file.name
+        return temp_output_file
+
+    try:
+        with ExitStack() as stack:
+            writers = [stack.enter_context(open_temp_output(dest)).write]
+            if precompress:
+                gzip_file = stack.enter_context(open_temp_output(f"{dest}.gz"))
+                writers.append(
+                    stack.enter_context(
+                        GzipFile(
+                            filename=os.path.basename(dest),
+                            mode="wb",
+                            fileobj=gzip_file,
+                            compresslevel=GZIP_COMPRESS_LEVEL,
+                            mtime=0,
+                        )
+                    ).write
+                )
+                zstd_compressor = _get_zstd_compressor()
+                if zstd_compressor is not None:
+                    zstd_file = stack.enter_context(open_temp_output(f"{dest}.zst"))
+                    writers.append(
+                        stack.enter_context(
+                            zstd_compressor.stream_writer(zstd_file, closefd=False)
+                        ).write
+                    )
+            for chunk_start in range(0, len(html), _OUTPUT_CHUNK_CHARS):
+                chunk = html[chunk_start:chunk_start + _OUTPUT_CHUNK_CHARS].encode(
+                    "utf-8"
+                )
+                for write in writers:
+                    write(chunk)
+
+        written_paths = set(temp_output_paths)
+        # Siblings first, so `dest` never points at older precompressed bytes.
+        for final_path in sorted(written_paths, key=lambda path: path == dest):
+            os.replace(temp_output_paths.pop(final_path), final_path)
+        for suffix in PRECOMPRESSED_SUFFIXES:
+            sibling_path = f"{dest}{suffix}"
+            if sibling_path not in written_paths and os.path.exists(sibling_path):
+                os.unlink(sibling_path)
+    finally:
+        for temp_output_path in temp_output_paths.values():
+            if os.path.exists(temp_output_path):
+                os.unlink(temp_output_path)
+
+
+def _build_cf_style_relations(
+    workbook: Workbook,
+    conditional_formatting_rule_details: dict[str, tuple[Any, ...]],
+    get_cf_css_from_diff,
+) -> list[ConditionalFormattingRelation]:
+    cf_style_relations: list[ConditionalFormattingRelation] = []
+    differential_styles = getattr(workbook, "_differential_styles", None)
+    if not isinstance(differential_styles, DifferentialStyleList):
+        return cf_style_relations
+    differential_styles_list = getattr(differential_styles, "styles", None)
+    differential_styles_count = (
+        len(differential_styles_list)
+        if isinstance(differential_styles_list, list)
+        else None
+    )
+
+    for _, details in conditional_formatting_rule_details.items():
+        sheet_name, cell_ref, _, dxf_id, _ = details
+        if not isinstance(dxf_id, int):
+            logging.warning(
+                "Transform (wb|cf): non-integer dxf_id for %s!%s: %r",
+                sheet_name,
+                cell_ref,
+                dxf_id,
+            )
+            continue
+        if dxf_id < 0:
+            logging.warning(
+                "Transform (wb|cf): negative dxf_id for %s!%s: %d",
+                sheet_name,
+                cell_ref,
+                dxf_id,
+            )
+            continue
+        if isinstance(differential_styles_count, int) and dxf_id >= differential_styles_count:
+            logging.warning(
+                "Transform (wb|cf): dxf_id out of range for %s!%s: %d (size=%d)",
+                sheet_name,
+                cell_ref,
+                dxf_id,
+                differential_styles_count,
+            )
+            continue
+
+        try:
+            if isinstance(differential_styles_list, list):
+                differential_style = differential_styles_list[dxf_id]
+            else:
+                differential_style = differential_styles[dxf_id]
+        except (IndexError, KeyError, TypeError):
+            logging.warning(
+                "Transform (wb|cf): unable to resolve dxf_id for %s!%s: %r",
+                sheet_name,
+                cell_ref,
+                dxf_id,
+            )
+            continue
+        class_names = get_cf_css_from_diff(
+            differential_style,
+            is_important=True,
+        )
+        cf_style_relations.append((sheet_name, cell_ref, class_names))
+
+    return cf_style_relations
+
+
+def create_xlsx_transform(
+    sheet_html: str,
+    sheetname_html: str,
+    index_html: str,
+    fonts_html: str,
+    core_css: str,
+    user_css: str,
+    safari_js: str,
+    update_local_links: bool = True,
+    # prepare_iframe_noscript: bool = True,
+    apply_cf: bool = False,
+    fail_ok: bool = True,
+    max_sheets: int | None = None,
+    max_rows: int | None = None,
+    max_cols: int | None = None,
+    raise_on_error: bool = False,
+    image_scale: float | None = None,
+    image_format: str | None = None,
+    image_workers: int | None = None,
+    lazy_images: bool = False,
+    virtualize_rows: int | None = None,
+    multi_file: bool = False,
+    precompress: bool = False,
+    compact: bool = False,
+    mangle_classes: bool = False,
+    class_map: bool = False,
+    sparse_cell_ids: bool = False,
+    keep_cell_ids: Iterable[str] | None = None,
+    mmap_source: bool = False,
+) -> XlsxTransformCallable:
+    """Build and return a configured XLSX-to-HTML transform function.
+
+    The returned callable takes `(source, dest, locale)` and writes a complete
+    HTML document to `dest`. `source` is a path, `bytes`/`memoryview` or a
+    binary file-like object; `dest` is a path or a caller-provided text or
+    binary stream (written as UTF-8, not closed). Stream destinations cannot
+    be combined with `multi_file`, `precompress` or `class_map`, which write
+    sibling files; `render_xlsx_html` returns the document as a string.
+
+    Setting `image_scale` and/or `image_format` enables image optimization:
+    embedded pictures are downsized to `image_scale` times their largest
+    rendered box and optionally re-encoded (`"webp"`, `"jpeg"` or `"png"`).
+    `image_workers > 1` reads, probes, optimizes and encodes images on a
+    bounded thread pool; output order is unchanged.
+
+    With `lazy_images=True`, image payloads are kept out of CSS and `src`
+    attributes and are assigned by a small observer script when their cells
+    scroll into view. The script is written to the optional `{lazy_images_js}`
+    placeholder of `index_html`, or appended to `<body>` when it is missing.
+
+    Sheets with at least `virtualize_rows` rendered rows are embedded as JSON
+    row blocks and drawn by a client-side renderer that only keeps the visible
+    rows and columns in the DOM. Its script goes to the optional `{virtual_js}`
+    placeholder, or is appended to `<body>` when it is missing.
+
+    With `multi_file=True`, `dest` is written as an index shell with the sheet
+    navigation; generated CSS goes to one shared stylesheet and each sheet to a
+    content-hashed fragment in `{dest stem}_files/`, fetched when its sheet is
+    opened. The output must be served over HTTP(S).
+
+    With `precompress=True`, every written file also gets a `.gz` sibling, and
+    a `.zst` sibling when the optional `zstandard` package is installed, for
+    static servers that send precompressed bytes.
+
+    With `compact=True`, tables are rendered without empty or default-valued
+    attributes and separator whitespace, generated CSS is minified, and
+    generated rules that no rendered cell can match are dropped.
+
+    With `mangle_classes=True`, generated style, conditional-formatting and
+    in-cell image class names are replaced by short base-36 tokens in both the
+    CSS and the HTML; `class_map=True` also writes the `{original: token}`
+    mapping to `{dest stem}.classes.json`.
+
+    With `sparse_cell_ids=True`, `id="Sheet!A1"` is only written on cells that
+    conditional formatting targets, that hyperlinks point at, or that are
+    listed in `keep_cell_ids`. A small script (optional `{cell_links_js}`
+    placeholder, otherwise appended to `<body>`) resolves `#Sheet!A1` deep
+    links to other cells from their row and column.
+
+    With `mmap_source=True`, path sources are memory-mapped once and the
+    workbook and in-cell image readers read the archive from that mapping,
+    so large files are not read through a file object and workers converting
+    the same file share its page cache. Empty or unmappable files, and
+    non-path sources, are read as usual.
+
+    The returned callable also accepts an optional `report` argument: pass a
+    `TransformReport` to have phase timings (per sheet where applicable),
+    image cache hits/misses and sheet/cell counts recorded on it. Without it,
+    the instrumentation is a shared no-op.
+
+    The first call applies the openpyxl patches (`apply_openpyxl_patches`).
+    """
+    # Needed for vm-aware parsing; applied on first use rather than on import.
+    apply_openpyxl_patches()
+    _validate_template_fields(
+        "sheet_html", sheet_html, _REQUIRED_SHEET_TEMPLATE_FIELDS
+    )
+    _validate_template_fields(
+        "sheetname_html", sheetname_html, _REQUIRED_SHEETNAME_TEMPLATE_FIELDS
+    )
+    _validate_template_fields(
+        "index_html", index_html, _REQUIRED_INDEX_TEMPLATE_FIELDS
+    )
+    index_template_fields = _extract_template_fields(index_html)
+    if safari_js.strip() and "safari_js" not in index_template_fields:
+        logging.warning(
+            "create_xlsx_transform: safari_js provided but {safari_js} is missing "
+            "from index_html; safari_js will be ignored."
+        )
+    inject_lazy_images_js = lazy_images and "lazy_images_js" not in index_template_fields
+    inject_virtual_js = "virtual_js" not in index_template_fields
+    inject_cell_links_js = (
+        sparse_cell_ids and "cell_links_js" not in index_template_fields
+    )
+    requested_cell_ids = frozenset(keep_cell_ids or ())
+    validated_max_sheets = _validate_optional_limit("max_sheets", max_sheets)
+    validated_max_rows = _validate_optional_limit("max_rows", max_rows)
+    validated_max_cols = _validate_optional_limit("max_cols", max_cols)
+    validated_image_scale = _validate_optional_scale("image_scale", image_scale)
+    validated_image_workers = _validate_optional_limit("image_workers", image_workers)
+    validated_virtualize_rows = _validate_optional_limit(
+        "virtualize_rows", virtualize_rows
+    )
+    if class_map and not mangle_classes:
+        raise ValueError("class_map requires mangle_classes=True.")
+    image_optimizer = (
+        ImageOptimizer(scale=validated_image_scale, image_format=image_format)
+        if validated_image_scale is not None or image_format is not None
+        else None
+    )
+
+    def transform_xlsx(
+        source: TransformSource,
+        dest: TransformDest,
+        locale: str,
+        report: TransformReport | None = None,
+    ) -> TransformResult:
+        """Transform one XLSX workbook into one HTML document.
+
+        Pass a `TransformReport` as `report` to collect phase timings and
+        counters; without one, timing is skipped.
+        """
+        timings = report if report is not None else DISABLED_REPORT
+        started_at = perf_counter()
+        source_label = _get_source_label(source)
+        image_cache_hits = image_optimizer.cache_hits if image_optimizer else 0
+        image_cache_misses = image_optimizer.cache_misses if image_optimizer else 0
+        workbook: Workbook | None = None
+        source_archive: IndexedArchive | None = None
+        workbook_archive: ZipFile | None = None
+        try:
+            dest_path = (
+                os.fspath(dest) if isinstance(dest, (str, os.PathLike)) else None
+            )
+            if dest_path is None:
+                if multi_file or precompress or class_map:
+                    raise ValueError(
+                        "multi_file, precompress and class_map need a path destination."
+                    )
+            elif isinstance(source, (str, os.PathLike)) and _paths_refer_to_same_file(
+                os.fspath(source), dest_path
+            ):
+                raise ValueError("Source and destination paths must be different.")
+
+            sheet_navigation_links: list[str] = []
+            sheet_html_sections: list[str] = []
+            virtual_sheets: list[tuple[int, str, str, WorksheetContents]] = []
+            used_classes: set[str] = {SIZES_ROW_CLASS}
+            mangler = ClassNameMangler() if mangle_classes else None
+            rendered_cell_ids: set[str] = set()
+
+            logging.info(f"Transform (wb): Reading '{source_label}' as xlsx file...")
+            with timings.phase("workbook_load"):
+                source_archive = _open_source_archive(source, use_mmap=mmap_source)
+                workbook = load_workbook_from_archive(
+                    source_archive, data_only=True, rich_text=True
+                )
+
+            logging.debug("Transform (wb|css): Reading theme colors...")
+            with timings.phase("theme_resolution"):
+                theme_argb_palette = get_theme_colors(workbook)
+                pre_get_css_color = create_themed_css_color_resolver(theme_argb_palette)
+
+            def get_css_color(color):
+                argb_color = pre_get_css_color(color)
+                if argb_color is None:
+                    return None
+                return argb_to_css(argb_color)
+
+            css_builder = CssBuilder(get_css_color)
+            css_registry = CssRulesRegistry()
+            get_css_from_cell = create_get_css_from_cell(
+                css_registry, css_builder=css_builder
+            )
+
+            css_cf_registry = CssRulesRegistry(prefix="xx2h_cf")
+            get_cf_css_from_diff = create_get_css_from_cell(
+                css_registry=css_cf_registry, css_builder=css_builder
+            )
+
+            logging.debug("Transform (wb|incell): Reading incell images...")
+            incell_images_refs: dict[str, str] = {}
+            incell_image_sizes: dict[str, ImageSize] = {}
+            with timings.phase("incell_refs"):
+                try:
+                    workbook_archive = source_archive
+                    incell_images_refs, incell_error = get_incell_images_refs_streaming(
+                        workbook_archive
+                    )
+                    if incell_error is not None:
+                        raise incell_error
+                    incell_image_sizes = get_incell_image_sizes(
+                        incell_images_refs,
+                        workbook_archive,
+                        image_workers=validated_image_workers,
+                    )
+                    logging.info("Transform (wb|incell): Reading complete!")
+                except Exception as incell_exc:
+                    logging.warning(
+                        "Transform (wb|incell): Unable to read incell images due to: %r",
+                        incell_exc,
+                    )
+                    workbook_archive = None
+
+            vm_ids: set[str] = set()
+            vm_ids_dimension_references: dict[str, CellDimensions] = {}
+            vm_cell_vm_ids: dict[str, str] = {}
+
+            visible_sheet_names = [
+                sheet_name
+                for sheet_name in workbook.sheetnames
+                if workbook[sheet_name].sheet_state == "visible"
+            ]
+            if validated_max_sheets is not None:
+                visible_sheet_names = visible_sheet_names[:validated_max_sheets]
+
+            encoded_sheet_names: dict[str, str] = {}
+            conditional_formatting_rule_details: dict[str, tuple[Any, ...]] = {}
+            hyperlink_target_ids: set[str] = set()
+            if sparse_cell_ids:
+                for sheet_name in visible_sheet_names:
+                    hyperlink_target_ids.update(
+                        get_hyperlink_target_ids(workbook[sheet_name])
+                    )
+                logging.info(
+                    f"Transform (wb): {len(hyperlink_target_ids)} hyperlink target cells keep their ids"
+                )
+
+            for sheet_name in visible_sheet_names:
+                worksheet = workbook[sheet_name]
+                worksheet_index = workbook.index(worksheet)
+                encoded_sheet_name = f"sheet_{hex(worksheet_index)[2:].zfill(3)}"
+                encoded_sheet_names[sheet_name] = encoded_sheet_name
+
+                logging.info(
+                    f"Application (ws): Sheet[{worksheet_index}]:'{sheet_name}' (enc_sheet_name: {encoded_sheet_name}) -> is visible"
+                )
+
+                with timings.phase("sheet_contents", sheet_name):
+                    contents = get_worksheet_contents(
+                        worksheet,
+                        css_rules_registry=css_registry,
+                        css_builder=css_builder,
+                        get_css_from_cell=get_css_from_cell,
+                        locale=locale,
+                        ws_index=worksheet_index,
+                        max_rows=validated_max_rows,
+                        max_cols=validated_max_cols,
+                        incell_image_sizes=incell_image_sizes,
+                        image_optimizer=image_optimizer,
+                        image_workers=validated_image_workers,
+                    )
+                timings.count("sheets")
+                timings.count("cells", sum(len(row) for row in contents["rows"]))
+                if timings.enabled:
+                    timings.record_sheet(
+                        sheet_name, **_get_sheet_size_counts(worksheet, contents)
+                    )
+
+                logging.info(f" {encoded_sheet_name} --> vm_ids: {contents['vm_ids']}")
+                vm_ids.update(contents["vm_ids"])
+                vm_ids_dimension_references.update(
+                    contents["vm_ids_dimension_references"]
+                )
+                vm_cell_vm_ids.update(contents["vm_cell_vm_ids"])
+
+                sheet_cf_rule_details: dict[str, tuple[Any, ...]] = {}
+                if apply_cf:
+                    logging.info(
+                        f"Application (wb|cf): Processing conditional formatting for '{sheet_name}'"
+                    )
+                    with timings.phase("cf_processing", sheet_name):
+                        sheet_cf_rule_details = process_conditional_formatting(
+                            worksheet, fail_ok=fail_ok
+                        )
+                    conditional_formatting_rule_details.update(sheet_cf_rule_details)
+
+                if (
+                    validated_virtualize_rows is not None
+                    and len(contents["rows"]) >= validated_virtualize_rows
+                ):
+                    # Rendered after conditional formatting is resolved, since
+                    # virtual cells never reach the DOM post-processing pass.
+                    virtual_sheets.append(
+                        (len(sheet_html_sections), encoded_sheet_name, sheet_name, contents)
+                    )
+                    sheet_html_sections.append("")
+                else:
+                    with timings.phase("sheet_render", sheet_name):
+                        sheet_html_sections.append(
+                            sheet_html.format(
+                                enc_sheet_name=encoded_sheet_name,
+                                sheet_name=sheet_name,
+                                table_generated_html=cova_render_table(
+                                    contents,
+                                    lazy_images=lazy_images,
+                                    compact=compact,
+                                    cell_ids=(
+                                        _get_required_cell_ids(
+                                            sheet_cf_rule_details,
+                                            hyperlink_target_ids,
+                                            requested_cell_ids,
+                                        )
+                                        if sparse_cell_ids
+                                        else None
+                                    ),
+                                    sheet_name=sheet_name if sparse_cell_ids else None,
+                                ),
+                            )
+                        )
+                    if timings.enabled:
+                        timings.record_sheet(
+                            sheet_name,
+                            bytes=len(sheet_html_sections[-1].encode("utf-8")),
+                        )
+                    if compact:
+                        for row in contents["rows"]:
+                            for cell in row:
+                                used_classes.update(cell["classes"])
+                                rendered_cell_ids.add(str(cell["attrs"].get("id")))
+
+                sheet_navigation_links.append(
+                    sheetname_html.format(
+                        enc_sheet_name=encoded_sheet_name, sheet_name=sheet_name
+                    )
+                )
+
+            with timings.phase("css_generation"):
+                generated_css = "\n".join(css_registry.get_rules())
+
+                incell_payloads = StringIO()
+                if workbook_archive is not None:
+                    logging.debug(
+                        "Transform (wb|incell): Preparing incell images output..."
+                    )
+                    generated_incell_css = get_incell_css(
+                        vm_ids,
+                        incell_images_refs,
+                        workbook_archive,
+                        incell_image_sizes=incell_image_sizes,
+                        image_optimizer=image_optimizer,
+                        incell_image_boxes=get_incell_image_boxes(
+                            vm_ids_dimension_references, vm_cell_vm_ids
+                        ),
+                        image_workers=validated_image_workers,
+                        payload_write=incell_payloads.write if lazy_images else None,
+                    )
+                else:
+                    generated_incell_css = ""
+                lazy_images_html = (
+                    get_lazy_images_html(incell_payloads.getvalue() or "{}")
+                    if lazy_images
+                    else ""
+                )
+
+            logging.info(
+                f"Transform (html|1): Pass 1 --> Preparing {len(conditional_formatting_rule_details)} conditional formatting styles..."
+            )
+            with timings.phase("cf_relations"):
+                cf_style_relations = _build_cf_style_relations(
+                    workbook,
+                    conditional_formatting_rule_details,
+                    get_cf_css_from_diff,
+                )
+            logging.debug(
+                f"Transform: Resulting conditional formatting styles: {cf_style_relations}"
+            )
+            if timings.enabled:
+                for relation_sheet_name, _, _ in cf_style_relations:
+                    timings.record_sheet(relation_sheet_name, cf_relations=1)
+
+            for section_index, encoded_sheet_name, sheet_name, contents in virtual_sheets:
+                logging.info(
+                    f"Transform (html|2): Rendering '{sheet_name}' as a virtualized table"
+                )
+                with timings.phase("sheet_render", sheet_name):
+                    apply_cf_styles_to_contents(contents, cf_style_relations)
+                    if compact or mangler is not None:
+                        for row in contents["rows"]:
+                            for cell in row:
+                                used_classes.update(cell["classes"])
+                                if mangler is not None:
+                                    cell["classes"] = mangler.mangle_classes(
+                                        cell["classes"]
+                                    )
+                    sheet_html_sections[section_index] = sheet_html.format(
+                        enc_sheet_name=encoded_sheet_name,
+                        sheet_name=sheet_name,
+                        table_generated_html=cova_render_virtual_table(
+                            contents,
+                            sheet_name,
+                            rewrite_cell_html=lambda cell_html: update_links_in_fragment(
+                                cell_html,
+                                encoded_sheet_names,
+                                update_local_links=update_local_links,
+                            ),
+                        ),
+                    )
+                if timings.enabled:
+                    timings.record_sheet(
+                        sheet_name,
+                        bytes=len(sheet_html_sections[section_index].encode("utf-8")),
+                    )
+            virtual_html = get_virtual_table_html() if virtual_sheets else ""
+
+            logging.info("Transform (html|2): Pass 2 --> Preparing html")
+            with timings.phase("css_generation"):
+                css_rules = "\n".join(css_cf_registry.get_rules())
+                if compact:
+                    for sheet_name, cell_ref, class_names in cf_style_relations:
+                        if f"{sheet_name}!{cell_ref}" in rendered_cell_ids:
+                            used_classes.update(class_names)
+                    logging.info(
+                        f"Transform (html|2): Minifying CSS for {len(used_classes)} used classes"
+                    )
+                    generated_css = minify_css(
+                        f"{COMPACT_TABLE_CSS}\n{generated_css}", used_classes
+                    )
+                    generated_incell_css = minify_css(generated_incell_css, used_classes)
+                    css_rules = minify_css(css_rules, used_classes)
+                if mangler is not None:
+                    generated_css = mangler.mangle_css(generated_css)
+                    generated_incell_css = mangler.mangle_css(generated_incell_css)
+                    css_rules = mangler.mangle_css(css_rules)
+            if compact:
+                generated_css_html = _compact_style_html(generated_css)
+                generated_incell_css_html = _compact_style_html(generated_incell_css)
+                conditional_css_html = _compact_style_html(css_rules)
+                core_css_html = _compact_style_html(core_css)
+                user_css_html = _compact_style_html(user_css)
+                safari_js_html = f"<script>{safari_js}</script>" if safari_js else ""
+            else:
+                generated_css_html = f"<style>{generated_css}</style>"
+                generated_incell_css_html = f"<style>{generated_incell_css}</style>"
+                conditional_css_html = (
+                    f"<style>/*conditional formatting*/\n{css_rules}</style>"
+                )
+                core_css_html = f"<style>{core_css}</style>"
+                user_css_html = f"<style>{user_css}</style>"
+                safari_js_html = f"<script>{safari_js}</script>"
+            with timings.phase("template_formatting"):
+                separator = "" if compact else "\n"
+                cell_links_html = get_cell_links_html() if sparse_cell_ids else ""
+                assets_dir = get_assets_dir(dest_path or "")
+                assets_url = quote(os.path.basename(assets_dir))
+                shared_css_name = ""
+                shared_css = ""
+                if multi_file:
+                    shared_css = (
+                        "\n".join(
+                            [
+                                generated_css,
+                                generated_incell_css,
+                                css_rules
+                                if compact
+                                else f"/*conditional formatting*/\n{css_rules}",
+                            ]
+                        )
+                        .replace('"$"', "$")
+                        .replace('"-"', "-")
+                    )
+                    shared_css_name = get_content_hashed_name("styles", ".css", shared_css)
+                    generated_css_html = (
+                        f'<link rel="stylesheet" href="{assets_url}/{shared_css_name}">'
+                    )
+                    generated_incell_css_html = ""
+                    conditional_css_html = ""
+                    sheet_html_sections = [
+                        wrap_sheet_section(encoded_sheet_name, section_html)
+                        for encoded_sheet_name, section_html in zip(
+                            encoded_sheet_names.values(), sheet_html_sections
+                        )
+                    ]
+                index_slots = {
+                    "sheets_generated_html": separator.join(sheet_html_sections),
+                    "sheets_names_generated_html": separator.join(
+                        sheet_navigation_links
+                    ),
+                    "source_filename": source_label,
+                    "fonts_html": fonts_html,
+                    "core_css_html": core_css_html,
+                    "user_css_html": user_css_html,
+                    "generated_css_html": generated_css_html,
+                    "generated_incell_css_html": generated_incell_css_html,
+                    "safari_js": safari_js_html,
+                    "lazy_images_js": lazy_images_html,
+                    "virtual_js": virtual_html,
+                    "cell_links_js": cell_links_html,
+                    "conditional_css_html": conditional_css_html,
+                }
+                if timings.enabled:
+                    timings.record_slots(index_slots)
+                html = (
+                    index_html.format(**index_slots)
+                    .replace('"$"', "$")
+                    .replace('"-"', "-")
+                )
+                if inject_lazy_images_js:
+                    html = _insert_before_body_end(html, lazy_images_html)
+                if inject_virtual_js and virtual_html:
+                    html = _insert_before_body_end(html, virtual_html)
+                if inject_cell_links_js:
+                    html = _insert_before_body_end(html, cell_links_html)
+
+            logging.info("Transform (html|3): Pass 3 --> Updating links and CF...")
+            with timings.phase("post_processing"):
+                # bs4 is only needed from here on; keep it off the import path.
+                from bs4 import BeautifulSoup
+
+                soup = BeautifulSoup(html, "lxml")
+                _inject_generator_metadata(soup, _get_xx2html_version())
+                update_links_in_soup(
+                    soup,
+                    encoded_sheet_names,
+                    update_local_links=update_local_links,
+                )
+                apply_cf_styles_in_soup(soup, cf_style_relations)
+                if mangler is not None:
+                    for tag in soup.find_all(True, class_=True):
+                        tag["class"] = " ".join(
+                            mangler.mangle(str(class_name))
+                            for class_name in tag.get_attribute_list("class")
+                        )
+                assets: dict[str, str] = {}
+                if multi_file:
+                    assets = split_sheet_fragments(soup, assets_url)
+                    assets[shared_css_name] = shared_css
+                final_html = str(soup)
+                if timings.enabled:
+                    timings.output_bytes = len(final_html.encode("utf-8"))
+
+            with timings.phase("write"):
+                if multi_file:
+                    logging.info(
+                        f"Transform (out): Writing {len(assets)} assets to '{assets_dir}'"
+                    )
+                    os.makedirs(assets_dir, exist_ok=True)
+                    for asset_name, asset_content in assets.items():
+                        asset_path = os.path.join(assets_dir, asset_name)
+                        # Content-hashed names: an existing file already has this content.
+                        if all(
+                            os.path.exists(path)
+                            for path in _get_output_paths(asset_path, precompress)
+                        ):
+                            timings.count("assets_reused")
+                            continue
+                        _write_html_atomically(
+                            asset_path, asset_content, precompress=precompress
+                        )
+
+                if dest_path is None:
+                    logging.info("Transform (out): Writing output to the given stream")
+                    _write_html_to_stream(dest, final_html)  # type: ignore[arg-type]
+                else:
+                    logging.info(
+                        f"Transform (out): Writing output atomically to '{dest_path}'"
+                    )
+                    _write_html_atomically(
+                        dest_path, final_html, precompress=precompress
+                    )
+                if multi_file:
+                    prune_stale_assets(assets_dir, set(assets))
+                if mangler is not None and class_map:
+                    class_map_path = get_class_map_path(dest_path or "")
+                    logging.info(
+                        f"Transform (out): Writing {len(mangler.mapping)} class names to '{class_map_path}'"
+                    )
+                    _write_html_atomically(
+                        class_map_path,
+                        json.dumps(mangler.mapping, indent=2, sort_keys=True),
+                    )
+
+            logging.info("Transform: Done!")
+            return (True, None)
+        except Exception as exc:
+            logging.exception("Transform failed for '%s' -> '%s'", source_label, dest)
+            if raise_on_error:
+                raise
+            return (False, repr(exc))
+        finally:
+            if source_archive is not None:
+                logging.info("Transform (wb): Closing archive...")
+                source_archive.close()
+            if workbook is not None:
+                logging.info(f"Transform (wb): Closing wb: {source_label}")
+                workbook.close()
+            if report is not None:
+                if image_optimizer is not None:
+                    report.count(
+                        "image_cache_hits", image_optimizer.cache_hits - image_cache_hits
+                    )
+                    report.count(
+                        "image_cache_misses",
+                        image_optimizer.cache_misses - image_cache_misses,
+                    )
+                report.total_seconds = perf_counter() - started_at
+
+    return transform_xlsx
+
+
+def render_xlsx_html(
+    transform: XlsxTransformCallable,
+    source: TransformSource,
+    locale: str,
+    report: TransformReport | None = None,
+) -> str:
+    """Run `transform` on `source` (path, bytes or binary stream) in memory.
+
+    Returns the HTML document without touching the filesystem and raises
+    `RuntimeError` with the transform's error when it fails. For `bytes`, pass
+    an `io.BytesIO` as the transform's `dest` instead.
+    """
+    output = StringIO()
+    ok, error = transform(source, output, locale, report=report)
+    if not ok:
+        raise RuntimeError(error)
+    return output.getvalue()
@@ -1,15 +1,36 @@
 """Shared type aliases and typed payload models used in core transforms."""
 
-from collections.abc import Callable
-from typing import TypeAlias, TypedDict
+from os import PathLike
+from typing import IO, Protocol, TypeAlias, TypedDict
 
 from openpyxl.cell import Cell
 
+from xx2html.core.geometry import SheetGeometry
+from xx2html.core.report import TransformReport
+
 
 CellCoordinate: TypeAlias = tuple[int | str, int]
 TransformResult: TypeAlias = tuple[bool, str | None]
-XlsxTransformCallable: TypeAlias = Callable[[str, str, str], TransformResult]
 ConditionalFormattingRelation: TypeAlias = tuple[str, str, set[str]]
+ImageSize: TypeAlias = tuple[int, int]
+# Workbook path, in-memory bytes, or a binary file-like object.
+TransformSource: TypeAlias = (
+    str | PathLike[str] | bytes | bytearray | memoryview | IO[bytes]
+)
+# HTML path, or a text/binary stream the document is written to.
+TransformDest: TypeAlias = str | PathLike[str] | IO[str] | IO[bytes]
+
+
+class XlsxTransformCallable(Protocol):
+    """Callable returned by `create_xlsx_transform`."""
+
+    def __call__(
+        self,
+        source: TransformSource,
+        dest: TransformDest,
+        locale: str,
+        report: TransformReport | None = None,
+    ) -> TransformResult: ...
 
 
 class ImageRenderData(TypedDict):
@@ -52,9 +73,7 @@ class ColumnRenderData(TypedDict):
     collapsed: bool
 
 
-class WorksheetContents(TypedDict):
-    """Aggregate render payload for one worksheet table."""
-
+class _WorksheetContentsBase(TypedDict):
     rows: list[list[CellRenderData]]
     cols: list[ColumnRenderData]
     images: dict[CellCoordinate, list[ImageRenderData]]
@@ -64,6 +83,12 @@ class WorksheetContents(TypedDict):
     table_width: int
 
 
+class WorksheetContents(_WorksheetContentsBase, total=False):
+    """Aggregate render payload for one worksheet table."""
+
+    geometry: SheetGeometry
+
+
 class CovaCell(Cell):
     """Openpyxl cell extension that stores rich-value metadata (`vm_id`)."""
 
@@ -1,17 +1,30 @@
 """Worksheet-to-HTML table helpers."""
 
-from collections.abc import Callable
-from typing import TypedDict
+from collections import defaultdict
+from collections.abc import Callable, Container
+from html import escape
+from typing import Any, TypedDict
 
 from condif2css.css import CssBuilder, CssRulesRegistry
-from openpyxl.utils import get_column_letter
+from openpyxl.utils import get_column_letter, units
 from openpyxl.worksheet.worksheet import Worksheet
 from openpyxl.cell import Cell, MergedCell
+from xx2html.core.compact import SIZES_ROW_CLASS, render_compact_attrs
+from xx2html.core.geometry import SheetGeometry
+from xx2html.core.images import (
+    ImageOptimizer,
+    datauri_from_bytes,
+    map_images_in_order,
+)
+from xx2html.core.incell import get_incell_fit_class
 from xx2html.core.types import (
+    CellCoordinate,
     CellDimensions,
     CellRenderData,
     ColumnRenderData,
     CovaCell,
+    ImageRenderData,
+    ImageSize,
     WorksheetContents,
 )
 # from xx2html.core.css import CssRegistry
@@ -46,6 +59,61 @@ def _column_or_default(value: object, default: int) -> int | str:
     return default
 
 
+def _drawing_image_to_data(
+    image: Any, image_optimizer: ImageOptimizer | None
+) -> dict:
+    """Build the xlsx2html image payload, resampling the picture for its box."""
+    anchor_from = image.anchor._from
+    transform = image.anchor.pic.graphicalProperties.transform
+    # One-cell anchors written without `a:xfrm` carry the extent on the anchor.
+    extent = transform.ext if transform is not None else image.anchor.ext
+    offset_x = units.EMU_to_pixels(anchor_from.colOff)
+    offset_y = units.EMU_to_pixels(anchor_from.rowOff)
+    width = units.EMU_to_pixels(extent.width)
+    height = units.EMU_to_pixels(extent.height)
+    payload, payload_name = image._data(), image.path
+    if image_optimizer is not None:
+        payload, payload_name = image_optimizer.optimize(
+            payload, payload_name, (width, height)
+        )
+    return {
+        "col": anchor_from.col + 1,
+        "row": anchor_from.row + 1,
+        "offset": {"x": offset_x, "y": offset_y},
+        "width": width,
+        "height": height,
+        "src": datauri_from_bytes(payload, payload_name),
+        "style": {
+            "margin-left": f"{offset_x}px",
+            "margin-top": f"{offset_y}px",
+            "position": "absolute",
+        },
+    }
+
+
+def drawing_images_to_data(
+    ws: Worksheet,
+    image_optimizer: ImageOptimizer | None = None,
+    image_workers: int | None = None,
+) -> dict[CellCoordinate, list[ImageRenderData]]:
+    """Return drawing images keyed by anchor `(col, row)`.
+
+    Without an `image_optimizer` or `image_workers` this is
+    `xlsx2html.core.images_to_data`. Otherwise images are optimized and
+    encoded on a bounded thread pool, keeping the worksheet image order.
+    """
+    if image_optimizer is None and (image_workers is None or image_workers <= 1):
+        return images_to_data(ws)
+    images_data: dict[CellCoordinate, list[ImageRenderData]] = defaultdict(list)
+    for image_data in map_images_in_order(
+        lambda image: _drawing_image_to_data(image, image_optimizer),
+        getattr(ws, "_images", []),
+        image_workers,
+    ):
+        images_data[(image_data["col"], image_data["row"])].append(image_data)  # type: ignore[arg-type]
+    return images_data
+
+
 def get_worksheet_contents(
     ws: Worksheet,
     # css_registry: CssRegistry,
@@ -57,15 +125,21 @@ def get_worksheet_contents(
     ws_index: int = -1,
     max_rows: int | None = None,
     max_cols: int | None = None,
+    incell_image_sizes: dict[str, ImageSize] | None = None,
+    image_optimizer: ImageOptimizer | None = None,
+    image_workers: int | None = None,
 ) -> WorksheetContents:
     """Extract normalized render data for one worksheet.
 
     Returns a typed payload containing rows, columns, image metadata, and
-    in-cell rich-value references required by HTML rendering.
+    in-cell rich-value references required by HTML rendering. When
+    `incell_image_sizes` is given, in-cell image cells receive a shared fit
+    class (see `get_incell_fit_class`).
     """
 
     class VmCellLayoutEntry(TypedDict):
         class_name: str
+        classes: set[str]
         vm_id: str
         col_idx_1_based: int
         row_idx_1_based: int
@@ -116,16 +190,19 @@ def get_worksheet_contents(
             return int(round(row_dim.height, 2))
         return CELL_HEIGHT__DEFAULT
 
+    row_heights: list[int] = []
+    row_hidden = False
+    height_classes: dict[int, str] = {}
+
     def process_cell(col_idx: int, cell: Cell | CovaCell | MergedCell) -> None:
         if not cell or cell.row is None:
             logging.warning("Cell without row information found, skipping processing.")
             return
-        row_dim = ws.row_dimensions[cell.row]
 
-        if cell.coordinate in excluded_cells or row_dim.hidden:
+        if cell.coordinate in excluded_cells or row_hidden:
             return
 
-        height = get_effective_row_height(cell.row)
+        height = row_heights[cell.row - 1]
 
         f_cell = None
 
@@ -134,9 +211,12 @@ def get_worksheet_contents(
             value = unescape(value)
 
         # cell_height_class = css_registry.register_height(height)
-        cell_height_class = css_rules_registry.register(
-            [css_builder.height(height)]
-        )
+        cell_height_class = height_classes.get(height)
+        if cell_height_class is None:
+            cell_height_class = css_rules_registry.register(
+                [css_builder.height(height)]
+            )
+            height_classes[height] = cell_height_class
         classes = set([cell_height_class])
         vm_id = None if not hasattr(cell, "_vm_id") else getattr(cell, "_vm_id")
 
@@ -160,7 +240,6 @@ def get_worksheet_contents(
             cell_data["classes"].update(
                 [
                     f"vm-richvaluerel_rid{vm_id}",
-                    cell_class_name,
                     "incell-image",
                 ]
             )
@@ -180,6 +259,7 @@ def get_worksheet_contents(
             vm_cells_layout.append(
                 {
                     "class_name": cell_class_name,
+                    "classes": cell_data["classes"],
                     "vm_id": vm_id,
                     "col_idx_1_based": col_idx + 1,
                     "row_idx_1_based": cell.row,
@@ -226,6 +306,8 @@ def get_worksheet_contents(
     ):
         data_row: list[CellRenderData] = []
         data_list.append(data_row)
+        row_hidden = bool(ws.row_dimensions[row_i + 1].hidden)
+        row_heights.append(get_effective_row_height(row_i + 1))
         for col_idx, cell in enumerate(row):
             current_process_cell(col_idx, cell)
         current_process_cell = process_cell
@@ -276,15 +358,30 @@ def get_worksheet_contents(
         if not col_details["hidden"]:
             table_width += col_details["width"]
 
-    def get_effective_col_width(col_idx_1_based: int) -> int:
-        column_letter = get_column_letter(col_idx_1_based)
-        col_details = columns_dimensions.get(column_letter)
-        if col_details is None:
-            return COL_WIDTH__DEFAULT
-        width = col_details.get("width")
-        if not isinstance(width, int):
-            return COL_WIDTH__DEFAULT
-        return max(width, 0)
+    last_row = max(
+        [
+            len(row_heights),
+            *(
+                vm_cell["row_idx_1_based"] + vm_cell["rowspan"] - 1
+                for vm_cell in vm_cells_layout
+            ),
+        ]
+    )
+    row_heights.extend(
+        get_effective_row_height(row_number)
+        for row_number in range(len(row_heights) + 1, last_row + 1)
+    )
+    geometry = SheetGeometry(
+        row_heights,
+        [
+            max(col_details["width"], 0)
+            if isinstance(col_details["width"], int)
+            else COL_WIDTH__DEFAULT
+            for col_details in col_list
+        ],
+        default_row_height=CELL_HEIGHT__DEFAULT,
+        default_col_width=COL_WIDTH__DEFAULT,
+    )
 
     for vm_cell in vm_cells_layout:
         class_name = vm_cell["class_name"]
@@ -294,46 +391,69 @@ def get_worksheet_contents(
         colspan = vm_cell["colspan"]
         rowspan = vm_cell["rowspan"]
 
-        width_px = sum(
-            get_effective_col_width(col_idx)
-            for col_idx in range(start_col, start_col + colspan)
-        )
-        height_px = sum(
-            get_effective_row_height(row_idx)
-            for row_idx in range(start_row, start_row + rowspan)
-        )
+        width_px = geometry.cols_width(start_col, colspan)
+        height_px = geometry.rows_height(start_row, rowspan)
 
         if width_px <= 0:
             width_px = COL_WIDTH__DEFAULT
         if height_px <= 0:
             height_px = CELL_HEIGHT__DEFAULT
 
-        vm_ids_dimension_references[class_name] = {
+        cell_dimensions: CellDimensions = {
             "width": width_px,
             "height": height_px,
         }
+        vm_ids_dimension_references[class_name] = cell_dimensions
         vm_cell_vm_ids[class_name] = vm_id
 
+        if incell_image_sizes is not None:
+            fit_class = get_incell_fit_class(
+                cell_dimensions, incell_image_sizes.get(vm_id)
+            )
+            if fit_class is not None:
+                vm_cell["classes"].add(fit_class)
+
     worksheet_contents: WorksheetContents = {
         "rows": data_list,
         "cols": col_list,
-        "images": images_to_data(ws),
+        "images": drawing_images_to_data(ws, image_optimizer, image_workers),
         "vm_ids": used_vm_ids,
         "vm_ids_dimension_references": vm_ids_dimension_references,
         "vm_cell_vm_ids": vm_cell_vm_ids,
         "table_width": table_width,
+        "geometry": geometry,
     }
     return worksheet_contents
 
 
 def cova_render_table(
     data: WorksheetContents,  # , append_headers, append_lineno
+    lazy_images: bool = False,
+    compact: bool = False,
+    cell_ids: Container[str] | None = None,
+    sheet_name: str | None = None,
 ) -> str:
-    """Render worksheet contents into a single `<table>` HTML string."""
+    """Render worksheet contents into a single `<table>` HTML string.
+
+    With `lazy_images`, drawing images carry their payload in
+    `data-xx2html-src` and in-cell image placeholders carry
+    `data-xx2html-vm`, for the observer script in `xx2html.core.lazy`.
+
+    With `compact`, empty and default-valued attributes and all separator
+    whitespace are omitted, and the sizes row relies on `COMPACT_TABLE_CSS`.
+
+    When `cell_ids` is given, only cells whose id is in it keep their `id`
+    attribute; `sheet_name` is written as `data-sheet` on the table so
+    `xx2html.core.deeplinks` can resolve other cells by row and column.
+    """
+    if compact:
+        return _render_compact_table(data, lazy_images, cell_ids, sheet_name)
+
     html = [
         "".join(
             [
                 "<table  ",
+                f'data-sheet="{escape(sheet_name)}" ' if sheet_name is not None else "",
                 f'style="border:0; border-collapse: collapse; width: {data["table_width"]}px; table-layout: fixed;" '
                 if "table_width" in data
                 else 'style="border-collapse: collapse; table-layout: fixed;" ',
@@ -379,8 +499,12 @@ def cova_render_table(
                 img_tag = (
                     '<img width="{width}" height="{height}"'
                     'style="{styles_str}"'
-                    'src="{src}"'
-                    "/>"
+                    + (
+                        ' data-xx2html-src="{src}" loading="lazy" decoding="async"'
+                        if lazy_images
+                        else 'src="{src}"'
+                    )
+                    + "/>"
                 ).format(styles_str=styles, **img)
                 formatted_images.append(img_tag)
 
@@ -392,11 +516,15 @@ def cova_render_table(
                     "{incell_image}"
                     "</td>"
                 ).format(
-                    attrs_str=render_attrs(cell["attrs"]),
+                    attrs_str=render_attrs(_get_cell_attrs(cell, cell_ids)),
                     styles_str=render_inline_styles(cell["style"]),
                     formatted_images="\n".join(formatted_images),
                     incell_image=(
-                        '<img alt="" loading="lazy" decoding="async" />'
+                        (
+                            f'<img alt="" loading="lazy" decoding="async" data-xx2html-vm="{cell["vm_id"]}" />'
+                            if lazy_images
+                            else '<img alt="" loading="lazy" decoding="async" />'
+                        )
                         if isinstance(cell["vm_id"], str)
                         else ""
                     ),
@@ -411,3 +539,75 @@ def cova_render_table(
     html.append("</tbody>")
     html.append("</table>")
     return "\n".join(html)
+
+
+def _get_cell_attrs(
+    cell: CellRenderData, cell_ids: Container[str] | None
+) -> dict[str, object]:
+    attrs = cell["attrs"]
+    if cell_ids is None or attrs.get("id") in cell_ids:
+        return attrs
+    return {name: value for name, value in attrs.items() if name != "id"}
+
+
+def _render_compact_table(
+    data: WorksheetContents,
+    lazy_images: bool,
+    cell_ids: Container[str] | None,
+    sheet_name: str | None,
+) -> str:
+    table_styles: dict[str, object] = {
+        "border-collapse": "collapse",
+        "table-layout": "fixed",
+    }
+    if "table_width" in data:
+        table_styles.update({"border": 0, "width": f"{data['table_width']}px"})
+    table_attrs = {"data-sheet": escape(sheet_name)} if sheet_name is not None else None
+    html = [f"<table{render_compact_attrs(table_attrs, table_styles)}><colgroup>"]
+
+    sizes_row = [f'<tr class="{SIZES_ROW_CLASS}">']
+    for col in data["cols"]:
+        html.append(
+            f"<col{render_compact_attrs(col.get('attrs'), col.get('style'))}"
+            f' data-value="{col["index"]}">'
+        )
+        width = col["width"]
+        sizes_row.append(
+            f'<td style="width:{width}px"></td>' if isinstance(width, int) else "<td></td>"
+        )
+    sizes_row.append("</tr>")
+    html.append("</colgroup><tbody>")
+    html.extend(sizes_row)
+
+    for row in data["rows"]:
+        html.append("<tr>")
+        for cell in row:
+            html.append(
+                "<td{}>".format(
+                    render_compact_attrs(
+                        _get_cell_attrs(cell, cell_ids), cell["style"], cell["classes"]
+                    )
+                )
+            )
+            for img in data["images"].get((cell["column"], cell["row"])) or []:
+                html.append(
+                    f'<img width="{img["width"]}" height="{img["height"]}"'
+                    f"{render_compact_attrs(None, img['style'])}"
+                    + (
+                        f' data-xx2html-src="{img["src"]}" loading="lazy" decoding="async"/>'
+                        if lazy_images
+                        else f' src="{img["src"]}"/>'
+                    )
+                )
+            html.append(str(cell["formatted_value"]))
+            if isinstance(cell["vm_id"], str):
+                html.append(
+                    f'<img alt="" loading="lazy" decoding="async" data-xx2html-vm="{cell["vm_id"]}"/>'
+                    if lazy_images
+                    else '<img alt="" loading="lazy" decoding="async"/>'
+                )
+            html.append("</td>")
+        html.append("</tr>")
+
+    html.append("</tbody></table>")
+    return "".join(html)
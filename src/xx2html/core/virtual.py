@@ -0,0 +1,338 @@
+"""Client-side virtualized rendering for very large worksheets.
+
+Instead of one `<tr>` per row, the sheet is embedded as compact JSON row
+blocks and a small script draws only the rows and columns inside the visible
+window into the regular table skeleton (`<colgroup>` and sizes row).
+"""
+
+import json
+from collections.abc import Callable
+from html import escape
+
+from openpyxl.utils import column_index_from_string
+from xlsx2html.core import render_attrs, render_inline_styles
+
+from xx2html.core.geometry import SheetGeometry
+from xx2html.core.types import CellRenderData, WorksheetContents
+from xx2html.core.utils import CELL_HEIGHT__DEFAULT, COL_WIDTH__DEFAULT
+
+VIRTUAL_BLOCK_ROWS = 256
+VIRTUAL_TABLE_CLASS = "xx2html-virtual"
+
+VIRTUAL_TABLE_CSS = """
+.xx2html-virtual {
+    height: 100vh;
+    overflow: auto;
+    position: relative;
+}
+"""
+
+VIRTUAL_TABLE_JS = """
+(function () {
+  var OVERSCAN_PX = 200;
+  function colName(n) {
+    var name = "";
+    while (n > 0) {
+      var m = (n - 1) % 26;
+      name = String.fromCharCode(65 + m) + name;
+      n = Math.floor((n - 1) / 26);
+    }
+    return name;
+  }
+  function attr(value) {
+    return String(value).replace(/&/g, "&amp;").replace(/"/g, "&quot;");
+  }
+  function prefix(sizes) {
+    var offsets = [0];
+    for (var i = 0; i < sizes.length; i++) {
+      offsets.push(offsets[i] + sizes[i]);
+    }
+    return offsets;
+  }
+  function find(offsets, px) {
+    var lo = 0, hi = offsets.length - 2;
+    if (hi < 0) {
+      return 0;
+    }
+    while (lo < hi) {
+      var mid = (lo + hi + 1) >> 1;
+      if (offsets[mid] <= px) {
+        lo = mid;
+      } else {
+        hi = mid - 1;
+      }
+    }
+    return lo;
+  }
+  function setup(root) {
+    var meta = JSON.parse(root.querySelector("script[data-xx2html-meta]").textContent);
+    var blockNodes = root.querySelectorAll("script[data-xx2html-block]");
+    var blocks = [];
+    var rowOffsets = prefix(meta.heights);
+    var colOffsets = prefix(meta.widths);
+    var tbody = root.querySelector("tbody[data-xx2html-rows]");
+    var payloadsNode = document.getElementById("xx2html-incell-images");
+    var payloads = null;
+    var lastWindow = "";
+    var scheduled = false;
+    function getRow(index) {
+      var blockIndex = Math.floor(index / meta.block);
+      if (!blocks[blockIndex]) {
+        blocks[blockIndex] = JSON.parse(blockNodes[blockIndex].textContent);
+      }
+      return blocks[blockIndex][index % meta.block] || [];
+    }
+    function incellImage(vm) {
+      if (payloadsNode && payloads === null) {
+        payloads = JSON.parse(payloadsNode.textContent || "{}");
+      }
+      var src = payloads && payloads[vm];
+      return '<img alt="" decoding="async"' + (src ? ' src="' + attr(src) + '"' : "") + " />";
+    }
+    function spacer(height) {
+      return height > 0
+        ? '<tr style="height: ' + height + 'px;"><td colspan="' + meta.widths.length +
+          '" style="padding: 0; border: 0;"></td></tr>'
+        : "";
+    }
+    function render() {
+      scheduled = false;
+      var rowCount = meta.heights.length;
+      if (!rowCount) {
+        return;
+      }
+      var top = root.scrollTop, left = root.scrollLeft;
+      var r0 = find(rowOffsets, Math.max(0, top - OVERSCAN_PX));
+      var r1 = find(rowOffsets, top + (root.clientHeight || 0) + OVERSCAN_PX);
+      while (meta.origins[String(r0 + 1)]) {
+        r0 = meta.origins[String(r0 + 1)] - 1;
+      }
+      var c0 = find(colOffsets, Math.max(0, left - OVERSCAN_PX)) + 1;
+      var c1 = find(colOffsets, left + (root.clientWidth || 0) + OVERSCAN_PX) + 1;
+      var windowKey = r0 + ":" + r1 + ":" + c0 + ":" + c1;
+      if (windowKey === lastWindow) {
+        return;
+      }
+      lastWindow = windowKey;
+      var html = [spacer(rowOffsets[r0])];
+      var covered = {};
+      for (var r = r0; r <= r1; r++) {
+        var rowNumber = r + 1;
+        var cells = getRow(r);
+        var parts = ["<tr>"];
+        var next = 1, gap = 0;
+        var flushGap = function () {
+          if (gap > 0) {
+            parts.push('<td colspan="' + gap + '"></td>');
+            gap = 0;
+          }
+        };
+        for (var i = 0; i < cells.length; i++) {
+          var cell = cells[i], extra = cell[3] || {};
+          var start = cell[0], end = start + (extra.cs || 1) - 1;
+          if (end < c0) {
+            continue;
+          }
+          if (start > c1) {
+            break;
+          }
+          for (var col = next; col < start; col++) {
+            if (covered[col] >= rowNumber) {
+              flushGap();
+            } else {
+              gap++;
+            }
+          }
+          flushGap();
+          parts.push(
+            '<td id="' + attr(meta.sheet + "!" + colName(start) + rowNumber) + '"' +
+            (extra.cs ? ' colspan="' + extra.cs + '"' : "") +
+            (extra.rs ? ' rowspan="' + extra.rs + '"' : "") +
+            (extra.st ? ' style="' + extra.st + '"' : "") +
+            ' class="' + meta.classes[cell[1]] + '">' +
+            (extra.img || "") + cell[2] + (extra.vm ? incellImage(extra.vm) : "") +
+            "</td>"
+          );
+          if (extra.rs) {
+            for (var spanned = start; spanned <= end; spanned++) {
+              covered[spanned] = rowNumber + extra.rs - 1;
+            }
+          }
+          next = end + 1;
+        }
+        parts.push("</tr>");
+        html.push(parts.join(""));
+      }
+      html.push(spacer(rowOffsets[rowCount] - rowOffsets[r1 + 1]));
+      tbody.innerHTML = html.join("");
+    }
+    function schedule() {
+      if (!scheduled) {
+        scheduled = true;
+        (window.requestAnimationFrame || setTimeout)(render);
+      }
+    }
+    root.addEventListener("scroll", schedule, { passive: true });
+    window.addEventListener("resize", schedule);
+    if ("ResizeObserver" in window) {
+      new ResizeObserver(schedule).observe(root);
+    }
+    render();
+  }
+  function setupAll(scope) {
+    Array.prototype.forEach.call(scope.querySelectorAll("div.xx2html-virtual"), setup);
+  }
+  // Sheets loaded later (multi-file output) announce their new content.
+  document.addEventListener("xx2html:content", function (event) {
+    setupAll(event.target);
+  });
+  setupAll(document);
+})();
+"""
+
+
+def _dump_json(value: object) -> str:
+    """Serialize `value` as compact JSON that is safe inside `<script>`.
+
+    Strings that are exactly `"$"` or `"-"` are escaped because the transform
+    unquotes those tokens in the assembled document.
+    """
+    return (
+        json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        .replace("</", "<\\/")
+        .replace('"$"', '"\\u0024"')
+        .replace('"-"', '"\\u002d"')
+    )
+
+
+def _cell_column_index(cell: CellRenderData) -> int:
+    column = cell["column"]
+    if isinstance(column, str):
+        return column_index_from_string(column)
+    return column
+
+
+def _get_sheet_geometry(data: WorksheetContents) -> SheetGeometry:
+    geometry = data.get("geometry")
+    if geometry is not None:
+        return geometry
+    return SheetGeometry(
+        [CELL_HEIGHT__DEFAULT] * len(data["rows"]),
+        [0 if col["hidden"] else col["width"] for col in data["cols"]],
+        default_row_height=CELL_HEIGHT__DEFAULT,
+        default_col_width=COL_WIDTH__DEFAULT,
+    )
+
+
+def cova_render_virtual_table(
+    data: WorksheetContents,
+    sheet_name: str,
+    block_rows: int = VIRTUAL_BLOCK_ROWS,
+    rewrite_cell_html: Callable[[str], str] | None = None,
+) -> str:
+    """Render worksheet contents as a virtualized table container.
+
+    Rows are grouped in JSON blocks of `block_rows` rows that the browser only
+    parses once they scroll into view; class lists are stored once and
+    referenced by index. `rewrite_cell_html` lets callers post-process cell
+    HTML (for example link rewriting) that never reaches the document DOM.
+    Requires `VIRTUAL_TABLE_JS` once per document.
+    """
+    if block_rows < 1:
+        raise ValueError("block_rows must be >= 1.")
+
+    geometry = _get_sheet_geometry(data)
+    class_indexes: dict[str, int] = {}
+    origins: dict[str, int] = {}
+    encoded_rows: list[list[list[object]]] = []
+
+    for row_index, row in enumerate(data["rows"], start=1):
+        encoded_row: list[list[object]] = []
+        for cell in row:
+            column_index = _cell_column_index(cell)
+            classes = " ".join(sorted(cell["classes"]))
+            class_index = class_indexes.setdefault(classes, len(class_indexes))
+
+            cell_html = str(cell["formatted_value"])
+            if rewrite_cell_html is not None:
+                cell_html = rewrite_cell_html(cell_html)
+
+            extra: dict[str, object] = {}
+            colspan = cell["attrs"].get("colspan")
+            rowspan = cell["attrs"].get("rowspan")
+            if isinstance(colspan, int) and colspan > 1:
+                extra["cs"] = colspan
+            if isinstance(rowspan, int) and rowspan > 1:
+                extra["rs"] = rowspan
+                for spanned_row in range(row_index + 1, row_index + rowspan):
+                    origins.setdefault(str(spanned_row), row_index)
+            styles = render_inline_styles(cell["style"])
+            if styles:
+                extra["st"] = styles
+            images = data["images"].get((cell["column"], cell["row"])) or []
+            if images:
+                extra["img"] = "\n".join(
+                    '<img width="{width}" height="{height}" style="{styles_str}" '
+                    'src="{src}"/>'.format(
+                        styles_str=render_inline_styles(img["style"]), **img
+                    )
+                    for img in images
+                )
+            if isinstance(cell["vm_id"], str):
+                extra["vm"] = cell["vm_id"]
+
+            encoded_cell: list[object] = [column_index, class_index, cell_html]
+            if extra:
+                encoded_cell.append(extra)
+            encoded_row.append(encoded_cell)
+        encoded_rows.append(encoded_row)
+
+    row_count = len(encoded_rows)
+    meta = {
+        "sheet": sheet_name,
+        "block": block_rows,
+        "heights": geometry.row_heights[:row_count]
+        + [geometry.default_row_height] * max(row_count - geometry.row_count, 0),
+        "widths": geometry.col_widths,
+        "classes": list(class_indexes),
+        "origins": origins,
+    }
+
+    html = [
+        f'<div class="{VIRTUAL_TABLE_CLASS}" data-sheet="{escape(sheet_name)}">',
+        '<table style="border:0; border-collapse: collapse; '
+        f'width: {data["table_width"]}px; table-layout: fixed;">',
+        "<colgroup>",
+    ]
+    sizes_row = ["<tr>"]
+    for col in data["cols"]:
+        html.append(
+            '<col {attrs} style="{styles}" data-value="{col_index}">'.format(
+                attrs=render_attrs(col.get("attrs")),
+                styles=render_inline_styles(col.get("style")),
+                col_index=col["index"],
+            )
+        )
+        sizes_row.append(f'<td style="width: {col["width"]}px; padding: 0;"></td>')
+    sizes_row.append("</tr>")
+    html.extend(
+        [
+            "</colgroup>",
+            f"<tbody>{''.join(sizes_row)}</tbody>",
+            "<tbody data-xx2html-rows></tbody>",
+            "</table>",
+            f'<script type="application/json" data-xx2html-meta>{_dump_json(meta)}</script>',
+        ]
+    )
+    for block_start in range(0, row_count, block_rows):
+        html.append(
+            f'<script type="application/json" data-xx2html-block="{block_start // block_rows}">'
+            f"{_dump_json(encoded_rows[block_start:block_start + block_rows])}</script>"
+        )
+    html.append("</div>")
+    return "\n".join(html)
+
+
+def get_virtual_table_html() -> str:
+    """Return the stylesheet and renderer script for virtualized tables."""
+    return f"<style>{VIRTUAL_TABLE_CSS}</style><script>{VIRTUAL_TABLE_JS}</script>"
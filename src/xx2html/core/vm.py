@@ -1,12 +1,15 @@
 """Extract vm-id to media target mappings from XLSX rich-data parts."""
 
 import logging
+from collections.abc import Iterable, Iterator
 from typing import TypeAlias
 from zipfile import ZipFile
 
 from lxml import etree
 from openpyxl.packaging.relationship import get_dependents
 
+from xx2html.core.archive import get_member_names
+
 _METADATA_XML = "xl/metadata.xml"
 _RICHVALUE_REL_XML_RELS = "xl/richData/_rels/richValueRel.xml.rels"
 _RICHVALUE_XML = "xl/richData/rdrichvalue.xml"
@@ -74,12 +77,47 @@ def _get_relationship_targets(archive: ZipFile) -> RelationshipTargets:
     return relationship_targets
 
 
+def _iter_xml_elements(
+    archive: ZipFile, file_path: str, tag: str
+) -> Iterator[etree._Element]:
+    """Stream `tag` elements of an archive XML part in document order.
+
+    Once the consumer moves on, each element is cleared and already visited
+    siblings of it and its ancestors are dropped, so memory stays flat.
+    """
+    with archive.open(file_path) as xml_file:
+        for _, element in etree.iterparse(xml_file, events=("end",), tag=tag):
+            yield element
+            element.clear(keep_tail=True)
+            node = element
+            while (parent := node.getparent()) is not None:
+                while node.getprevious() is not None:
+                    del parent[0]
+                node = parent
+
+
+def _has_ancestor_tags(element: etree._Element, ancestor_tags: tuple[str, ...]) -> bool:
+    """Return whether the closest ancestors of `element` match `ancestor_tags`."""
+    node: etree._Element | None = element
+    for ancestor_tag in ancestor_tags:
+        node = node.getparent() if node is not None else None
+        if node is None or node.tag != ancestor_tag:
+            return False
+    return True
+
+
 def _get_local_image_type_indexes(richvalues_structure_tree: etree._Element) -> set[str]:
     """Collect rich-data structure indexes that represent local images."""
-    local_image_type_indexes = set()
-    for index, structure_node in enumerate(
+    return _collect_local_image_type_indexes(
         richvalues_structure_tree.xpath("//rd:s", namespaces=NAMESPACES)
-    ):
+    )
+
+
+def _collect_local_image_type_indexes(
+    structure_nodes: Iterable[etree._Element],
+) -> set[str]:
+    local_image_type_indexes = set()
+    for index, structure_node in enumerate(structure_nodes):
         if structure_node.get("t") in EXPECTED_RICHDATA_IMAGE_TYPES:
             local_image_type_indexes.add(str(index))
     return local_image_type_indexes
@@ -93,10 +131,20 @@ def _get_rich_data_value_targets(
     """
     Returns a map from rich-data value index (metadata rc@v) to the target image path.
     """
+    return _collect_rich_data_value_targets(
+        richvalue_tree.xpath("//rd:rv", namespaces=NAMESPACES),
+        local_image_type_indexes,
+        relationship_targets,
+    )
+
+
+def _collect_rich_data_value_targets(
+    rich_value_nodes: Iterable[etree._Element],
+    local_image_type_indexes: set[str],
+    relationship_targets: RelationshipTargets,
+) -> RichDataValueTargets:
     rich_data_value_targets: RichDataValueTargets = {}
-    for value_index, rich_value_node in enumerate(
-        richvalue_tree.xpath("//rd:rv", namespaces=NAMESPACES)
-    ):
+    for value_index, rich_value_node in enumerate(rich_value_nodes):
         rich_value_type_index = rich_value_node.get("s")
         if rich_value_type_index not in local_image_type_indexes:
             continue
@@ -123,8 +171,17 @@ def _map_vm_ids_to_targets(
     """
     Returns a map from vm_id (worksheet cell vm attr) to target image path.
     """
+    return _collect_vm_id_targets(
+        metadata_tree.xpath("//x:valueMetadata/x:bk/x:rc", namespaces=NAMESPACES),
+        rich_data_value_targets,
+    )
+
+
+def _collect_vm_id_targets(
+    records: Iterable[etree._Element], rich_data_value_targets: RichDataValueTargets
+) -> VmIdToTargetMap:
     vm_id_to_target: VmIdToTargetMap = {}
-    for record in metadata_tree.xpath("//x:valueMetadata/x:bk/x:rc", namespaces=NAMESPACES):
+    for record in records:
         rich_data_value_index = record.get("v")
         if rich_data_value_index is None:
             continue
@@ -146,14 +203,8 @@ def _map_vm_ids_to_targets(
     return vm_id_to_target
 
 
-def get_incell_images_refs(
-    archive: ZipFile,
-) -> tuple[VmIdToTargetMap, Exception | None]:
-    """
-    Extracts in-cell image references from the given archive and returns:
-    - vm_id -> target image path
-    """
-    archive_namelist = archive.namelist()
+def _get_missing_required_files_error(archive: ZipFile) -> FileNotFoundError | None:
+    archive_namelist = get_member_names(archive)
     required_files = (
         _RICHVALUE_REL_XML_RELS,
         _METADATA_XML,
@@ -161,9 +212,22 @@ def get_incell_images_refs(
         _RICHVALUES_STRUCTURE_XML,
     )
     if not all(required_file in archive_namelist for required_file in required_files):
-        return {}, FileNotFoundError(
+        return FileNotFoundError(
             "Missing required files in the archive for in-cell images extraction."
         )
+    return None
+
+
+def get_incell_images_refs(
+    archive: ZipFile,
+) -> tuple[VmIdToTargetMap, Exception | None]:
+    """
+    Extracts in-cell image references from the given archive and returns:
+    - vm_id -> target image path
+    """
+    missing_files_error = _get_missing_required_files_error(archive)
+    if missing_files_error is not None:
+        return {}, missing_files_error
 
     try:
         relationship_targets = _get_relationship_targets(archive)
@@ -202,3 +266,61 @@ def get_incell_images_refs(
             incell_exc,
         )
         return {}, incell_exc
+
+
+def get_incell_images_refs_streaming(
+    archive: ZipFile,
+) -> tuple[VmIdToTargetMap, Exception | None]:
+    """
+    Streaming variant of `get_incell_images_refs` with identical results.
+
+    Each rich-data part is read once with `iterparse` and its elements are
+    released as they are consumed, instead of building full lxml trees.
+    """
+    missing_files_error = _get_missing_required_files_error(archive)
+    if missing_files_error is not None:
+        return {}, missing_files_error
+
+    try:
+        relationship_targets = _get_relationship_targets(archive)
+        logging.info(
+            "get_incell_images_refs: relationship_targets -> %s", relationship_targets
+        )
+
+        local_image_type_indexes = _collect_local_image_type_indexes(
+            _iter_xml_elements(
+                archive, _RICHVALUES_STRUCTURE_XML, f"{{{RICHDATA_NS}}}s"
+            )
+        )
+        rich_data_value_targets = _collect_rich_data_value_targets(
+            _iter_xml_elements(archive, _RICHVALUE_XML, f"{{{RICHDATA_NS}}}rv"),
+            local_image_type_indexes,
+            relationship_targets,
+        )
+        logging.info(
+            "get_incell_images_refs: rich_data_value_targets -> %s",
+            rich_data_value_targets,
+        )
+
+        vm_id_to_target = _collect_vm_id_targets(
+            (
+                record
+                for record in _iter_xml_elements(
+                    archive, _METADATA_XML, f"{{{SHEET_MAIN_NS}}}rc"
+                )
+                if _has_ancestor_tags(
+                    record,
+                    (f"{{{SHEET_MAIN_NS}}}bk", f"{{{SHEET_MAIN_NS}}}valueMetadata"),
+                )
+            ),
+            rich_data_value_targets,
+        )
+        logging.info("get_incell_images_refs: vm_id_to_target -> %s", vm_id_to_target)
+
+        return vm_id_to_target, None
+    except Exception as incell_exc:
+        logging.warning(
+            "get_incell_images_refs: unable to read in-cell images due to: %r",
+            incell_exc,
+        )
+        return {}, incell_exc
@@ -0,0 +1,167 @@
+"""Wait for workbook changes under a set of directories.
+
+`create_waiter` returns an inotify-based waiter on Linux and a stat-polling
+waiter elsewhere (or when inotify cannot be initialized). Both only report
+changes to `.xlsx` files and directories outside `exclude`, so writes to an
+output tree nested in a watched directory do not wake the watcher up.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+from collections.abc import Callable, Hashable, Iterable
+from time import monotonic, sleep
+from typing import Protocol
+
+WATCH_SUFFIX = ".xlsx"
+DEFAULT_POLL_INTERVAL = 5.0
+DEFAULT_SETTLE_SECONDS = 0.5
+_STOP_CHECK_SECONDS = 0.25
+
+# <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = (
+    _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+)
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+
+class ChangeWaiter(Protocol):
+    def wait(self, should_stop: Callable[[], bool]) -> bool:
+        """Block until a change is seen (True) or `should_stop()` is true (False)."""
+        ...
+
+    def close(self) -> None: ...
+
+
+class PollingWaiter:
+    """Compare a stat snapshot every `interval` seconds."""
+
+    def __init__(
+        self, snapshot: Callable[[], Hashable], interval: float = DEFAULT_POLL_INTERVAL
+    ) -> None:
+        self.snapshot = snapshot
+        self.interval = interval
+        self._last = snapshot()
+
+    def wait(self, should_stop: Callable[[], bool]) -> bool:
+        while True:
+            deadline = monotonic() + self.interval
+            while monotonic() < deadline:
+                if should_stop():
+                    return False
+                sleep(min(_STOP_CHECK_SECONDS, max(0.0, deadline - monotonic())))
+            current = self.snapshot()
+            if current != self._last:
+                self._last = current
+                return True
+
+    def close(self) -> None:
+        return None
+
+
+class InotifyWaiter:
+    """Watch `directories` (recursively) with Linux inotify through libc."""
+
+    def __init__(
+        self,
+        directories: Iterable[str],
+        exclude: Iterable[str] = (),
+        settle: float = DEFAULT_SETTLE_SECONDS,
+    ) -> None:
+        self.settle = settle
+        self.directories = [os.path.abspath(directory) for directory in directories]
+        self.exclude = [os.path.abspath(directory) for directory in exclude]
+        self._paths: dict[int, str] = {}
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._add_watches()
+
+    def _is_excluded(self, path: str) -> bool:
+        return any(
+            path == excluded or path.startswith(excluded + os.sep)
+            for excluded in self.exclude
+        )
+
+    def _add_watches(self) -> None:
+        # Re-adding a watched directory is a no-op, so this also picks up new ones.
+        for root in self.directories:
+            for directory, subdirectories, _ in os.walk(root):
+                subdirectories[:] = [
+                    name
+                    for name in subdirectories
+                    if not self._is_excluded(os.path.join(directory, name))
+                ]
+                wd = self._libc.inotify_add_watch(
+                    self._fd, os.fsencode(directory), _WATCH_MASK
+                )
+                if wd >= 0:
+                    self._paths[wd] = directory
+
+    def _read_relevant(self) -> bool:
+        relevant = False
+        while True:
+            try:
+                buffer = os.read(self._fd, _READ_SIZE)
+            except BlockingIOError:
+                return relevant
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, name_size = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(buffer[offset : offset + name_size].rstrip(b"\0"))
+                offset += name_size
+                if mask & _IN_Q_OVERFLOW:
+                    relevant = True
+                elif mask & _IN_ISDIR or name.lower().endswith(WATCH_SUFFIX):
+                    path = os.path.join(self._paths.get(wd, ""), name)
+                    relevant = relevant or not self._is_excluded(path)
+
+    def wait(self, should_stop: Callable[[], bool]) -> bool:
+        while not should_stop():
+            readable, _, _ = select.select([self._fd], [], [], _STOP_CHECK_SECONDS)
+            if not readable or not self._read_relevant():
+                continue
+            # Let copies and saves finish before reporting the change.
+            while select.select([self._fd], [], [], self.settle)[0]:
+                self._read_relevant()
+            self._add_watches()
+            return True
+        return False
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_waiter(
+    directories: Iterable[str],
+    snapshot: Callable[[], Hashable],
+    interval: float = DEFAULT_POLL_INTERVAL,
+    exclude: Iterable[str] = (),
+) -> ChangeWaiter:
+    """Return an inotify waiter where available, else a `PollingWaiter`."""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWaiter(directories, exclude=exclude)
+        except (OSError, AttributeError) as inotify_exc:
+            logging.warning(
+                "watch: inotify unavailable (%r); polling every %.1f s",
+                inotify_exc,
+                interval,
+            )
+    return PollingWaiter(snapshot, interval)
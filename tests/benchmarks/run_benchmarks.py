@@ -0,0 +1,569 @@
+"""Benchmark `create_xlsx_transform` and core helpers against a committed baseline.
+
+Each case runs over a matrix of generated workbook shapes (see
+`tests/scripts/generate_corpus.py`) and records the best latency of
+`--repeat` runs, the throughput in cells/s and the output size; full
+transforms also record the best time of each phase. Results are compared with `baseline.json` and the
+script exits with status 1 when a metric regresses beyond its tolerance.
+
+    python3 tests/benchmarks/run_benchmarks.py
+    python3 tests/benchmarks/run_benchmarks.py --shapes narrow styled --repeat 5
+    python3 tests/benchmarks/run_benchmarks.py --update-baseline
+    python3 tests/benchmarks/run_benchmarks.py --memory
+
+With `--memory`, the transform runs instead in a fresh process per workbook
+size (so peak RSS is per run) with `tracemalloc` tracing. The report lists the
+traced peak/current bytes and peak RSS of each phase and the top allocation
+sites, and fits bytes per cell over the sizes; the fitted slopes are compared
+with the `memory` section of the baseline.
+
+Timings are machine dependent: refresh the baseline on the machine that runs
+the comparison before relying on it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import multiprocessing
+import platform
+import sys
+import tempfile
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import replace
+from pathlib import Path
+from time import perf_counter
+
+from bs4 import BeautifulSoup
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(ROOT_DIR / "tests" / "scripts"))
+
+from condif2css.color import argb_to_css  # noqa: E402
+from condif2css.core import create_themed_css_color_resolver  # noqa: E402
+from condif2css.css import CssBuilder, CssRulesRegistry, create_get_css_from_cell  # noqa: E402
+from condif2css.themes import get_theme_colors  # noqa: E402
+from generate_corpus import CorpusSpec, write_corpus_workbook  # noqa: E402
+
+from xx2html import TransformReport, create_xlsx_transform  # noqa: E402
+from xx2html.core.archive import IndexedArchive, load_workbook_from_archive  # noqa: E402
+from xx2html.core.cf import apply_cf_styles_in_soup  # noqa: E402
+from xx2html.core.incell import get_incell_css, get_incell_image_sizes  # noqa: E402
+from xx2html.core.links import update_links_in_soup  # noqa: E402
+from xx2html.core.utils import cova_render_table, get_worksheet_contents  # noqa: E402
+from xx2html.core.vm import get_incell_images_refs_streaming  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+# Workbook shapes the cases run over; kept small enough for a local run.
+BENCH_SHAPES: dict[str, CorpusSpec] = {
+    "narrow": CorpusSpec(rows=2000, cols=5, styles=8),
+    "wide": CorpusSpec(rows=100, cols=100, styles=8),
+    "styled": CorpusSpec(
+        rows=1000, cols=10, styles=64, merged=50, cf_rules=4, cf_coverage=0.5
+    ),
+    "links": CorpusSpec(rows=1000, cols=10, styles=8, hyperlinks=500),
+    "images": CorpusSpec(
+        rows=300,
+        cols=8,
+        styles=8,
+        drawing_images=4,
+        incell_images=60,
+        incell_image_variants=8,
+    ),
+}
+
+DEFAULT_TOLERANCE = 0.5
+DEFAULT_PHASE_TOLERANCE = 0.75
+DEFAULT_BYTES_TOLERANCE = 0.01
+# Differences below this many seconds are noise, whatever the ratio.
+DEFAULT_MIN_SECONDS = 0.01
+
+# Increasing sizes of one shape; bytes per cell is fitted across them.
+MEMORY_SHAPE = CorpusSpec(rows=250, cols=10, styles=32, merged=10, cf_rules=2, hyperlinks=20)
+MEMORY_ROWS = (250, 500, 1000, 2000)
+DEFAULT_MEMORY_TOLERANCE = 0.2
+MEMORY_TOP_SITES = 12
+# Source files whose allocations are grouped under a readable label.
+ALLOCATION_CATEGORIES = (
+    ("xx2html/core/patches", "openpyxl patches"),
+    ("xx2html/core/utils.py", "CellRenderData dicts"),
+    ("bs4/", "BeautifulSoup nodes"),
+    ("openpyxl/", "openpyxl model"),
+    ("condif2css/", "CSS registries"),
+    ("xlsx2html/", "value formatting"),
+    ("babel/", "babel locale data"),
+)
+
+SHEET_HTML = (
+    '<section id="{enc_sheet_name}" data-sheet="{sheet_name}">'
+    "{table_generated_html}</section>"
+)
+SHEETNAME_HTML = '<a class="sheet-nav" href="#{enc_sheet_name}">{sheet_name}</a>'
+INDEX_HTML = (
+    "<!doctype html><html><head>"
+    "{fonts_html}{core_css_html}{user_css_html}{generated_css_html}"
+    "{generated_incell_css_html}{conditional_css_html}"
+    "</head><body>{sheets_names_generated_html}{sheets_generated_html}"
+    "<!-- {source_filename} --></body></html>"
+)
+
+
+def _best_seconds(run: Callable[[], object], repeat: int) -> tuple[float, object]:
+    """Return the fastest of `repeat` runs (least affected by noise) and the last result."""
+    timings = []
+    result: object = None
+    for _ in range(repeat):
+        gc.collect()
+        start = perf_counter()
+        result = run()
+        timings.append(perf_counter() - start)
+    return min(timings), result
+
+
+def _metrics(seconds: float, cells: int, output_bytes: int) -> dict[str, object]:
+    return {
+        "seconds": seconds,
+        "cells_per_second": cells / seconds if seconds > 0 else 0.0,
+        "output_bytes": output_bytes,
+    }
+
+
+def _bench_transform(source: Path, spec: CorpusSpec, repeat: int) -> dict[str, object]:
+    transform = create_xlsx_transform(
+        sheet_html=SHEET_HTML,
+        sheetname_html=SHEETNAME_HTML,
+        index_html=INDEX_HTML,
+        fonts_html="",
+        core_css="",
+        user_css="",
+        safari_js="",
+        apply_cf=True,
+    )
+    reports: list[TransformReport] = []
+    dest = source.with_suffix(".html")
+
+    def run() -> None:
+        report = TransformReport()
+        ok, err = transform(str(source), str(dest), "en_US", report=report)
+        if not ok:
+            raise RuntimeError(err)
+        reports.append(report)
+
+    seconds, _ = _best_seconds(run, repeat)
+    metrics = _metrics(seconds, spec.cells, dest.stat().st_size)
+    metrics["phases"] = {
+        name: min(report.phases.get(name, 0.0) for report in reports)
+        for name in reports[0].phases
+    }
+    return metrics
+
+
+def _bench_helpers(source: Path, spec: CorpusSpec, repeat: int) -> dict[str, dict[str, object]]:
+    archive = IndexedArchive(str(source))
+    try:
+        workbook = load_workbook_from_archive(archive, data_only=True, rich_text=True)
+        resolve_color = create_themed_css_color_resolver(get_theme_colors(workbook))
+
+        def get_css_color(color):
+            argb_color = resolve_color(color)
+            return None if argb_color is None else argb_to_css(argb_color)
+
+        css_builder = CssBuilder(get_css_color)
+        css_registry = CssRulesRegistry()
+        get_css_from_cell = create_get_css_from_cell(css_registry, css_builder=css_builder)
+        worksheet = workbook.worksheets[0]
+        cells = spec.rows * spec.cols
+        results: dict[str, dict[str, object]] = {}
+
+        seconds, contents = _best_seconds(
+            lambda: get_worksheet_contents(
+                worksheet,
+                css_rules_registry=css_registry,
+                css_builder=css_builder,
+                get_css_from_cell=get_css_from_cell,
+                locale="en_US",
+                ws_index=0,
+            ),
+            repeat,
+        )
+        results["get_worksheet_contents"] = _metrics(seconds, cells, 0)
+
+        seconds, table_html = _best_seconds(
+            lambda: cova_render_table(contents),  # type: ignore[arg-type]
+            repeat,
+        )
+        html = f"<html><body>{table_html}</body></html>"
+        results["cova_render_table"] = _metrics(seconds, cells, len(str(table_html).encode("utf-8")))
+
+        # In-cell image helpers only time real work on shapes that have images;
+        # refs are read with the streaming parser the transform uses.
+        if spec.incell_images:
+            seconds, refs_result = _best_seconds(
+                lambda: get_incell_images_refs_streaming(archive), repeat
+            )
+            incell_refs = refs_result[0]  # type: ignore[index]
+            results["get_incell_images_refs_streaming"] = _metrics(seconds, cells, 0)
+
+            image_sizes = get_incell_image_sizes(incell_refs, archive)
+            seconds, incell_css = _best_seconds(
+                lambda: get_incell_css(
+                    set(incell_refs), incell_refs, archive, incell_image_sizes=image_sizes
+                ),
+                repeat,
+            )
+            results["get_incell_css"] = _metrics(
+                seconds, cells, len(str(incell_css).encode("utf-8"))
+            )
+
+        encoded_sheet_names = {
+            sheet_name: f"sheet_{index:03x}" for index, sheet_name in enumerate(workbook.sheetnames)
+        }
+        seconds = _best_soup_seconds(
+            html, lambda soup: update_links_in_soup(soup, encoded_sheet_names), repeat
+        )
+        results["update_links_in_soup"] = _metrics(seconds, cells, 0)
+
+        # Every third rendered cell gets a conditional formatting class.
+        relations = [
+            (worksheet.title, str(cell["attrs"]["id"]).split("!", 1)[1], {"xx2h_cf_bench"})
+            for row in contents["rows"]  # type: ignore[index]
+            for position, cell in enumerate(row)
+            if position % 3 == 0 and cell["attrs"].get("id")
+        ]
+        seconds = _best_soup_seconds(
+            html, lambda soup: apply_cf_styles_in_soup(soup, relations), repeat
+        )
+        results["apply_cf_styles_in_soup"] = _metrics(seconds, cells, 0)
+        return results
+    finally:
+        archive.close()
+
+
+def _best_soup_seconds(html: str, run: Callable[[BeautifulSoup], object], repeat: int) -> float:
+    """Time `run` on a freshly parsed soup each round; parsing is not timed."""
+    timings = []
+    for _ in range(repeat):
+        soup = BeautifulSoup(html, "lxml")
+        gc.collect()
+        start = perf_counter()
+        run(soup)
+        timings.append(perf_counter() - start)
+    return min(timings)
+
+
+def run_benchmarks(
+    shapes: dict[str, CorpusSpec], repeat: int, corpus_dir: Path
+) -> dict[str, dict[str, object]]:
+    """Return `{"<case>/<shape>": metrics}` for every case and shape."""
+    results: dict[str, dict[str, object]] = {}
+    for shape_name, spec in shapes.items():
+        source = write_corpus_workbook(corpus_dir / f"{shape_name}.xlsx", spec)
+        results[f"transform/{shape_name}"] = _bench_transform(source, spec, repeat)
+        for case_name, metrics in _bench_helpers(source, spec, repeat).items():
+            results[f"{case_name}/{shape_name}"] = metrics
+        print(f"{shape_name}: {results[f'transform/{shape_name}']['seconds']:.3f}s", file=sys.stderr)
+    return results
+
+
+class _SnapshotReport(TransformReport):
+    """Report that keeps a tracemalloc snapshot taken at the end of post-processing.
+
+    By then the worksheet model, render data, output string and soup are all
+    alive, which is where the transform peaks.
+    """
+
+    snapshot: tracemalloc.Snapshot | None = None
+
+    @contextmanager
+    def phase(self, name: str, sheet: str | None = None) -> Iterator[None]:
+        with super().phase(name, sheet):
+            yield
+        if name == "post_processing":
+            self.snapshot = tracemalloc.take_snapshot().filter_traces(
+                (
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                )
+            )
+
+
+def _allocation_label(filename: str) -> str:
+    normalized = filename.replace("\\", "/")
+    for marker, label in ALLOCATION_CATEGORIES:
+        if marker in normalized:
+            return label
+    return "other"
+
+
+def _top_allocation_sites(snapshot: tracemalloc.Snapshot) -> list[dict[str, object]]:
+    sites = []
+    for statistic in snapshot.statistics("lineno")[:MEMORY_TOP_SITES]:
+        frame = statistic.traceback[0]
+        filename = frame.filename.replace("\\", "/")
+        for prefix in ("site-packages/", f"{ROOT_DIR.as_posix()}/"):
+            filename = filename.rsplit(prefix, 1)[-1]
+        sites.append(
+            {
+                "site": f"{filename}:{frame.lineno}",
+                "category": _allocation_label(frame.filename),
+                "bytes": statistic.size,
+                "blocks": statistic.count,
+            }
+        )
+    return sites
+
+
+def _allocation_categories(snapshot: tracemalloc.Snapshot) -> dict[str, int]:
+    totals: dict[str, int] = {}
+    for statistic in snapshot.statistics("filename"):
+        label = _allocation_label(statistic.traceback[0].filename)
+        totals[label] = totals.get(label, 0) + statistic.size
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def _measure_memory(source: str, cells: int) -> dict[str, object]:
+    """Run one traced transform; executed in a fresh child process."""
+    transform = create_xlsx_transform(
+        sheet_html=SHEET_HTML,
+        sheetname_html=SHEETNAME_HTML,
+        index_html=INDEX_HTML,
+        fonts_html="",
+        core_css="",
+        user_css="",
+        safari_js="",
+        apply_cf=True,
+    )
+    report = _SnapshotReport(track_memory=True)
+    tracemalloc.start()
+    try:
+        ok, err = transform(source, f"{source}.html", "en_US", report=report)
+    finally:
+        tracemalloc.stop()
+    if not ok:
+        raise RuntimeError(err)
+    return {
+        "cells": cells,
+        "peak_bytes": max(memory["peak_bytes"] for memory in report.memory_phases.values()),
+        "peak_rss_bytes": max(memory["peak_rss_bytes"] for memory in report.memory_phases.values()),
+        "phases": report.memory_phases,
+        "top_sites": _top_allocation_sites(report.snapshot) if report.snapshot else [],
+        "categories": _allocation_categories(report.snapshot) if report.snapshot else {},
+    }
+
+
+def fit_bytes_per_cell(samples: list[tuple[int, int]]) -> tuple[float, float]:
+    """Least-squares fit of `bytes = slope * cells + intercept`; returns both."""
+    count = len(samples)
+    mean_cells = sum(cells for cells, _ in samples) / count
+    mean_bytes = sum(size for _, size in samples) / count
+    variance = sum((cells - mean_cells) ** 2 for cells, _ in samples)
+    if variance == 0:
+        return 0.0, mean_bytes
+    slope = (
+        sum((cells - mean_cells) * (size - mean_bytes) for cells, size in samples)
+        / variance
+    )
+    return slope, mean_bytes - slope * mean_cells
+
+
+def run_memory_benchmarks(rows: tuple[int, ...], corpus_dir: Path) -> dict[str, object]:
+    """Return per-size memory measurements and the fitted bytes per cell."""
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for row_count in rows:
+        spec = replace(MEMORY_SHAPE, rows=row_count)
+        source = write_corpus_workbook(corpus_dir / f"memory_{row_count}.xlsx", spec)
+        # A fresh process per size keeps peak RSS from carrying over.
+        with context.Pool(1) as pool:
+            run = pool.apply(_measure_memory, (str(source), spec.cells))
+        runs.append(run)
+        print(f"memory {spec.cells} cells: peak {run['peak_bytes']:,} B", file=sys.stderr)
+    traced_slope, traced_intercept = fit_bytes_per_cell(
+        [(run["cells"], run["peak_bytes"]) for run in runs]
+    )
+    rss_slope, rss_intercept = fit_bytes_per_cell(
+        [(run["cells"], run["peak_rss_bytes"]) for run in runs]
+    )
+    return {
+        "bytes_per_cell": traced_slope,
+        "fixed_bytes": traced_intercept,
+        "rss_bytes_per_cell": rss_slope,
+        "rss_fixed_bytes": rss_intercept,
+        "runs": runs,
+    }
+
+
+def compare_memory(
+    memory: dict[str, object],
+    baseline: dict[str, object],
+    tolerance: float = DEFAULT_MEMORY_TOLERANCE,
+) -> list[str]:
+    """Return a message for each fitted bytes-per-cell slope above its baseline."""
+    regressions = []
+    for metric in ("bytes_per_cell", "rss_bytes_per_cell"):
+        expected = baseline.get(metric)
+        if expected is None:
+            continue
+        current = float(memory[metric])  # type: ignore[arg-type]
+        if current > float(expected) * (1 + tolerance):  # type: ignore[arg-type]
+            regressions.append(f"memory {metric}: {current:,.0f} vs baseline {expected:,.0f}")
+    return regressions
+
+
+def _format_memory(memory: dict[str, object]) -> str:
+    lines = [
+        f"bytes/cell (traced peak): {memory['bytes_per_cell']:,.0f} + {memory['fixed_bytes']:,.0f} fixed",
+        f"bytes/cell (peak RSS):    {memory['rss_bytes_per_cell']:,.0f} + {memory['rss_fixed_bytes']:,.0f} fixed",
+    ]
+    for run in memory["runs"]:  # type: ignore[attr-defined]
+        lines.append(f"\n{run['cells']} cells")
+        lines.append(f"  {'phase':<22} {'peak':>14} {'current':>14} {'peak RSS':>14}")
+        for phase, values in run["phases"].items():
+            lines.append(
+                f"  {phase:<22} {values['peak_bytes']:>14,} {values['current_bytes']:>14,} "
+                f"{values['peak_rss_bytes']:>14,}"
+            )
+    largest = memory["runs"][-1]  # type: ignore[index]
+    lines.append(f"\nLive allocations at the end of post-processing ({largest['cells']} cells):")
+    for label, size in largest["categories"].items():
+        lines.append(f"  {size:>12,} B  {label}")
+    lines.append("Top allocation sites:")
+    for site in largest["top_sites"]:
+        lines.append(f"  {site['bytes']:>12,} B {site['blocks']:>9,} blocks  {site['category']:<22} {site['site']}")
+    return "\n".join(lines)
+
+
+def _exceeds(current: float, baseline: float, tolerance: float, min_seconds: float) -> bool:
+    return current > baseline * (1 + tolerance) and current - baseline > min_seconds
+
+
+def compare_results(
+    results: dict[str, dict[str, object]],
+    baseline: dict[str, dict[str, object]],
+    tolerance: float = DEFAULT_TOLERANCE,
+    phase_tolerance: float = DEFAULT_PHASE_TOLERANCE,
+    bytes_tolerance: float = DEFAULT_BYTES_TOLERANCE,
+    min_seconds: float = DEFAULT_MIN_SECONDS,
+) -> list[str]:
+    """Return one message per metric of `results` that regressed against `baseline`.
+
+    Latency (and each transform phase) regresses when it is slower than the
+    baseline by more than its tolerance ratio and by more than `min_seconds`;
+    output size regresses when it changes by more than `bytes_tolerance` in
+    either direction. Cases missing from the baseline are skipped.
+    """
+    regressions = []
+    for case, metrics in results.items():
+        expected = baseline.get(case)
+        if expected is None:
+            continue
+        seconds = float(metrics["seconds"])  # type: ignore[arg-type]
+        expected_seconds = float(expected["seconds"])  # type: ignore[arg-type]
+        if _exceeds(seconds, expected_seconds, tolerance, min_seconds):
+            regressions.append(
+                f"{case}: {seconds:.4f}s vs baseline {expected_seconds:.4f}s (+{seconds / expected_seconds - 1:.0%})"
+            )
+        expected_phases = expected.get("phases") or {}
+        for phase, phase_seconds in (metrics.get("phases") or {}).items():  # type: ignore[union-attr]
+            expected_phase = expected_phases.get(phase)  # type: ignore[union-attr]
+            if expected_phase is not None and _exceeds(phase_seconds, expected_phase, phase_tolerance, min_seconds):
+                regressions.append(
+                    f"{case} [{phase}]: {phase_seconds:.4f}s vs baseline {expected_phase:.4f}s"
+                )
+        output_bytes = int(metrics["output_bytes"])  # type: ignore[call-overload]
+        expected_bytes = int(expected["output_bytes"])  # type: ignore[call-overload]
+        if abs(output_bytes - expected_bytes) > expected_bytes * bytes_tolerance:
+            regressions.append(f"{case}: {output_bytes} output bytes vs baseline {expected_bytes}")
+    return regressions
+
+
+def _format_table(results: dict[str, dict[str, object]], baseline: dict[str, dict[str, object]]) -> str:
+    lines = [f"{'case':<40} {'seconds':>9} {'baseline':>9} {'cells/s':>12} {'bytes':>10}"]
+    for case, metrics in results.items():
+        expected = baseline.get(case, {}).get("seconds")
+        expected_text = "-" if expected is None else f"{expected:.4f}"
+        lines.append(
+            f"{case:<40} {metrics['seconds']:>9.4f} {expected_text:>9} "
+            f"{metrics['cells_per_second']:>12,.0f} {metrics['output_bytes']:>10}"
+        )
+    return "\n".join(lines)
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shapes", nargs="+", choices=sorted(BENCH_SHAPES), help="shapes to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the fastest is kept")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--output", type=Path, help="also write the results as JSON to this path")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--phase-tolerance", type=float, default=DEFAULT_PHASE_TOLERANCE)
+    parser.add_argument("--bytes-tolerance", type=float, default=DEFAULT_BYTES_TOLERANCE)
+    parser.add_argument("--min-seconds", type=float, default=DEFAULT_MIN_SECONDS)
+    parser.add_argument("--memory", action="store_true", help="run the memory benchmark instead")
+    parser.add_argument(
+        "--memory-rows", type=int, nargs="+", default=list(MEMORY_ROWS), help="workbook sizes (rows) to fit over"
+    )
+    parser.add_argument("--memory-tolerance", type=float, default=DEFAULT_MEMORY_TOLERANCE)
+    return parser.parse_args(argv)
+
+
+def _write_json(path: Path, document: dict[str, object]) -> None:
+    path.write_text(json.dumps(document, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    baseline_document = (
+        json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+    )
+    section = "memory" if args.memory else "cases"
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        if args.memory:
+            results: dict[str, object] = run_memory_benchmarks(tuple(args.memory_rows), Path(corpus_dir))
+        else:
+            shapes = {name: BENCH_SHAPES[name] for name in (args.shapes or BENCH_SHAPES)}
+            results = run_benchmarks(shapes, args.repeat, Path(corpus_dir))  # type: ignore[assignment]
+
+    document = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        section: results,
+    }
+    if args.output is not None:
+        _write_json(args.output, document)
+    if args.update_baseline:
+        # Each mode only replaces its own section of the baseline; memory
+        # keeps the fitted figures, not the per-run detail.
+        if args.memory:
+            document[section] = {key: value for key, value in results.items() if key != "runs"}
+        _write_json(args.baseline, {**baseline_document, **document})
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline = baseline_document.get(section, {})
+    if args.memory:
+        print(_format_memory(results))
+        regressions = compare_memory(results, baseline, tolerance=args.memory_tolerance)
+    else:
+        print(_format_table(results, baseline))  # type: ignore[arg-type]
+        regressions = compare_results(
+            results,  # type: ignore[arg-type]
+            baseline,
+            tolerance=args.tolerance,
+            phase_tolerance=args.phase_tolerance,
+            bytes_tolerance=args.bytes_tolerance,
+            min_seconds=args.min_seconds,
+        )
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""Soak-test one transform closure with thousands of conversions in one process.
+
+A rotating corpus of small generated workbooks (plus a corrupt one, to cover
+the failure path) is converted over and over by the same callable, as a
+long-running worker would. After a warm-up, RSS, open file descriptors and
+`gc` object counts are sampled; the run fails when the fitted growth per
+conversion of any of them exceeds its threshold, or when `ZipFile` or
+`Workbook` objects survive a conversion.
+
+    python3 tests/benchmarks/run_soak.py
+    python3 tests/benchmarks/run_soak.py --iterations 20000 --sample-every 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import logging
+import os
+import statistics
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from zipfile import ZipFile
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(ROOT_DIR / "tests" / "scripts"))
+
+from generate_corpus import CorpusSpec, write_corpus_workbook  # noqa: E402
+from openpyxl.workbook.workbook import Workbook  # noqa: E402
+
+from xx2html import create_xlsx_transform  # noqa: E402
+from xx2html.core.report import get_peak_rss_bytes  # noqa: E402
+
+SOAK_SHAPES: dict[str, CorpusSpec] = {
+    "plain": CorpusSpec(rows=30, cols=6, styles=4, seed=1),
+    "cf_links": CorpusSpec(
+        rows=30, cols=6, styles=4, merged=3, cf_rules=2, hyperlinks=6, sheets=2, seed=2
+    ),
+    "images": CorpusSpec(
+        rows=20, cols=6, styles=4, drawing_images=1, incell_images=4, seed=3
+    ),
+}
+
+DEFAULT_ITERATIONS = 2000
+DEFAULT_WARMUP = 100
+DEFAULT_SAMPLE_EVERY = 50
+# Allowed growth per conversion, fitted over the samples after warm-up.
+DEFAULT_MAX_RSS_SLOPE = 4096.0
+DEFAULT_MAX_FD_SLOPE = 0.01
+DEFAULT_MAX_GC_SLOPE = 2.0
+
+SHEET_HTML = (
+    '<section id="{enc_sheet_name}" data-sheet="{sheet_name}">'
+    "{table_generated_html}</section>"
+)
+SHEETNAME_HTML = '<a class="sheet-nav" href="#{enc_sheet_name}">{sheet_name}</a>'
+INDEX_HTML = (
+    "<!doctype html><html><head>"
+    "{fonts_html}{core_css_html}{user_css_html}{generated_css_html}"
+    "{generated_incell_css_html}{conditional_css_html}"
+    "</head><body>{sheets_names_generated_html}{sheets_generated_html}"
+    "<!-- {source_filename} --></body></html>"
+)
+
+
+def get_rss_bytes() -> int:
+    """Return the current resident set size, or the peak where it is unavailable."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return get_peak_rss_bytes()
+
+
+def get_open_fd_count() -> int | None:
+    """Return the number of open file descriptors, or `None` if unknown."""
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(fd_dir))
+        except OSError:
+            continue
+    return None
+
+
+def count_live_objects(*types: type) -> int:
+    """Return how many instances of `types` survive a full collection."""
+    gc.collect()
+    return sum(1 for obj in gc.get_objects() if isinstance(obj, types))
+
+
+@dataclass
+class SoakSample:
+    iteration: int
+    rss_bytes: int
+    open_fds: int | None
+    gc_objects: int
+
+
+@dataclass
+class SoakResult:
+    samples: list[SoakSample] = field(default_factory=list)
+    failures: int = 0
+    leaked_handles: int = 0
+
+    def slopes(self) -> dict[str, float]:
+        """Return the fitted growth per conversion of each sampled metric."""
+        iterations = [sample.iteration for sample in self.samples]
+        series: dict[str, list[float]] = {
+            "rss_bytes": [sample.rss_bytes for sample in self.samples],
+            "gc_objects": [sample.gc_objects for sample in self.samples],
+        }
+        if all(sample.open_fds is not None for sample in self.samples):
+            series["open_fds"] = [float(sample.open_fds or 0) for sample in self.samples]
+        if len(set(iterations)) < 2:
+            return {name: 0.0 for name in series}
+        return {
+            name: statistics.linear_regression(iterations, values).slope
+            for name, values in series.items()
+        }
+
+
+def _write_corpus(corpus_dir: Path) -> list[Path]:
+    sources = [
+        write_corpus_workbook(corpus_dir / f"{name}.xlsx", spec)
+        for name, spec in SOAK_SHAPES.items()
+    ]
+    broken = corpus_dir / "broken.xlsx"
+    broken.write_bytes(sources[0].read_bytes()[:2048])
+    sources.append(broken)
+    return sources
+
+
+def _sample(iteration: int) -> SoakSample:
+    gc.collect()
+    return SoakSample(
+        iteration=iteration,
+        rss_bytes=get_rss_bytes(),
+        open_fds=get_open_fd_count(),
+        gc_objects=len(gc.get_objects()),
+    )
+
+
+def run_soak(
+    iterations: int, warmup: int, sample_every: int, corpus_dir: Path
+) -> SoakResult:
+    """Convert the rotating corpus `iterations` times with one closure."""
+    transform = create_xlsx_transform(
+        sheet_html=SHEET_HTML,
+        sheetname_html=SHEETNAME_HTML,
+        index_html=INDEX_HTML,
+        fonts_html="",
+        core_css="",
+        user_css="",
+        safari_js="",
+        apply_cf=True,
+    )
+    sources = _write_corpus(corpus_dir)
+    dest = corpus_dir / "out.html"
+    result = SoakResult()
+    for iteration in range(1, iterations + 1):
+        source = sources[iteration % len(sources)]
+        ok, _ = transform(str(source), str(dest), "en_US")
+        if not ok and source.name != "broken.xlsx":
+            result.failures += 1
+        if iteration % sample_every == 0:
+            if iteration > warmup:
+                result.samples.append(_sample(iteration))
+            # Nothing the transform opened may outlive it.
+            result.leaked_handles = max(
+                result.leaked_handles, count_live_objects(ZipFile, Workbook)
+            )
+    return result
+
+
+def check_soak(
+    result: SoakResult,
+    max_rss_slope: float = DEFAULT_MAX_RSS_SLOPE,
+    max_fd_slope: float = DEFAULT_MAX_FD_SLOPE,
+    max_gc_slope: float = DEFAULT_MAX_GC_SLOPE,
+) -> list[str]:
+    """Return one message per threshold `result` exceeds."""
+    problems = []
+    limits = {"rss_bytes": max_rss_slope, "open_fds": max_fd_slope, "gc_objects": max_gc_slope}
+    for name, slope in result.slopes().items():
+        if slope > limits[name]:
+            problems.append(f"{name} grows by {slope:.3f} per conversion (limit {limits[name]})")
+    if result.leaked_handles:
+        problems.append(f"{result.leaked_handles} ZipFile/Workbook objects outlived a conversion")
+    if result.failures:
+        problems.append(f"{result.failures} conversions of valid workbooks failed")
+    return problems
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="conversions before sampling starts")
+    parser.add_argument("--sample-every", type=int, default=DEFAULT_SAMPLE_EVERY)
+    parser.add_argument("--max-rss-slope", type=float, default=DEFAULT_MAX_RSS_SLOPE, help="bytes per conversion")
+    parser.add_argument("--max-fd-slope", type=float, default=DEFAULT_MAX_FD_SLOPE, help="descriptors per conversion")
+    parser.add_argument("--max-gc-slope", type=float, default=DEFAULT_MAX_GC_SLOPE, help="objects per conversion")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    logging.disable(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        result = run_soak(args.iterations, args.warmup, args.sample_every, Path(corpus_dir))
+
+    print(f"{'iteration':>10} {'rss bytes':>14} {'open fds':>9} {'gc objects':>11}")
+    for sample in result.samples:
+        print(
+            f"{sample.iteration:>10} {sample.rss_bytes:>14,} "
+            f"{'-' if sample.open_fds is None else sample.open_fds:>9} {sample.gc_objects:>11,}"
+        )
+    for name, slope in result.slopes().items():
+        print(f"slope {name}: {slope:.3f} per conversion")
+    problems = check_soak(
+        result,
+        max_rss_slope=args.max_rss_slope,
+        max_fd_slope=args.max_fd_slope,
+        max_gc_slope=args.max_gc_slope,
+    )
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
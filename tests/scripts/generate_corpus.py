@@ -0,0 +1,589 @@
+"""Generate synthetic XLSX workbooks for scale and performance testing.
+
+Parts are written directly as XML into a streamed zip (no openpyxl model), so
+workbooks with millions of cells are produced in seconds and with flat memory.
+Output is byte-for-byte deterministic for a given `CorpusSpec`.
+
+Examples:
+
+    python3 tests/scripts/generate_corpus.py out.xlsx --preset medium
+    python3 tests/scripts/generate_corpus.py out.xlsx --rows 200000 --cols 12 \\
+        --styles 64 --merged 500 --cf-rules 8 --cf-coverage 0.5 --seed 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import random
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
+
+from openpyxl.writer.theme import theme_xml
+from PIL import Image
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+DOC_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+RD_NS = "http://schemas.microsoft.com/office/spreadsheetml/2017/richdata"
+XDR_NS = "http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+
+REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+SPREADSHEETML_CT = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+
+# Fixed zip timestamps keep archives reproducible.
+_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+_WRITE_CHUNK_CHARS = 1 << 20
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """Shape of one generated workbook; every sheet uses the same shape."""
+
+    rows: int = 1000
+    cols: int = 10
+    sheets: int = 1
+    # Distinct cell formats (font/fill/border combinations) spread over cells.
+    styles: int = 16
+    merged: int = 0
+    cf_rules: int = 0
+    # Fraction of rows each conditional formatting range spans.
+    cf_coverage: float = 1.0
+    hyperlinks: int = 0
+    drawing_images: int = 0
+    incell_images: int = 0
+    # Distinct pictures behind the in-cell image cells.
+    incell_image_variants: int = 4
+    # Fraction of cells holding a shared string instead of a number.
+    string_ratio: float = 0.3
+    # Distinct shared strings.
+    shared_strings: int = 1000
+    seed: int = 0
+
+    @property
+    def cells(self) -> int:
+        return self.rows * self.cols * self.sheets
+
+
+CORPUS_PRESETS: dict[str, CorpusSpec] = {
+    "tiny": CorpusSpec(rows=50, cols=5, styles=4, merged=2, cf_rules=1, hyperlinks=2),
+    "small": CorpusSpec(
+        rows=1000,
+        cols=10,
+        merged=20,
+        cf_rules=2,
+        cf_coverage=0.5,
+        hyperlinks=20,
+        drawing_images=2,
+        incell_images=10,
+    ),
+    "medium": CorpusSpec(
+        rows=20000,
+        cols=20,
+        styles=64,
+        merged=200,
+        cf_rules=4,
+        cf_coverage=0.5,
+        hyperlinks=200,
+        drawing_images=4,
+        incell_images=100,
+        shared_strings=10000,
+    ),
+    "wide": CorpusSpec(rows=2000, cols=200, styles=64, merged=100, cf_rules=2),
+    "large": CorpusSpec(
+        rows=200000,
+        cols=10,
+        styles=128,
+        merged=1000,
+        cf_rules=8,
+        cf_coverage=0.25,
+        hyperlinks=1000,
+        drawing_images=8,
+        incell_images=500,
+        shared_strings=100000,
+    ),
+}
+
+
+def column_letter(index: int) -> str:
+    """Return the column letters of 1-based column `index`."""
+    letters = ""
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _sheet_name(index: int) -> str:
+    return f"Sheet{index + 1}"
+
+
+def _png_bytes(rng: random.Random, width: int, height: int) -> bytes:
+    color = (rng.randrange(256), rng.randrange(256), rng.randrange(256), 255)
+    buffer = io.BytesIO()
+    Image.new("RGBA", (width, height), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _random_color(rng: random.Random) -> str:
+    return f"FF{rng.randrange(1 << 24):06X}"
+
+
+def _merged_ranges(rng: random.Random, spec: CorpusSpec) -> list[tuple[int, int, int, int]]:
+    """Return non-overlapping `(row, col, height, width)` ranges on a 3x3 tile grid.
+
+    Columns A:C are left unmerged, like the numeric key columns of real sheets.
+    """
+    tiles_per_row = max(0, spec.cols - 3) // 3
+    tile_rows = spec.rows // 3
+    tile_count = tiles_per_row * tile_rows
+    ranges = []
+    for tile in sorted(rng.sample(range(tile_count), min(spec.merged, tile_count))):
+        height, width = rng.choice(((1, 2), (2, 1), (2, 2), (3, 3), (1, 3)))
+        ranges.append((1 + 3 * (tile // tiles_per_row), 4 + 3 * (tile % tiles_per_row), height, width))
+    return ranges
+
+
+def _sample_cells(
+    rng: random.Random, spec: CorpusSpec, count: int, first_col: int = 1
+) -> list[tuple[int, int]]:
+    cols = max(0, spec.cols - first_col + 1)
+    cell_count = spec.rows * cols
+    return [
+        (1 + index // cols, first_col + index % cols)
+        for index in sorted(rng.sample(range(cell_count), min(count, cell_count)))
+    ]
+
+
+def _styles_xml(rng: random.Random, spec: CorpusSpec) -> str:
+    fonts = ['<font><sz val="11"/><name val="Calibri"/></font>']
+    fills = ['<fill><patternFill patternType="none"/></fill>', '<fill><patternFill patternType="gray125"/></fill>']
+    borders = ["<border><left/><right/><top/><bottom/><diagonal/></border>"]
+    xfs = ['<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>']
+    for index in range(spec.styles):
+        fonts.append(
+            f'<font>{"<b/>" if index % 3 == 0 else ""}{"<i/>" if index % 5 == 0 else ""}'
+            f'<sz val="{rng.choice((9, 10, 11, 12, 14))}"/><color rgb="{_random_color(rng)}"/>'
+            '<name val="Calibri"/></font>'
+        )
+        fills.append(
+            f'<fill><patternFill patternType="solid"><fgColor rgb="{_random_color(rng)}"/>'
+            '<bgColor indexed="64"/></patternFill></fill>'
+        )
+        border_style = rng.choice(("thin", "medium", "dashed"))
+        borders.append(
+            f'<border><left style="{border_style}"><color rgb="FF000000"/></left>'
+            f'<right style="{border_style}"><color rgb="FF000000"/></right>'
+            "<top/><bottom/><diagonal/></border>"
+        )
+        xfs.append(
+            f'<xf numFmtId="{rng.choice((0, 2, 4, 10))}" fontId="{index + 1}" '
+            f'fillId="{index + 2}" borderId="{index + 1}" xfId="0" applyNumberFormat="1" '
+            'applyFont="1" applyFill="1" applyBorder="1"/>'
+        )
+    dxfs = [
+        f'<dxf><font><b/><color rgb="{_random_color(rng)}"/></font>'
+        f'<fill><patternFill><bgColor rgb="{_random_color(rng)}"/></patternFill></fill></dxf>'
+        for _ in range(spec.cf_rules)
+    ]
+    return (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<styleSheet xmlns="{MAIN_NS}">'
+        f'<fonts count="{len(fonts)}">{"".join(fonts)}</fonts>'
+        f'<fills count="{len(fills)}">{"".join(fills)}</fills>'
+        f'<borders count="{len(borders)}">{"".join(borders)}</borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        f'<cellXfs count="{len(xfs)}">{"".join(xfs)}</cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        f'<dxfs count="{len(dxfs)}">{"".join(dxfs)}</dxfs>'
+        "</styleSheet>"
+    )
+
+
+def _shared_strings_xml(rng: random.Random, spec: CorpusSpec, references: int) -> Iterator[str]:
+    yield (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<sst xmlns="{MAIN_NS}" count="{references}" uniqueCount="{spec.shared_strings}">'
+    )
+    words = ("alpha", "beta", "gamma", "delta", "total", "north", "south", "Q1", "Q2", "<&>")
+    for index in range(spec.shared_strings):
+        text = f"{rng.choice(words)} {index} {rng.choice(words)}"
+        yield f"<si><t>{escape(text)}</t></si>"
+    yield "</sst>"
+
+
+class _SheetParts:
+    """Worksheet XML and its related parts for one sheet."""
+
+    def __init__(self, rng: random.Random, spec: CorpusSpec, sheet_index: int, string_references: list[int]):
+        self.rng = rng
+        self.spec = spec
+        self.sheet_index = sheet_index
+        self.string_references = string_references
+        self.merged = _merged_ranges(rng, spec)
+        self.hyperlink_cells = _sample_cells(rng, spec, spec.hyperlinks)
+        # Cells hidden by a merged range are never rendered; keep images off them.
+        hidden_cells = {
+            (row + row_offset, col + col_offset)
+            for row, col, height, width in self.merged
+            for row_offset in range(height)
+            for col_offset in range(width)
+            if row_offset or col_offset
+        }
+        incell_cells = [
+            cell
+            for cell in _sample_cells(rng, spec, spec.incell_images + len(hidden_cells), first_col=3)
+            if cell not in hidden_cells
+        ]
+        self.incell_cells = {
+            cell: 1 + position % max(1, spec.incell_image_variants)
+            for position, cell in enumerate(rng.sample(incell_cells, min(spec.incell_images, len(incell_cells))))
+        }
+        self.external_links = [cell for position, cell in enumerate(self.hyperlink_cells) if position % 2]
+
+    def iter_xml(self, drawing_rel_id: str | None) -> Iterator[str]:
+        spec = self.spec
+        rng = self.rng
+        columns = [column_letter(col) for col in range(1, spec.cols + 1)]
+        last_ref = f"{columns[-1]}{spec.rows}"
+        yield (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<worksheet xmlns="{MAIN_NS}" xmlns:r="{DOC_REL_NS}">'
+            f'<dimension ref="A1:{last_ref}"/>'
+            '<sheetFormatPr defaultRowHeight="15"/><cols>'
+        )
+        yield "".join(
+            f'<col min="{col}" max="{col}" width="{rng.choice((8.43, 10, 12.5, 16, 24))}" customWidth="1"/>'
+            for col in range(1, spec.cols + 1)
+        )
+        yield "</cols><sheetData>"
+        # `int(random() * n)` instead of `randrange(n)`: same determinism, far
+        # fewer calls per cell.
+        random_value = rng.random
+        styles = spec.styles
+        string_ratio = spec.string_ratio
+        shared_strings = spec.shared_strings
+        incell_cells = self.incell_cells
+        string_references = 0
+        chunk: list[str] = []
+        for row in range(1, spec.rows + 1):
+            chunk.append(f'<row r="{row}">')
+            for col, letters in enumerate(columns, start=1):
+                style = f' s="{int(random_value() * styles) + 1}"' if styles else ""
+                vm_id = incell_cells.get((row, col)) if incell_cells else None
+                if vm_id is not None:
+                    chunk.append(f'<c r="{letters}{row}"{style} t="e" vm="{vm_id}"><v>#VALUE!</v></c>')
+                # Columns A and B stay numeric for the conditional formatting formulas.
+                elif col > 2 and shared_strings and random_value() < string_ratio:
+                    string_references += 1
+                    chunk.append(
+                        f'<c r="{letters}{row}"{style} t="s"><v>{int(random_value() * shared_strings)}</v></c>'
+                    )
+                else:
+                    chunk.append(f'<c r="{letters}{row}"{style}><v>{int(random_value() * 100000) / 100}</v></c>')
+            chunk.append("</row>")
+            if len(chunk) > 4096:
+                yield "".join(chunk)
+                chunk.clear()
+        yield "".join(chunk)
+        self.string_references[0] += string_references
+        yield "</sheetData>"
+        if self.merged:
+            yield f'<mergeCells count="{len(self.merged)}">'
+            yield "".join(
+                f'<mergeCell ref="{column_letter(col)}{row}:{column_letter(col + width - 1)}{row + height - 1}"/>'
+                for row, col, height, width in self.merged
+            )
+            yield "</mergeCells>"
+        yield from self._iter_cf_xml(columns)
+        if self.hyperlink_cells:
+            yield "<hyperlinks>"
+            external_index = 0
+            for position, (row, col) in enumerate(self.hyperlink_cells):
+                ref = f"{column_letter(col)}{row}"
+                if position % 2:
+                    external_index += 1
+                    yield f'<hyperlink ref="{ref}" r:id="rIdLink{external_index}"/>'
+                else:
+                    target_sheet = _sheet_name(rng.randrange(spec.sheets))
+                    target = f"{column_letter(rng.randrange(1, spec.cols + 1))}{rng.randrange(1, spec.rows + 1)}"
+                    yield f"<hyperlink ref={quoteattr(ref)} location={quoteattr(f'{target_sheet}!{target}')}/>"
+            yield "</hyperlinks>"
+        yield '<pageMargins left="0.7" right="0.7" top="0.75" bottom="0.75" header="0.3" footer="0.3"/>'
+        if drawing_rel_id is not None:
+            yield f'<drawing r:id="{drawing_rel_id}"/>'
+        yield "</worksheet>"
+
+    def _iter_cf_xml(self, columns: list[str]) -> Iterator[str]:
+        spec = self.spec
+        covered_rows = max(1, int(spec.rows * spec.cf_coverage))
+        for rule_index in range(spec.cf_rules):
+            first_row = 1 + self.rng.randrange(spec.rows - covered_rows + 1)
+            last_row = first_row + covered_rows - 1
+            if rule_index % 2:
+                # Value comparisons only cover the numeric columns A and B. The
+                # operand is a cell reference: condif2css evaluates numeric
+                # constants to strings, which never compare with cell values.
+                sqref = f"A{first_row}:{columns[min(1, len(columns) - 1)]}{last_row}"
+                rule = (
+                    f'<cfRule type="cellIs" dxfId="{rule_index}" priority="{rule_index + 1}" '
+                    f'operator="greaterThan"><formula>$B{first_row}</formula></cfRule>'
+                )
+            else:
+                sqref = f"A{first_row}:{columns[-1]}{last_row}"
+                rule = (
+                    f'<cfRule type="expression" dxfId="{rule_index}" priority="{rule_index + 1}">'
+                    f"<formula>$A{first_row}&gt;$B{first_row}</formula></cfRule>"
+                )
+            yield f'<conditionalFormatting sqref="{sqref}">{rule}</conditionalFormatting>'
+
+    def rels_xml(self, drawing_target: str | None) -> str | None:
+        relationships = [
+            f'<Relationship Id="rIdLink{index}" Type="{REL_TYPE}/hyperlink" '
+            f'Target="https://example.com/{self.sheet_index}/{index}" TargetMode="External"/>'
+            for index in range(1, len(self.external_links) + 1)
+        ]
+        if drawing_target is not None:
+            relationships.append(
+                f'<Relationship Id="rIdDrawing" Type="{REL_TYPE}/drawing" Target="{drawing_target}"/>'
+            )
+        if not relationships:
+            return None
+        return _relationships_xml(relationships)
+
+
+def _relationships_xml(relationships: list[str]) -> str:
+    return (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<Relationships xmlns="{PKG_REL_NS}">{"".join(relationships)}</Relationships>'
+    )
+
+
+def _drawing_xml(rng: random.Random, spec: CorpusSpec) -> str:
+    anchors = []
+    for index in range(spec.drawing_images):
+        col = rng.randrange(spec.cols)
+        row = rng.randrange(spec.rows)
+        anchors.append(
+            f'<xdr:oneCellAnchor><xdr:from><xdr:col>{col}</xdr:col><xdr:colOff>0</xdr:colOff>'
+            f"<xdr:row>{row}</xdr:row><xdr:rowOff>0</xdr:rowOff></xdr:from>"
+            '<xdr:ext cx="952500" cy="476250"/>'
+            f'<xdr:pic><xdr:nvPicPr><xdr:cNvPr id="{index + 2}" name="Picture {index + 1}"/>'
+            '<xdr:cNvPicPr/></xdr:nvPicPr>'
+            f'<xdr:blipFill><a:blip r:embed="rId{index + 1}"/><a:stretch><a:fillRect/></a:stretch></xdr:blipFill>'
+            '<xdr:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="952500" cy="476250"/></a:xfrm>'
+            '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></xdr:spPr></xdr:pic>'
+            "<xdr:clientData/></xdr:oneCellAnchor>"
+        )
+    return (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<xdr:wsDr xmlns:xdr="{XDR_NS}" xmlns:a="{A_NS}" xmlns:r="{DOC_REL_NS}">'
+        f'{"".join(anchors)}</xdr:wsDr>'
+    )
+
+
+def _incell_parts(variants: int) -> dict[str, str]:
+    """Return rich-data parts mapping vm ids `1..variants` to `incell{n}.png`."""
+    return {
+        "xl/metadata.xml": (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<metadata xmlns="{MAIN_NS}">'
+            f'<valueMetadata count="{variants}">'
+            + "".join(f'<bk><rc t="1" v="{index}"/></bk>' for index in range(variants))
+            + "</valueMetadata></metadata>"
+        ),
+        "xl/richData/rdrichvaluestructure.xml": (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<rd:richValueStructures xmlns:rd="{RD_NS}" count="1"><rd:s t="_localImage"/></rd:richValueStructures>'
+        ),
+        "xl/richData/rdrichvalue.xml": (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<rd:richValueData xmlns:rd="{RD_NS}" count="{variants}">'
+            + "".join(f'<rd:rv s="0"><rd:v>{index}</rd:v><rd:v>5</rd:v></rd:rv>' for index in range(variants))
+            + "</rd:richValueData>"
+        ),
+        "xl/richData/_rels/richValueRel.xml.rels": _relationships_xml(
+            [
+                f'<Relationship Id="rId{index + 1}" Type="{REL_TYPE}/image" Target="../media/incell{index + 1}.png"/>'
+                for index in range(variants)
+            ]
+        ),
+    }
+
+
+def _content_types_xml(spec: CorpusSpec, drawings: list[int], incell: bool) -> str:
+    overrides = {
+        "/xl/workbook.xml": f"{SPREADSHEETML_CT}.sheet.main+xml",
+        "/xl/styles.xml": f"{SPREADSHEETML_CT}.styles+xml",
+        "/xl/sharedStrings.xml": f"{SPREADSHEETML_CT}.sharedStrings+xml",
+        "/xl/theme/theme1.xml": "application/vnd.openxmlformats-officedocument.theme+xml",
+    }
+    for sheet_index in range(spec.sheets):
+        overrides[f"/xl/worksheets/sheet{sheet_index + 1}.xml"] = f"{SPREADSHEETML_CT}.worksheet+xml"
+    for sheet_index in drawings:
+        overrides[f"/xl/drawings/drawing{sheet_index + 1}.xml"] = (
+            "application/vnd.openxmlformats-officedocument.drawing+xml"
+        )
+    if incell:
+        overrides["/xl/metadata.xml"] = f"{SPREADSHEETML_CT}.sheetMetadata+xml"
+        overrides["/xl/richData/rdrichvalue.xml"] = "application/vnd.ms-excel.rdrichvalue+xml"
+        overrides["/xl/richData/rdrichvaluestructure.xml"] = "application/vnd.ms-excel.rdrichvaluestructure+xml"
+    return (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<Types xmlns="{CONTENT_TYPES_NS}">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Default Extension="png" ContentType="image/png"/>'
+        + "".join(
+            f'<Override PartName="{part}" ContentType="{content_type}"/>'
+            for part, content_type in overrides.items()
+        )
+        + "</Types>"
+    )
+
+
+def _workbook_xml(spec: CorpusSpec) -> str:
+    sheets = "".join(
+        f'<sheet name="{_sheet_name(index)}" sheetId="{index + 1}" r:id="rId{index + 1}"/>'
+        for index in range(spec.sheets)
+    )
+    return (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<workbook xmlns="{MAIN_NS}" xmlns:r="{DOC_REL_NS}"><bookViews><workbookView/></bookViews>'
+        f"<sheets>{sheets}</sheets></workbook>"
+    )
+
+
+def _workbook_rels_xml(spec: CorpusSpec, incell: bool) -> str:
+    relationships = [
+        f'<Relationship Id="rId{index + 1}" Type="{REL_TYPE}/worksheet" Target="worksheets/sheet{index + 1}.xml"/>'
+        for index in range(spec.sheets)
+    ]
+    relationships.append(f'<Relationship Id="rIdStyles" Type="{REL_TYPE}/styles" Target="styles.xml"/>')
+    relationships.append(f'<Relationship Id="rIdTheme" Type="{REL_TYPE}/theme" Target="theme/theme1.xml"/>')
+    relationships.append(
+        f'<Relationship Id="rIdStrings" Type="{REL_TYPE}/sharedStrings" Target="sharedStrings.xml"/>'
+    )
+    if incell:
+        relationships.append(
+            f'<Relationship Id="rIdMetadata" Type="{REL_TYPE}/sheetMetadata" Target="metadata.xml"/>'
+        )
+    return _relationships_xml(relationships)
+
+
+class _DeterministicZip:
+    def __init__(self, archive: ZipFile):
+        self.archive = archive
+
+    def _info(self, name: str) -> ZipInfo:
+        info = ZipInfo(name, date_time=_ZIP_DATE_TIME)
+        info.compress_type = ZIP_DEFLATED
+        return info
+
+    def write(self, name: str, data: str | bytes) -> None:
+        self.archive.writestr(self._info(name), data)
+
+    def write_chunks(self, name: str, chunks: Iterator[str]) -> None:
+        with self.archive.open(self._info(name), "w", force_zip64=True) as part:
+            pending: list[str] = []
+            pending_chars = 0
+            for chunk in chunks:
+                pending.append(chunk)
+                pending_chars += len(chunk)
+                if pending_chars >= _WRITE_CHUNK_CHARS:
+                    part.write("".join(pending).encode("utf-8"))
+                    pending.clear()
+                    pending_chars = 0
+            part.write("".join(pending).encode("utf-8"))
+
+
+def write_corpus_workbook(path: str | Path, spec: CorpusSpec) -> Path:
+    """Write a workbook with the shape of `spec` to `path` and return the path."""
+    path = Path(path)
+    rng = random.Random(spec.seed)
+    incell = spec.incell_images > 0 and spec.incell_image_variants > 0
+    drawings = list(range(spec.sheets)) if spec.drawing_images > 0 else []
+    string_references = [0]
+    with ZipFile(path, "w", compression=ZIP_DEFLATED) as archive:
+        output = _DeterministicZip(archive)
+        output.write("[Content_Types].xml", _content_types_xml(spec, drawings, incell))
+        output.write(
+            "_rels/.rels",
+            _relationships_xml(
+                [f'<Relationship Id="rId1" Type="{REL_TYPE}/officeDocument" Target="xl/workbook.xml"/>']
+            ),
+        )
+        output.write("xl/workbook.xml", _workbook_xml(spec))
+        output.write("xl/_rels/workbook.xml.rels", _workbook_rels_xml(spec, incell))
+        output.write("xl/styles.xml", _styles_xml(rng, spec))
+        output.write("xl/theme/theme1.xml", theme_xml)
+        for sheet_index in range(spec.sheets):
+            sheet = _SheetParts(rng, spec, sheet_index, string_references)
+            drawing_target = f"../drawings/drawing{sheet_index + 1}.xml" if drawings else None
+            output.write_chunks(
+                f"xl/worksheets/sheet{sheet_index + 1}.xml",
+                sheet.iter_xml("rIdDrawing" if drawing_target else None),
+            )
+            rels_xml = sheet.rels_xml(drawing_target)
+            if rels_xml is not None:
+                output.write(f"xl/worksheets/_rels/sheet{sheet_index + 1}.xml.rels", rels_xml)
+            if drawing_target is not None:
+                output.write(f"xl/drawings/drawing{sheet_index + 1}.xml", _drawing_xml(rng, spec))
+                output.write(
+                    f"xl/drawings/_rels/drawing{sheet_index + 1}.xml.rels",
+                    _relationships_xml(
+                        [
+                            f'<Relationship Id="rId{index + 1}" Type="{REL_TYPE}/image" '
+                            f'Target="../media/drawing{sheet_index + 1}_{index + 1}.png"/>'
+                            for index in range(spec.drawing_images)
+                        ]
+                    ),
+                )
+                for index in range(spec.drawing_images):
+                    output.write(
+                        f"xl/media/drawing{sheet_index + 1}_{index + 1}.png",
+                        _png_bytes(rng, 100, 50),
+                    )
+        output.write_chunks(
+            "xl/sharedStrings.xml",
+            _shared_strings_xml(rng, spec, string_references[0]),
+        )
+        if incell:
+            for name, xml in _incell_parts(spec.incell_image_variants).items():
+                output.write(name, xml)
+            for index in range(spec.incell_image_variants):
+                output.write(f"xl/media/incell{index + 1}.png", _png_bytes(rng, 140, 70))
+    return path
+
+
+def _parse_args(argv: list[str] | None = None) -> tuple[Path, CorpusSpec]:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", type=Path, help="path of the .xlsx file to write")
+    parser.add_argument("--preset", choices=sorted(CORPUS_PRESETS), help="start from a named shape")
+    for field in fields(CorpusSpec):
+        parser.add_argument(
+            f"--{field.name.replace('_', '-')}",
+            dest=field.name,
+            type=float if field.type == "float" else int,
+            default=None,
+        )
+    args = parser.parse_args(argv)
+    spec = CORPUS_PRESETS[args.preset] if args.preset else CorpusSpec()
+    overrides = {
+        field.name: getattr(args, field.name)
+        for field in fields(CorpusSpec)
+        if getattr(args, field.name) is not None
+    }
+    return args.output, replace(spec, **overrides)
+
+
+def main(argv: list[str] | None = None) -> None:
+    output, spec = _parse_args(argv)
+    write_corpus_workbook(output, spec)
+    print(f"Generated {spec.cells} cells in {output} ({output.stat().st_size} bytes): {asdict(spec)}")
+
+
+if __name__ == "__main__":
+    main()
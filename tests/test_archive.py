@@ -0,0 +1,152 @@
+import io
+import tempfile
+import unittest
+import zlib
+from pathlib import Path
+from unittest.mock import patch
+from zipfile import ZIP_DEFLATED, BadZipFile, ZipFile
+
+from xx2html import create_xlsx_transform
+from openpyxl.reader.excel import ExcelReader
+from openpyxl.utils.exceptions import InvalidFileException
+
+from xx2html.core.archive import (
+    IndexedArchive,
+    MappedArchive,
+    _SharedArchiveExcelReader,
+    get_member_names,
+    load_workbook_from_archive,
+    open_source_archive,
+)
+from xx2html.core.vm import get_incell_images_refs
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+class IndexedArchiveTests(unittest.TestCase):
+    def test_indexes_member_names_sizes_and_crcs(self):
+        payload = b"hello world" * 10
+        zip_buffer = io.BytesIO()
+        with ZipFile(zip_buffer, mode="w", compression=ZIP_DEFLATED) as zf:
+            zf.writestr("xl/media/image1.png", payload)
+
+        with IndexedArchive(zip_buffer) as archive:
+            member = archive.members["xl/media/image1.png"]
+            self.assertEqual(len(payload), member.file_size)
+            self.assertEqual(zlib.crc32(payload), member.crc)
+            self.assertLess(member.compress_size, member.file_size)
+            self.assertIn("xl/media/image1.png", archive.member_names)
+            self.assertNotIn("xl/media/image2.png", archive.member_names)
+            self.assertIs(archive.member_names, get_member_names(archive))
+
+    def test_get_member_names_accepts_plain_zipfiles(self):
+        zip_buffer = io.BytesIO()
+        with ZipFile(zip_buffer, mode="w") as zf:
+            zf.writestr("a.xml", b"<a/>")
+        with ZipFile(zip_buffer, mode="r") as zf:
+            self.assertEqual({"a.xml"}, get_member_names(zf))
+
+    def test_workbook_loading_leaves_shared_archive_open(self):
+        with IndexedArchive(str(FIXTURES_DIR / "incell_image.xlsx")) as archive:
+            workbook = load_workbook_from_archive(
+                archive, data_only=True, rich_text=True
+            )
+            self.assertIn("Sheet1", workbook.sheetnames)
+            refs, error = get_incell_images_refs(archive)
+
+        self.assertIsNone(error)
+        self.assertTrue(refs)
+
+    def test_shared_reader_matches_openpyxl_reader_fields(self):
+        # Catches openpyxl adding or renaming ExcelReader.__init__ fields.
+        source = str(FIXTURES_DIR / "incell_image.xlsx")
+        reader = ExcelReader(source, data_only=True, rich_text=True)
+        self.addCleanup(reader.archive.close)
+        with IndexedArchive(source) as archive:
+            shared_reader = _SharedArchiveExcelReader(
+                archive, data_only=True, rich_text=True
+            )
+            expected = vars(reader)
+            actual = vars(shared_reader)
+            self.assertEqual(sorted(expected), sorted(actual))
+            self.assertEqual(set(expected["valid_files"]), set(actual["valid_files"]))
+            for name in sorted(set(expected) - {"archive", "valid_files"}):
+                with self.subTest(field=name):
+                    self.assertEqual(expected[name], actual[name])
+
+    def test_open_source_archive_rejects_formats_openpyxl_cannot_read(self):
+        for name in ("book.xls", "book.xlsb", "book.csv"):
+            for use_mmap in (False, True):
+                with self.subTest(name=name, use_mmap=use_mmap):
+                    with self.assertRaises(InvalidFileException):
+                        open_source_archive(str(FIXTURES_DIR / name), use_mmap=use_mmap)
+
+    def test_mapped_archive_reads_through_mapping_until_closed(self):
+        source = str(FIXTURES_DIR / "incell_image.xlsx")
+        with IndexedArchive(source) as expected, open_source_archive(
+            source, use_mmap=True
+        ) as archive:
+            self.assertIsInstance(archive, MappedArchive)
+            self.assertEqual(expected.members, archive.members)
+            for name in expected.member_names:
+                self.assertEqual(expected.read(name), archive.read(name))
+            refs, error = get_incell_images_refs(archive)
+
+        self.assertIsNone(error)
+        self.assertTrue(refs)
+        self.assertTrue(archive.mapping.closed)
+
+    def test_open_source_archive_falls_back_for_unmappable_files(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            empty = Path(tmp_dir) / "empty.xlsx"
+            empty.write_bytes(b"")
+            # mmap rejects empty files; the fallback reports the bad ZIP instead.
+            with self.assertRaises(BadZipFile):
+                open_source_archive(str(empty), use_mmap=True)
+            not_zip = Path(tmp_dir) / "not_zip.xlsx"
+            not_zip.write_bytes(b"not a workbook")
+            with self.assertRaises(BadZipFile):
+                open_source_archive(str(not_zip), use_mmap=True)
+            with self.assertRaises(FileNotFoundError):
+                open_source_archive(str(Path(tmp_dir) / "missing.xlsx"), use_mmap=True)
+
+        source = str(FIXTURES_DIR / "incell_image.xlsx")
+        with open_source_archive(source) as archive:
+            self.assertNotIsInstance(archive, MappedArchive)
+
+    def test_transform_opens_source_archive_once(self):
+        transform = create_xlsx_transform(
+            sheet_html="<section>{enc_sheet_name}{sheet_name}{table_generated_html}</section>",
+            sheetname_html="<a>{enc_sheet_name}{sheet_name}</a>",
+            index_html=(
+                "<html><head>{fonts_html}{core_css_html}{user_css_html}"
+                "{generated_css_html}{generated_incell_css_html}{conditional_css_html}"
+                "</head><body>{source_filename}{sheets_names_generated_html}"
+                "{sheets_generated_html}</body></html>"
+            ),
+            fonts_html="",
+            core_css="",
+            user_css="",
+            safari_js="",
+        )
+        original_init = ZipFile.__init__
+        with tempfile.TemporaryDirectory() as tmp_dir, patch.object(
+            ZipFile, "__init__", autospec=True, side_effect=original_init
+        ) as zip_init:
+            ok, err = transform(
+                str(FIXTURES_DIR / "incell_image.xlsx"),
+                str(Path(tmp_dir) / "output.html"),
+                "en_US",
+            )
+
+        self.assertTrue(ok, err)
+        source_opens = [
+            call
+            for call in zip_init.call_args_list
+            if str(call.args[1]).endswith("incell_image.xlsx")
+        ]
+        self.assertEqual(1, len(source_opens))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import importlib.util
+import sys
+import unittest
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent / "benchmarks"
+
+
+def _load_benchmarks_module():
+    spec = importlib.util.spec_from_file_location(
+        "run_benchmarks", BENCHMARKS_DIR / "run_benchmarks.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+benchmarks = _load_benchmarks_module()
+
+BASELINE = {
+    "transform/narrow": {
+        "seconds": 1.0,
+        "cells_per_second": 10000.0,
+        "output_bytes": 1000,
+        "phases": {"sheet_render": 0.2, "write": 0.001},
+    }
+}
+
+
+def _result(seconds=1.0, output_bytes=1000, **phases):
+    return {
+        "transform/narrow": {
+            "seconds": seconds,
+            "cells_per_second": 10000 / seconds,
+            "output_bytes": output_bytes,
+            "phases": {"sheet_render": 0.2, "write": 0.001, **phases},
+        }
+    }
+
+
+class CompareResultsTests(unittest.TestCase):
+    def test_within_tolerance_passes(self):
+        self.assertEqual(
+            [], benchmarks.compare_results(_result(seconds=1.2), BASELINE)
+        )
+        self.assertEqual(
+            [], benchmarks.compare_results(_result(seconds=0.5), BASELINE)
+        )
+
+    def test_slower_latency_and_phase_fail(self):
+        regressions = benchmarks.compare_results(
+            _result(seconds=1.6, sheet_render=0.5), BASELINE
+        )
+
+        self.assertEqual(2, len(regressions))
+        self.assertIn("transform/narrow: 1.6000s", regressions[0])
+        self.assertIn("[sheet_render]", regressions[1])
+
+    def test_tiny_absolute_differences_are_noise(self):
+        self.assertEqual(
+            [], benchmarks.compare_results(_result(write=0.005), BASELINE)
+        )
+
+    def test_output_size_changes_fail_in_both_directions(self):
+        for output_bytes in (900, 1100):
+            with self.subTest(output_bytes=output_bytes):
+                regressions = benchmarks.compare_results(
+                    _result(output_bytes=output_bytes), BASELINE
+                )
+                self.assertEqual(1, len(regressions))
+                self.assertIn("output bytes", regressions[0])
+
+    def test_tolerances_are_configurable_and_unknown_cases_skipped(self):
+        self.assertEqual(
+            [],
+            benchmarks.compare_results(
+                _result(seconds=1.6, sheet_render=0.5),
+                BASELINE,
+                tolerance=1.0,
+                phase_tolerance=2.0,
+            ),
+        )
+        self.assertEqual(
+            [], benchmarks.compare_results({"other/case": {"seconds": 9.0}}, BASELINE)
+        )
+
+    def test_committed_baseline_covers_every_case_and_shape(self):
+        baseline = benchmarks.json.loads(
+            benchmarks.BASELINE_PATH.read_text(encoding="utf-8")
+        )["cases"]
+
+        for shape in benchmarks.BENCH_SHAPES:
+            self.assertIn(f"transform/{shape}", baseline)
+            self.assertIn(f"get_worksheet_contents/{shape}", baseline)
+            self.assertIn("phases", baseline[f"transform/{shape}"])
+
+    def test_committed_baseline_has_memory_slopes(self):
+        memory = benchmarks.json.loads(
+            benchmarks.BASELINE_PATH.read_text(encoding="utf-8")
+        )["memory"]
+
+        self.assertGreater(memory["bytes_per_cell"], 0)
+        self.assertGreater(memory["rss_bytes_per_cell"], 0)
+
+
+
+class MemoryBenchmarkTests(unittest.TestCase):
+    def test_fits_bytes_per_cell(self):
+        slope, intercept = benchmarks.fit_bytes_per_cell(
+            [(cells, 5_000_000 + 4000 * cells) for cells in (1000, 2000, 4000)]
+        )
+
+        self.assertAlmostEqual(4000.0, slope)
+        self.assertAlmostEqual(5_000_000.0, intercept)
+        self.assertEqual((0.0, 10.0), benchmarks.fit_bytes_per_cell([(5, 10)]))
+
+    def test_slope_above_tolerance_fails(self):
+        baseline = {"bytes_per_cell": 4000.0, "rss_bytes_per_cell": 16000.0}
+
+        self.assertEqual(
+            [],
+            benchmarks.compare_memory(
+                {"bytes_per_cell": 4500.0, "rss_bytes_per_cell": 10000.0}, baseline
+            ),
+        )
+        regressions = benchmarks.compare_memory(
+            {"bytes_per_cell": 5000.0, "rss_bytes_per_cell": 16000.0}, baseline
+        )
+        self.assertEqual(1, len(regressions))
+        self.assertIn("bytes_per_cell", regressions[0])
+
+    def test_allocation_sites_are_grouped_by_library(self):
+        self.assertEqual(
+            "BeautifulSoup nodes",
+            benchmarks._allocation_label("/venv/site-packages/bs4/element.py"),
+        )
+        self.assertEqual(
+            "CellRenderData dicts",
+            benchmarks._allocation_label("/repo/src/xx2html/core/utils.py"),
+        )
+        self.assertEqual(
+            "openpyxl patches",
+            benchmarks._allocation_label("/repo/src/xx2html/core/patches/openpyxl.py"),
+        )
+        self.assertEqual("other", benchmarks._allocation_label("/repo/app.py"))
+
+
+if __name__ == "__main__":
+    unittest.main()
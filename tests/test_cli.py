@@ -0,0 +1,382 @@
+import contextlib
+import io
+import json
+import logging
+import os
+import signal
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from time import monotonic
+from unittest.mock import patch
+
+from openpyxl import Workbook
+
+from xx2html import cli
+from xx2html.watch import create_waiter
+
+
+def _build_workbook(path, value="value"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "Data"
+    for row in range(1, 4):
+        sheet.cell(row=row, column=1, value=f"{value}-{row}")
+        sheet.cell(row=row, column=2, value=row)
+    workbook.save(path)
+    return path
+
+
+def _run(*argv):
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        exit_code = cli.main([str(arg) for arg in argv])
+    return exit_code, stdout.getvalue(), stderr.getvalue()
+
+
+class CollectSourcesTests(unittest.TestCase):
+    def test_directories_globs_and_files_keep_relative_paths(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            _build_workbook(root / "in" / "a.xlsx")
+            _build_workbook(root / "in" / "sub" / "b.xlsx")
+            (root / "in" / "~$a.xlsx").write_bytes(b"lock")
+            (root / "in" / "notes.txt").write_text("skip", encoding="utf-8")
+
+            from_dir = cli.collect_sources([str(root / "in")])
+            from_glob = cli.collect_sources([str(root / "in" / "**" / "*.xlsx")])
+            from_file = cli.collect_sources(
+                [str(root / "in" / "sub" / "b.xlsx"), str(root / "in")]
+            )
+
+        expected = [
+            (str(root / "in" / "a.xlsx"), "a.xlsx"),
+            (str(root / "in" / "sub" / "b.xlsx"), os.path.join("sub", "b.xlsx")),
+        ]
+        self.assertEqual(expected, from_dir)
+        self.assertEqual(expected, from_glob)
+        self.assertEqual(
+            [
+                (str(root / "in" / "sub" / "b.xlsx"), "b.xlsx"),
+                (str(root / "in" / "a.xlsx"), "a.xlsx"),
+            ],
+            from_file,
+        )
+
+    def test_summary_reports_throughput_and_interruptions(self):
+        job = cli.ConversionJob("a.xlsx", "a.html")
+        results = [
+            cli.ConversionResult(job, True, None, 1.0, 2_000_000, 500, 1000),
+            cli.ConversionResult(job, False, "BadZipFile()", 0.1, 10, 0, 0),
+        ]
+        self.assertEqual(
+            "xx2html: 1 converted, 3 skipped, 1 failed in 2.00 s "
+            "(0.50 files/s, 500 cells/s, 1.00 MB/s input); interrupted, 2 not started",
+            cli.format_summary(results, skipped=3, not_started=2, seconds=2.0),
+        )
+
+
+class CliTests(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+        self.source_dir = self.root / "in"
+        _build_workbook(self.source_dir / "a.xlsx", "alpha")
+        _build_workbook(self.source_dir / "sub" / "b.xlsx", "beta")
+        self.output_dir = self.root / "out"
+
+    def test_converts_directory_tree_with_loaded_templates(self):
+        template = self.root / "index.html"
+        template.write_text(
+            "<html><head>{generated_css_html}{conditional_css_html}</head><body>"
+            "<h1>custom</h1>{sheets_generated_html}{sheets_names_generated_html}"
+            "{source_filename}{fonts_html}{core_css_html}{user_css_html}"
+            "{generated_incell_css_html}</body></html>",
+            encoding="utf-8",
+        )
+
+        exit_code, stdout, _ = _run(
+            self.source_dir, "-o", self.output_dir, "--index-html", template, "--compact"
+        )
+
+        self.assertEqual(0, exit_code)
+        self.assertIn("xx2html: 2 converted, 0 skipped, 0 failed", stdout)
+        self.assertIn("cells/s", stdout)
+        html = (self.output_dir / "sub" / "b.html").read_text(encoding="utf-8")
+        self.assertIn("<h1>custom</h1>", html)
+        self.assertIn("beta-3", html)
+        self.assertTrue((self.output_dir / "a.html").exists())
+
+    def test_writes_next_to_sources_without_output_dir(self):
+        exit_code, _, _ = _run(self.source_dir / "a.xlsx")
+        self.assertEqual(0, exit_code)
+        self.assertTrue((self.source_dir / "a.html").exists())
+
+    def test_skip_mtime_skips_up_to_date_outputs(self):
+        _run(self.source_dir, "-o", self.output_dir)
+        source = self.source_dir / "a.xlsx"
+        dest_mtime = os.path.getmtime(self.output_dir / "a.html")
+        os.utime(source, (dest_mtime + 10, dest_mtime + 10))
+
+        exit_code, stdout, _ = _run(
+            self.source_dir, "-o", self.output_dir, "--skip", "mtime"
+        )
+
+        self.assertEqual(0, exit_code)
+        self.assertIn("1 converted, 1 skipped", stdout)
+
+    def test_skip_hash_tracks_content_and_settings(self):
+        exit_code, stdout, _ = _run(
+            self.source_dir, "-o", self.output_dir, "--skip", "hash"
+        )
+        self.assertEqual(0, exit_code)
+        manifest = json.loads(
+            (self.output_dir / cli.MANIFEST_NAME).read_text(encoding="utf-8")
+        )
+        self.assertEqual(["a.html", os.path.join("sub", "b.html")], sorted(manifest))
+
+        _, stdout, _ = _run(self.source_dir, "-o", self.output_dir, "--skip", "hash")
+        self.assertIn("0 converted, 2 skipped", stdout)
+
+        # Memory-mapping sources does not change the output.
+        _, stdout, _ = _run(
+            self.source_dir, "-o", self.output_dir, "--skip", "hash", "--mmap"
+        )
+        self.assertIn("0 converted, 2 skipped", stdout)
+
+        _build_workbook(self.source_dir / "a.xlsx", "changed")
+        _, stdout, _ = _run(self.source_dir, "-o", self.output_dir, "--skip", "hash")
+        self.assertIn("1 converted, 1 skipped", stdout)
+
+        _, stdout, _ = _run(
+            self.source_dir, "-o", self.output_dir, "--skip", "hash", "--max-rows", "1"
+        )
+        self.assertIn("2 converted, 0 skipped", stdout)
+
+    def test_config_file_is_created_and_overridden_by_flags(self):
+        config_path = self.root / "conf" / "xx2html.json"
+        exit_code, _, _ = _run(
+            self.source_dir / "a.xlsx", "-o", self.output_dir, "--config", config_path
+        )
+        self.assertEqual(0, exit_code)
+        self.assertEqual(
+            cli.DEFAULT_CONFIG, json.loads(config_path.read_text(encoding="utf-8"))
+        )
+
+        config_path.write_text(json.dumps({"skip": "mtime"}), encoding="utf-8")
+        _, stdout, _ = _run(
+            self.source_dir / "a.xlsx", "-o", self.output_dir, "--config", config_path
+        )
+        self.assertIn("1 converted, 0 skipped", stdout)  # config is newer than output
+
+        _, stdout, _ = _run(
+            self.source_dir / "a.xlsx", "-o", self.output_dir, "--config", config_path
+        )
+        self.assertIn("0 converted, 1 skipped", stdout)
+
+        _, stdout, _ = _run(
+            self.source_dir / "a.xlsx",
+            "-o",
+            self.output_dir,
+            "--config",
+            config_path,
+            "--skip",
+            "none",
+        )
+        self.assertIn("1 converted, 0 skipped", stdout)
+
+    def test_source_state_reuses_digest_while_stat_is_unchanged(self):
+        source = self.source_dir / "a.xlsx"
+        state = cli.get_source_state(str(source))
+        self.assertTrue(state["source_digest"].startswith("parts:"))
+
+        # Rewritten with different parts but the same size and mtime.
+        stat = os.stat(source)
+        source.write_bytes(b"x" * stat.st_size)
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(state, cli.get_source_state(str(source), state))
+
+        fresh = cli.get_source_state(str(source))
+        self.assertTrue(fresh["source_digest"].startswith("sha256:"))
+
+    def test_sync_reconverts_changes_and_removes_deleted_sources(self):
+        (self.source_dir / "broken.xlsx").write_bytes(b"not a zip")
+        exit_code, stdout, _ = _run(self.source_dir, "-o", self.output_dir, "--sync")
+        self.assertEqual(cli.EXIT_FAILED, exit_code)
+        self.assertIn("2 converted, 0 skipped, 1 failed", stdout)
+        manifest_path = self.output_dir / cli.MANIFEST_NAME
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        self.assertFalse(manifest["broken.html"]["ok"])
+        self.assertEqual(str(self.source_dir / "a.xlsx"), manifest["a.html"]["source"])
+
+        os.unlink(self.source_dir / "sub" / "b.xlsx")
+        os.unlink(self.source_dir / "broken.xlsx")
+        (self.output_dir / "sub" / "b.html.gz").write_bytes(b"stale")
+        assets_dir = self.output_dir / "sub" / "b_files"
+        assets_dir.mkdir()
+        (assets_dir / "sheet_0.0123456789ab.html").write_bytes(b"stale")
+        (assets_dir / "notes.txt").write_bytes(b"user file")
+        (self.output_dir / "broken_files").mkdir()
+        (self.output_dir / "broken_files" / "styles.0123456789ab.css").write_bytes(b"")
+        (self.output_dir / "a_files").mkdir()
+        (self.output_dir / "a_files" / "styles.0123456789ab.css").write_bytes(b"")
+        _build_workbook(self.source_dir / "c.xlsx", "gamma")
+
+        exit_code, stdout, _ = _run(self.source_dir, "-o", self.output_dir, "--sync")
+        self.assertEqual(0, exit_code)
+        self.assertIn("1 converted, 1 skipped, 0 failed, 2 removed", stdout)
+        self.assertFalse((self.output_dir / "sub" / "b.html").exists())
+        self.assertFalse((self.output_dir / "sub" / "b.html.gz").exists())
+        # Only generated assets are removed; user files keep the directory alive.
+        self.assertEqual(["notes.txt"], os.listdir(assets_dir))
+        self.assertFalse((self.output_dir / "broken_files").exists())
+        self.assertTrue((self.output_dir / "a_files").exists())
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        self.assertEqual(["a.html", "c.html"], sorted(manifest))
+
+    def test_watch_resyncs_on_change_until_signalled(self):
+        (self.source_dir / "broken.xlsx").write_bytes(b"not a zip")
+        source_dir = self.source_dir
+        waits = []
+
+        class FakeWaiter:
+            closed = False
+
+            def wait(self, should_stop):
+                waits.append(should_stop())
+                if len(waits) == 1:
+                    _build_workbook(source_dir / "a.xlsx", "changed")
+                    return True
+                os.kill(os.getpid(), signal.SIGINT)
+                return not should_stop()
+
+            def close(self):
+                FakeWaiter.closed = True
+
+        with patch("xx2html.cli.create_waiter", return_value=FakeWaiter()) as factory:
+            exit_code, stdout, _ = _run(self.source_dir, "-o", self.output_dir, "--watch")
+
+        self.assertEqual(128 + signal.SIGINT, exit_code)
+        self.assertEqual([False, False], waits)
+        self.assertTrue(FakeWaiter.closed)
+        self.assertEqual(
+            [str(self.source_dir.resolve())],
+            [os.path.realpath(path) for path in factory.call_args.args[0]],
+        )
+        lines = stdout.splitlines()
+        self.assertIn("2 converted, 0 skipped, 1 failed", lines[0])
+        # The unchanged broken workbook is not retried.
+        self.assertIn("1 converted, 2 skipped, 0 failed", lines[1])
+        self.assertIn(
+            "changed-1", (self.output_dir / "a.html").read_text(encoding="utf-8")
+        )
+
+    def test_watch_keeps_in_place_output_trees_watched(self):
+        class StoppedWaiter:
+            def wait(self, should_stop):
+                return False
+
+            def close(self):
+                pass
+
+        for output, expected in (
+            (self.root / "out", [str(self.root / "out")]),
+            (self.source_dir, []),
+            (self.root, []),
+        ):
+            with self.subTest(output=output.name), patch(
+                "xx2html.cli.create_waiter", return_value=StoppedWaiter()
+            ) as factory:
+                exit_code, _, _ = _run(self.source_dir, "-o", output, "--watch")
+                self.assertEqual(0, exit_code)
+                self.assertEqual(expected, factory.call_args.kwargs["exclude"])
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+    def test_in_place_watch_reports_source_changes(self):
+        watch_dirs = cli._get_watch_dirs([str(self.source_dir)])
+        waiter = create_waiter(
+            watch_dirs,
+            lambda: None,
+            exclude=cli._get_watch_exclude(str(self.source_dir), watch_dirs),
+        )
+        self.addCleanup(waiter.close)
+        waiter.settle = 0.05
+        _build_workbook(self.source_dir / "sub" / "b.xlsx", "changed")
+        deadline = monotonic() + 5
+        self.assertTrue(waiter.wait(lambda: monotonic() > deadline))
+
+    def test_hash_modes_need_an_output_directory(self):
+        exit_code, _, stderr = _run(self.source_dir, "--sync")
+        self.assertEqual(cli.EXIT_FAILED, exit_code)
+        self.assertIn("need -o/--output", stderr)
+
+    def test_source_removed_after_conversion_still_succeeds(self):
+        source = self.source_dir / "a.xlsx"
+        size = source.stat().st_size
+
+        def transform_then_delete(source_path, dest, locale, report):
+            os.unlink(source_path)
+            return True, None
+
+        result = cli._convert(
+            transform_then_delete,
+            cli.ConversionJob(str(source), str(self.output_dir / "a.html")),
+            "en_US",
+        )
+        self.assertTrue(result.ok)
+        self.assertEqual(size, result.input_bytes)
+
+        missing = cli._convert(
+            lambda *args, **kwargs: (False, "FileNotFoundError"),
+            cli.ConversionJob(str(source), str(self.output_dir / "a.html")),
+            "en_US",
+        )
+        self.assertEqual((False, 0), (missing.ok, missing.input_bytes))
+
+    def test_failures_set_exit_code(self):
+        (self.source_dir / "broken.xlsx").write_bytes(b"not a zip")
+        exit_code, stdout, stderr = _run(self.source_dir, "-o", self.output_dir)
+        self.assertEqual(cli.EXIT_FAILED, exit_code)
+        self.assertIn("2 converted, 0 skipped, 1 failed", stdout)
+        self.assertIn("FAILED", stderr)
+        self.assertIn("broken.xlsx", stderr)
+
+    def test_signal_stops_after_running_conversion(self):
+        convert = cli._convert
+
+        def convert_then_terminate(*args):
+            result = convert(*args)
+            os.kill(os.getpid(), signal.SIGTERM)
+            return result
+
+        with patch("xx2html.cli._convert", side_effect=convert_then_terminate):
+            exit_code, stdout, stderr = _run(self.source_dir, "-o", self.output_dir)
+
+        self.assertEqual(128 + signal.SIGTERM, exit_code)
+        self.assertIn("1 converted", stdout)
+        self.assertIn("interrupted, 1 not started", stdout)
+        self.assertIn("stopping", stderr)
+        self.assertIs(signal.getsignal(signal.SIGTERM), signal.SIG_DFL)
+
+    def test_process_pool_converts_all_sources(self):
+        exit_code, stdout, _ = _run(self.source_dir, "-o", self.output_dir, "-j", "2")
+        self.assertEqual(0, exit_code)
+        self.assertIn("2 converted", stdout)
+        self.assertIn(
+            "alpha-1", (self.output_dir / "a.html").read_text(encoding="utf-8")
+        )
+
+    def test_rejects_invalid_job_count(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                cli.main([str(self.source_dir), "-j", "0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
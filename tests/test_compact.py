@@ -0,0 +1,298 @@
+import json
+import logging
+import re
+import tempfile
+import unittest
+from pathlib import Path
+
+from xx2html import create_xlsx_transform
+from xx2html.core import get_class_map_path
+from xx2html.core.compact import (
+    SIZES_ROW_CLASS,
+    ClassNameMangler,
+    minify_css,
+    render_compact_attrs,
+    render_compact_inline_styles,
+)
+from xx2html.core.utils import cova_render_table
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+SHEET_HTML = (
+    '<section id="{enc_sheet_name}" data-sheet="{sheet_name}">'
+    "{table_generated_html}"
+    "</section>"
+)
+SHEETNAME_HTML = '<a class="sheet-nav" href="#{enc_sheet_name}">{sheet_name}</a>'
+INDEX_HTML = (
+    "<!doctype html><html><head>"
+    "{fonts_html}{core_css_html}{user_css_html}{generated_css_html}"
+    "{generated_incell_css_html}{conditional_css_html}"
+    "</head><body>{sheets_names_generated_html}{sheets_generated_html}"
+    "<!-- {source_filename} --></body></html>"
+)
+
+
+def _worksheet_contents():
+    return {
+        "rows": [
+            [
+                {
+                    "attrs": {"id": "Sheet1!A1", "colspan": 2},
+                    "column": 1,
+                    "row": 1,
+                    "value": "X",
+                    "formatted_value": "X",
+                    "style": {},
+                    "classes": {"beta", "alpha"},
+                    "vm_id": None,
+                },
+                {
+                    "attrs": {"id": "Sheet1!C1"},
+                    "column": 3,
+                    "row": 1,
+                    "value": None,
+                    "formatted_value": "",
+                    "style": {"position": "relative"},
+                    "classes": {"incell-image"},
+                    "vm_id": "1",
+                },
+            ]
+        ],
+        "cols": [
+            {
+                "attrs": {},
+                "index": index,
+                "width": 65,
+                "style": {"visibility": "visible"},
+                "hidden": False,
+                "collapsed": False,
+            }
+            for index in "ABC"
+        ],
+        "images": {},
+        "vm_ids": {"1"},
+        "vm_ids_dimension_references": {},
+        "vm_cell_vm_ids": {},
+        "table_width": 195,
+    }
+
+
+def _build_transform(**kwargs):
+    return create_xlsx_transform(
+        sheet_html=SHEET_HTML,
+        sheetname_html=SHEETNAME_HTML,
+        index_html=INDEX_HTML,
+        fonts_html="",
+        core_css="",
+        user_css="",
+        safari_js="",
+        **kwargs,
+    )
+
+
+def _convert(source, **kwargs):
+    transform = _build_transform(**kwargs)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dest = Path(tmp_dir) / "out.html"
+        ok, err = transform(str(source), str(dest), "en_US")
+        if not ok:
+            raise AssertionError(err)
+        return dest.read_bytes()
+
+
+class MinifyCssTests(unittest.TestCase):
+    def test_removes_comments_whitespace_and_trailing_semicolons(self):
+        css = (
+            "/*conditional formatting*/\n"
+            ".a {\n\tcolor: red;\n\tfont-family: \"A  B\";\n}\n"
+            ".b > td , .c img { content:url(\"data:x;base64,AA==\") ; }\n"
+            "@media (max-width: 10px) { .d { color: blue; } }"
+        )
+
+        self.assertEqual(
+            '.a{color:red;font-family:"A  B"}'
+            '.b>td,.c img{content:url("data:x;base64,AA==")}'
+            "@media (max-width:10px){.d{color:blue}}",
+            minify_css(css),
+        )
+
+    def test_prunes_rules_that_no_used_class_can_match(self):
+        css = ".a {x: 1;} .b {x: 2;} .a.b img {x: 3;} .b, .a {x: 4;} td {x: 5;}"
+
+        self.assertEqual(
+            ".a{x:1}.b,.a{x:4}td{x:5}", minify_css(css, used_classes={"a"})
+        )
+        self.assertEqual("td{x:5}", minify_css(css, used_classes=set()))
+
+    def test_keeps_at_rules_and_attribute_selectors(self):
+        css = '@font-face {font-family: "X";} [data-x=".a"] {x: 1;} .a:not(.b) {x: 2;}'
+
+        self.assertEqual(
+            '@font-face{font-family:"X"}[data-x=".a"]{x:1}.a:not(.b){x:2}',
+            minify_css(css, used_classes=set()),
+        )
+
+
+class CompactRenderTests(unittest.TestCase):
+    def test_compact_attrs_skip_empty_and_default_values(self):
+        self.assertEqual("", render_compact_inline_styles({"visibility": "visible"}))
+        self.assertEqual(
+            "overflow:hidden;visibility:collapse",
+            render_compact_inline_styles(
+                {"visibility": "collapse", "overflow": "hidden", "color": None}
+            ),
+        )
+        self.assertEqual(
+            ' id="A1" class="a b"',
+            render_compact_attrs({"id": "A1", "title": ""}, {}, {"b", "a"}),
+        )
+
+    def test_compact_table_drops_redundant_bytes(self):
+        contents = _worksheet_contents()
+        default_html = cova_render_table(contents)
+        compact_html = cova_render_table(contents, compact=True)
+
+        self.assertEqual(
+            '<table style="border:0;border-collapse:collapse;table-layout:fixed;width:195px">'
+            '<colgroup><col data-value="A"><col data-value="B"><col data-value="C">'
+            f'</colgroup><tbody><tr class="{SIZES_ROW_CLASS}">'
+            + '<td style="width:65px"></td>' * 3
+            + '</tr><tr><td colspan="2" id="Sheet1!A1" class="alpha beta">X</td>'
+            '<td id="Sheet1!C1" style="position:relative" class="incell-image">'
+            '<img alt="" loading="lazy" decoding="async"/></td></tr></tbody></table>',
+            compact_html,
+        )
+        self.assertNotIn('style=""', compact_html)
+        self.assertNotIn("\n", compact_html)
+        self.assertLess(len(compact_html), len(default_html))
+
+
+class CompactTransformTests(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def test_compact_output_is_smaller_and_keeps_cells_and_used_rules(self):
+        for fixture in ("merged_cells_cf.xlsx", "incell_image.xlsx"):
+            with self.subTest(fixture=fixture):
+                default_bytes = _convert(FIXTURES_DIR / fixture, apply_cf=True)
+                compact_bytes = _convert(
+                    FIXTURES_DIR / fixture, apply_cf=True, compact=True
+                )
+                # Before/after sizes are part of the failure message on regressions.
+                self.assertLess(
+                    len(compact_bytes),
+                    len(default_bytes),
+                    f"{fixture}: default={len(default_bytes)} compact={len(compact_bytes)}",
+                )
+                compact_html = compact_bytes.decode("utf-8")
+                self.assertNotIn('style=""', compact_html)
+                self.assertNotIn("visibility: visible", compact_html)
+                self.assertNotIn("<style></style>", compact_html)
+                self.assertIn(f".{SIZES_ROW_CLASS}>td{{padding:0}}", compact_html)
+                self.assertEqual(
+                    default_bytes.count(b"<td"), compact_bytes.count(b"<td")
+                )
+
+    def test_compact_output_saves_at_least_15_percent(self):
+        default_bytes = _convert(FIXTURES_DIR / "merged_cells_cf.xlsx")
+        compact_bytes = _convert(FIXTURES_DIR / "merged_cells_cf.xlsx", compact=True)
+
+        saved = 1 - len(compact_bytes) / len(default_bytes)
+        self.assertGreater(
+            saved,
+            0.15,
+            f"default={len(default_bytes)} compact={len(compact_bytes)} saved={saved:.1%}",
+        )
+
+
+class ClassNameManglerTests(unittest.TestCase):
+    def test_generated_names_get_short_base36_tokens_in_first_seen_order(self):
+        mangler = ClassNameMangler()
+        tokens = [mangler.mangle(f"xx2h_x{index:04x}") for index in range(40)]
+
+        self.assertEqual(
+            ["_0", "_1", "_z", "_10", "_13"], [tokens[i] for i in (0, 1, 35, 36, 39)]
+        )
+        self.assertEqual("_0", mangler.mangle("xx2h_x0000"))
+        self.assertEqual("_14", mangler.mangle("vm-richvaluerel_rid1"))
+        self.assertEqual("incell-image", mangler.mangle("incell-image"))
+        self.assertNotIn("incell-image", mangler.mapping)
+
+    def test_css_selectors_are_rewritten_outside_strings(self):
+        mangler = ClassNameMangler()
+        css = (
+            '.xx2h_cf_x0000{color:red}'
+            '.incell-image.vm-richvaluerel_rid2 img{content:url("data:a.xx2h_x0000")}'
+        )
+
+        self.assertEqual(
+            '._0{color:red}.incell-image._1 img{content:url("data:a.xx2h_x0000")}',
+            mangler.mangle_css(css),
+        )
+        self.assertEqual(
+            {"_0", "incell-image"},
+            mangler.mangle_classes(["xx2h_cf_x0000", "incell-image"]),
+        )
+
+
+class MangledTransformTests(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def test_html_and_css_use_the_same_tokens_and_the_sidecar_maps_them_back(self):
+        transform = _build_transform(
+            apply_cf=True, compact=True, mangle_classes=True, class_map=True
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dest = Path(tmp_dir) / "out.html"
+            ok, err = transform(
+                str(FIXTURES_DIR / "incell_image.xlsx"), str(dest), "en_US"
+            )
+            self.assertTrue(ok, err)
+            html = dest.read_text(encoding="utf-8")
+            mapping = json.loads(
+                Path(get_class_map_path(str(dest))).read_text(encoding="utf-8")
+            )
+
+        self.assertEqual(
+            str(Path(tmp_dir) / "out.classes.json"), get_class_map_path(str(dest))
+        )
+        self.assertNotIn("xx2h_x", html)
+        self.assertNotIn("vm-richvaluerel_rid", html)
+        self.assertTrue(mapping)
+        self.assertEqual(len(mapping), len(set(mapping.values())))
+        cell_classes = {
+            class_name
+            for class_list in re.findall(r'<td[^>]* class="([^"]*)"', html)
+            for class_name in class_list.split()
+        }
+        for original, token in mapping.items():
+            self.assertIn(f".{token}", html, original)
+        self.assertLessEqual(
+            {name for name in cell_classes if name.startswith("_")},
+            set(mapping.values()),
+        )
+        self.assertIn("incell-image", cell_classes)
+
+    def test_mangled_output_is_smaller(self):
+        plain_bytes = _convert(FIXTURES_DIR / "merged_cells_cf.xlsx")
+        mangled_bytes = _convert(
+            FIXTURES_DIR / "merged_cells_cf.xlsx", mangle_classes=True
+        )
+
+        self.assertLess(
+            len(mangled_bytes),
+            len(plain_bytes),
+            f"plain={len(plain_bytes)} mangled={len(mangled_bytes)}",
+        )
+
+    def test_class_map_requires_mangling(self):
+        with self.assertRaises(ValueError):
+            _build_transform(class_map=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,7 +5,7 @@ from unittest.mock import patch
 
 from openpyxl import Workbook
 
-import xx2html.core as core_module
+import xx2html.core.transform as core_module
 from xx2html import create_xlsx_transform
 
 FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
@@ -45,7 +45,7 @@ class ConditionalFormattingPipelineTests(unittest.TestCase):
         source_file = FIXTURES_DIR / "merged_cells_cf.xlsx"
 
         with patch(
-            "xx2html.core.process_conditional_formatting",
+            "xx2html.core.transform.process_conditional_formatting",
             wraps=core_module.process_conditional_formatting,
         ) as process_mock:
             ok, err = _run_transform(source_file, apply_cf=True)
@@ -60,7 +60,7 @@ class ConditionalFormattingPipelineTests(unittest.TestCase):
         source_file = FIXTURES_DIR / "merged_cells_cf.xlsx"
 
         with patch(
-            "xx2html.core.process_conditional_formatting",
+            "xx2html.core.transform.process_conditional_formatting",
             wraps=core_module.process_conditional_formatting,
         ) as process_mock:
             ok, err = _run_transform(source_file, apply_cf=False)
@@ -84,7 +84,7 @@ class ConditionalFormattingPipelineTests(unittest.TestCase):
         with tempfile.TemporaryDirectory() as tmp_dir:
             output_file = Path(tmp_dir) / "output.html"
             with patch(
-                "xx2html.core.process_conditional_formatting",
+                "xx2html.core.transform.process_conditional_formatting",
                 return_value={
                     "invalid": ("Data", "C1", None, 999, None),
                 },
@@ -116,8 +116,10 @@ class ConditionalFormattingPipelineTests(unittest.TestCase):
 
         with tempfile.TemporaryDirectory() as tmp_dir:
             output_file = Path(tmp_dir) / "output.html"
-            with patch("xx2html.core.load_workbook", return_value=hidden_workbook), patch(
-                "xx2html.core.get_theme_colors", return_value={}
+            with patch(
+                "xx2html.core.transform.load_workbook_from_archive", return_value=hidden_workbook
+            ), patch(
+                "xx2html.core.transform.get_theme_colors", return_value={}
             ):
                 ok, err = transform(str(source_file), str(output_file), "en_US")
             html = output_file.read_text(encoding="utf-8")
@@ -0,0 +1,143 @@
+import importlib.util
+import logging
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from zipfile import ZipFile
+
+from openpyxl import load_workbook
+
+from xx2html import TransformReport, apply_openpyxl_patches, create_xlsx_transform
+from xx2html.core.vm import get_incell_images_refs
+
+SCRIPTS_DIR = Path(__file__).resolve().parent / "scripts"
+
+
+def _load_corpus_module():
+    spec = importlib.util.spec_from_file_location(
+        "generate_corpus", SCRIPTS_DIR / "generate_corpus.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+corpus = _load_corpus_module()
+
+SPEC = corpus.CorpusSpec(
+    rows=40,
+    cols=8,
+    sheets=2,
+    styles=5,
+    merged=3,
+    cf_rules=2,
+    cf_coverage=0.5,
+    hyperlinks=4,
+    drawing_images=1,
+    incell_images=3,
+    incell_image_variants=2,
+    shared_strings=20,
+    seed=3,
+)
+
+
+class CorpusGeneratorTests(unittest.TestCase):
+    def test_output_is_deterministic_for_a_seed(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            first = corpus.write_corpus_workbook(Path(tmp_dir) / "a.xlsx", SPEC)
+            second = corpus.write_corpus_workbook(Path(tmp_dir) / "b.xlsx", SPEC)
+            other = corpus.write_corpus_workbook(
+                Path(tmp_dir) / "c.xlsx", corpus.replace(SPEC, seed=4)
+            )
+            self.assertEqual(first.read_bytes(), second.read_bytes())
+            self.assertNotEqual(first.read_bytes(), other.read_bytes())
+
+    def test_workbook_has_the_requested_shape(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = corpus.write_corpus_workbook(Path(tmp_dir) / "corpus.xlsx", SPEC)
+            # Plain openpyxl only reads `vm` cell metadata once patched.
+            apply_openpyxl_patches()
+            workbook = load_workbook(path)
+            with ZipFile(path) as archive:
+                incell_refs, incell_error = get_incell_images_refs(archive)
+
+        self.assertEqual(["Sheet1", "Sheet2"], workbook.sheetnames)
+        worksheet = workbook["Sheet1"]
+        self.assertEqual((40, 8), (worksheet.max_row, worksheet.max_column))
+        self.assertEqual(3, len(worksheet.merged_cells.ranges))
+        self.assertEqual(2, len(worksheet.conditional_formatting))
+        hyperlinks = [
+            cell.hyperlink
+            for row in worksheet.iter_rows()
+            for cell in row
+            if cell.hyperlink
+        ]
+        self.assertEqual(4, len(hyperlinks))
+        self.assertEqual(2, sum(1 for link in hyperlinks if link.location))
+        self.assertEqual(1, len(worksheet._images))
+        self.assertIsNone(incell_error)
+        self.assertEqual(
+            {"1": "xl/media/incell1.png", "2": "xl/media/incell2.png"}, incell_refs
+        )
+        self.assertEqual(
+            3,
+            sum(
+                1
+                for row in worksheet.iter_rows()
+                for cell in row
+                if getattr(cell, "_vm_id", None)
+            ),
+        )
+
+    def test_cli_applies_preset_and_overrides(self):
+        output, spec = corpus._parse_args(
+            ["out.xlsx", "--preset", "small", "--rows", "10", "--cf-coverage", "0.2"]
+        )
+
+        self.assertEqual(Path("out.xlsx"), output)
+        self.assertEqual(10, spec.rows)
+        self.assertEqual(0.2, spec.cf_coverage)
+        self.assertEqual(corpus.CORPUS_PRESETS["small"].merged, spec.merged)
+
+
+class CorpusTransformTests(unittest.TestCase):
+    def test_generated_workbook_converts(self):
+        transform = create_xlsx_transform(
+            sheet_html=(
+                '<section id="{enc_sheet_name}" data-sheet="{sheet_name}">'
+                "{table_generated_html}</section>"
+            ),
+            sheetname_html='<a href="#{enc_sheet_name}">{sheet_name}</a>',
+            index_html=(
+                "<!doctype html><html><head>"
+                "{fonts_html}{core_css_html}{user_css_html}{generated_css_html}"
+                "{generated_incell_css_html}{conditional_css_html}"
+                "</head><body>{sheets_names_generated_html}{sheets_generated_html}"
+                "<!-- {source_filename} --></body></html>"
+            ),
+            fonts_html="",
+            core_css="",
+            user_css="",
+            safari_js="",
+            apply_cf=True,
+        )
+        report = TransformReport()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = corpus.write_corpus_workbook(Path(tmp_dir) / "corpus.xlsx", SPEC)
+            # Every generated CF rule must be evaluable, not hit condif2css errors.
+            with self.assertNoLogs(level=logging.WARNING):
+                ok, err = transform(
+                    str(path), str(Path(tmp_dir) / "out.html"), "en_US", report=report
+                )
+
+        self.assertTrue(ok, err)
+        self.assertEqual(2, report.counters["sheets"])
+        self.assertGreater(report.sheet_sizes["Sheet1"]["cf_relations"], 0)
+        # One drawing image plus the in-cell images not hidden by a merged range.
+        self.assertGreater(report.sheet_sizes["Sheet1"]["images"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
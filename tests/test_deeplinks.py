@@ -0,0 +1,145 @@
+import logging
+import re
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.worksheet.hyperlink import Hyperlink
+
+from xx2html import create_xlsx_transform
+from xx2html.core.deeplinks import (
+    CELL_LINKS_JS,
+    get_hyperlink_target_ids,
+    parse_cell_location,
+)
+
+SHEET_HTML = (
+    '<section id="{enc_sheet_name}" data-sheet="{sheet_name}">'
+    "{table_generated_html}"
+    "</section>"
+)
+SHEETNAME_HTML = '<a class="sheet-nav" href="#{enc_sheet_name}">{sheet_name}</a>'
+INDEX_HTML = (
+    "<!doctype html><html><head>"
+    "{fonts_html}{core_css_html}{user_css_html}{generated_css_html}"
+    "{generated_incell_css_html}{conditional_css_html}"
+    "</head><body>{sheets_names_generated_html}{sheets_generated_html}"
+    "<!-- {source_filename} --></body></html>"
+)
+
+CELL_ID_PATTERN = r' id="([^"]+![A-Z]+[0-9]+)"'
+
+
+def _build_workbook(path):
+    workbook = Workbook()
+    summary = workbook.active
+    summary.title = "Summary"
+    details = workbook.create_sheet("Q1 details")
+    for row in range(1, 21):
+        for col in range(1, 6):
+            summary.cell(row=row, column=col, value=row * col)
+            details.cell(row=row, column=col, value=f"d{row}-{col}")
+    summary["A1"].hyperlink = Hyperlink(ref="A1", location="'Q1 details'!$C$7")
+    summary["B1"].hyperlink = Hyperlink(ref="B1", location="D4:E5")
+    summary["C1"].hyperlink = "https://example.com"
+    workbook.save(path)
+
+
+def _convert(source, dest, **kwargs):
+    transform = create_xlsx_transform(
+        sheet_html=SHEET_HTML,
+        sheetname_html=SHEETNAME_HTML,
+        index_html=INDEX_HTML,
+        fonts_html="",
+        core_css="",
+        user_css="",
+        safari_js="",
+        **kwargs,
+    )
+    ok, err = transform(str(source), str(dest), "en_US")
+    if not ok:
+        raise AssertionError(err)
+    return Path(dest).read_text(encoding="utf-8")
+
+
+class CellLocationTests(unittest.TestCase):
+    def test_parses_quoted_absolute_and_range_locations(self):
+        self.assertEqual(
+            "Q1 details!C7", parse_cell_location("'Q1 details'!$C$7", "Summary")
+        )
+        self.assertEqual("O'Neil!A1", parse_cell_location("'O''Neil'!A1", "Summary"))
+        self.assertEqual("Summary!D4", parse_cell_location("d4:E5", "Summary"))
+        self.assertEqual("Data!B2", parse_cell_location("#Data!B2", "Summary"))
+        self.assertIsNone(parse_cell_location("MyDefinedName", "Summary"))
+
+    def test_collects_internal_hyperlink_targets(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source = Path(tmp_dir) / "links.xlsx"
+            _build_workbook(source)
+            workbook = load_workbook(source)
+            self.assertEqual(
+                {"Q1 details!C7", "Summary!D4"},
+                get_hyperlink_target_ids(workbook["Summary"]),
+            )
+
+    def test_script_resolves_by_row_and_column(self):
+        self.assertIn("table[data-sheet]", CELL_LINKS_JS)
+        self.assertIn("xx2html:content", CELL_LINKS_JS)
+
+
+class SparseCellIdTests(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def test_only_required_cells_keep_ids(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source = Path(tmp_dir) / "links.xlsx"
+            _build_workbook(source)
+            full_html = _convert(source, Path(tmp_dir) / "full.html")
+            sparse_html = _convert(
+                source,
+                Path(tmp_dir) / "sparse.html",
+                sparse_cell_ids=True,
+                keep_cell_ids=["Summary!E20"],
+            )
+
+        self.assertEqual(200, len(re.findall(CELL_ID_PATTERN, full_html)))
+        self.assertEqual(
+            ["Q1 details!C7", "Summary!D4", "Summary!E20"],
+            sorted(re.findall(CELL_ID_PATTERN, sparse_html)),
+        )
+        self.assertIn('data-sheet="Q1 details"', sparse_html)
+        self.assertIn(CELL_LINKS_JS.strip()[:40], sparse_html)
+        self.assertNotIn(CELL_LINKS_JS.strip()[:40], full_html)
+        self.assertLess(len(sparse_html), len(full_html))
+
+    def test_conditional_formatting_targets_keep_ids(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source = Path(tmp_dir) / "links.xlsx"
+            _build_workbook(source)
+            with patch(
+                "xx2html.core.transform.process_conditional_formatting",
+                side_effect=lambda worksheet, fail_ok: (
+                    {"rule": (worksheet.title, "B3", None, 0, None)}
+                    if worksheet.title == "Summary"
+                    else {}
+                ),
+            ):
+                html = _convert(
+                    source,
+                    Path(tmp_dir) / "cf.html",
+                    apply_cf=True,
+                    sparse_cell_ids=True,
+                )
+
+        self.assertEqual(
+            ["Q1 details!C7", "Summary!B3", "Summary!D4"],
+            sorted(re.findall(CELL_ID_PATTERN, html)),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
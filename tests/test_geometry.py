@@ -0,0 +1,41 @@
+import unittest
+
+from xx2html.core.geometry import SheetGeometry
+
+
+class SheetGeometryTests(unittest.TestCase):
+    def setUp(self):
+        self.geometry = SheetGeometry(
+            row_heights=[19, 0, 30, 19],
+            col_widths=[65, 100, 0],
+            default_row_height=19,
+            default_col_width=65,
+        )
+
+    def test_offsets_are_prefix_sums(self):
+        self.assertEqual(0, self.geometry.row_offset(1))
+        self.assertEqual(19, self.geometry.row_offset(3))
+        self.assertEqual(49, self.geometry.row_offset(4))
+        self.assertEqual(165, self.geometry.col_offset(3))
+        self.assertEqual((68, 165), (self.geometry.height, self.geometry.width))
+        self.assertEqual((4, 3), (self.geometry.row_count, self.geometry.col_count))
+
+    def test_span_sizes_include_hidden_rows_and_columns_as_zero(self):
+        self.assertEqual(49, self.geometry.rows_height(1, 3))
+        self.assertEqual(30, self.geometry.rows_height(3))
+        self.assertEqual(100, self.geometry.cols_width(2, 2))
+
+    def test_positions_past_the_index_use_defaults(self):
+        self.assertEqual(68 + 2 * 19, self.geometry.row_offset(7))
+        self.assertEqual(19 + 3 * 19, self.geometry.rows_height(4, 4))
+        self.assertEqual(0 + 65 + 65, self.geometry.cols_width(3, 3))
+
+    def test_rejects_indexes_before_the_first_row_or_column(self):
+        with self.assertRaises(ValueError):
+            self.geometry.row_offset(0)
+        with self.assertRaises(ValueError):
+            self.geometry.cols_width(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
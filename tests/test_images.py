@@ -0,0 +1,239 @@
+import base64
+import io
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from PIL import Image
+
+from xx2html.core.images import (
+    ImageOptimizer,
+    get_image_size,
+    guess_image_mime,
+    map_images_in_order,
+    probe_image_size,
+    write_datauri,
+)
+
+
+def _encode(width: int, height: int, image_format: str, **save_kwargs) -> bytes:
+    mode = "RGB" if image_format in {"JPEG", "BMP"} else "RGBA"
+    image = Image.new(mode, (width, height), (10, 20, 30))
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **save_kwargs)
+    return buffer.getvalue()
+
+
+class _CountingStream(io.BytesIO):
+    def __init__(self, payload: bytes) -> None:
+        super().__init__(payload)
+        self.bytes_read = 0
+
+    def read(self, size: int | None = -1) -> bytes:
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+class ProbeImageSizeTests(unittest.TestCase):
+    def test_probes_supported_formats_from_headers(self):
+        cases = [
+            ("PNG", {}),
+            ("GIF", {}),
+            ("JPEG", {}),
+            ("JPEG", {"progressive": True}),
+            ("WEBP", {"lossless": False}),
+            ("WEBP", {"lossless": True}),
+        ]
+        for image_format, save_kwargs in cases:
+            with self.subTest(image_format=image_format, **save_kwargs):
+                payload = _encode(321, 123, image_format, **save_kwargs)
+                self.assertEqual((321, 123), probe_image_size(io.BytesIO(payload)))
+
+    def test_probe_reads_only_the_header(self):
+        payload = _encode(2000, 1500, "PNG")
+        stream = _CountingStream(payload)
+        self.assertEqual((2000, 1500), probe_image_size(stream))
+        self.assertLess(stream.bytes_read, 64)
+
+    def test_probe_jpeg_skips_metadata_segments(self):
+        image = Image.new("RGB", (64, 48))
+        exif = Image.Exif()
+        exif[0x010E] = "x" * 4096
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", exif=exif)
+        self.assertEqual((64, 48), probe_image_size(io.BytesIO(buffer.getvalue())))
+
+    def test_probe_returns_none_for_unknown_or_truncated_payloads(self):
+        self.assertIsNone(probe_image_size(io.BytesIO(b"not-an-image")))
+        self.assertIsNone(probe_image_size(io.BytesIO(_encode(8, 8, "PNG")[:20])))
+        self.assertIsNone(probe_image_size(io.BytesIO(_encode(8, 8, "JPEG")[:40])))
+        self.assertIsNone(probe_image_size(io.BytesIO(b"\xff\xd8\x00")))
+
+    def test_get_image_size_falls_back_to_pil(self):
+        payload = _encode(17, 9, "BMP")
+        self.assertIsNone(probe_image_size(io.BytesIO(payload)))
+        self.assertEqual((17, 9), get_image_size(io.BytesIO(payload)))
+
+
+class WriteDataUriTests(unittest.TestCase):
+    def test_streams_base64_identically_to_one_shot_encoding(self):
+        payload = bytes(range(256)) * 7 + b"xy"
+        for chunk_size in (3, 6, 300, 3 * 1024):
+            with self.subTest(chunk_size=chunk_size):
+                parts: list[str] = []
+                write_datauri(
+                    parts.append, io.BytesIO(payload), "a.png", chunk_size=chunk_size
+                )
+                self.assertEqual(
+                    "data:image/png;base64," + base64.b64encode(payload).decode(),
+                    "".join(parts),
+                )
+
+    def test_handles_short_reads(self):
+        class ShortReads(io.BytesIO):
+            def read(self, size: int | None = -1) -> bytes:
+                return super().read(min(size, 4) if size and size > 0 else size)
+
+        payload = b"0123456789abcdef"
+        parts: list[str] = []
+        write_datauri(parts.append, ShortReads(payload), "a.gif", chunk_size=9)
+        self.assertEqual(
+            "data:image/gif;base64," + base64.b64encode(payload).decode(),
+            "".join(parts),
+        )
+
+    def test_rejects_chunk_sizes_that_are_not_multiples_of_three(self):
+        with self.assertRaises(ValueError):
+            write_datauri(lambda _part: None, io.BytesIO(b""), "a.png", chunk_size=4)
+
+    def test_unknown_extension_uses_octet_stream(self):
+        self.assertEqual("application/octet-stream", guess_image_mime("image.unknown"))
+
+
+class ImageOptimizerTests(unittest.TestCase):
+    def _size_of(self, payload: bytes) -> tuple[int, int]:
+        with Image.open(io.BytesIO(payload)) as image:
+            return image.size
+
+    def test_downsizes_to_scaled_box_preserving_aspect_ratio(self):
+        optimizer = ImageOptimizer(scale=2.0)
+        payload, name = optimizer.optimize(_encode(4000, 3000, "PNG"), "a.png", (120, 80))
+        self.assertEqual("a.png", name)
+        self.assertEqual((213, 160), self._size_of(payload))
+
+    def test_never_upscales_and_returns_original_payload(self):
+        original = _encode(50, 40, "PNG")
+        optimizer = ImageOptimizer(scale=2.0)
+        self.assertEqual((original, "a.png"), optimizer.optimize(original, "a.png", (120, 80)))
+
+    def test_reencodes_to_requested_format(self):
+        optimizer = ImageOptimizer(scale=1.0, image_format="webp")
+        payload, name = optimizer.optimize(_encode(800, 600, "JPEG"), "x/photo.jpeg", (80, 60))
+        self.assertEqual("x/photo.webp", name)
+        self.assertTrue(payload.startswith(b"RIFF"))
+        self.assertEqual((80, 60), self._size_of(payload))
+
+    def test_jpeg_output_keeps_alpha_images_in_source_format(self):
+        optimizer = ImageOptimizer(scale=1.0, image_format="jpg")
+        payload, name = optimizer.optimize(_encode(400, 400, "PNG"), "a.png", (40, 40))
+        self.assertEqual("a.png", name)
+        self.assertEqual((40, 40), self._size_of(payload))
+
+    def test_results_are_cached_by_content_and_target_size(self):
+        optimizer = ImageOptimizer(scale=1.0, cache_size=1)
+        original = _encode(400, 400, "PNG")
+        first = optimizer.optimize(original, "a.png", (40, 40))
+        second = optimizer.optimize(original, "b.png", (40, 40))
+        self.assertEqual(first[0], second[0])
+        self.assertEqual("b.png", second[1])
+        self.assertEqual((1, 1), (optimizer.cache_hits, optimizer.cache_misses))
+
+        optimizer.optimize(original, "a.png", (20, 20))
+        optimizer.optimize(original, "a.png", (40, 40))
+        self.assertEqual(3, optimizer.cache_misses)
+
+    def test_unreadable_images_are_returned_unchanged(self):
+        optimizer = ImageOptimizer(scale=1.0)
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(
+                (b"junk", "a.png"), optimizer.optimize(b"junk", "a.png", (10, 10))
+            )
+
+    def test_cache_is_bounded_by_payload_bytes(self):
+        first, second = _encode(300, 300, "PNG"), _encode(301, 301, "PNG")
+        optimizer = ImageOptimizer(scale=None, cache_bytes=len(first) + len(second) - 1)
+        optimizer.optimize(first, "a.png", None)
+        optimizer.optimize(second, "b.png", None)
+        optimizer.optimize(second, "b.png", None)
+        optimizer.optimize(first, "a.png", None)
+        self.assertEqual((1, 3), (optimizer.cache_hits, optimizer.cache_misses))
+
+        # Payloads larger than the whole budget are never cached.
+        optimizer = ImageOptimizer(scale=None, cache_bytes=len(first) - 1)
+        optimizer.optimize(first, "a.png", None)
+        optimizer.optimize(first, "a.png", None)
+        self.assertEqual((0, 2), (optimizer.cache_hits, optimizer.cache_misses))
+
+    def test_decompression_bombs_are_returned_unchanged(self):
+        original = _encode(400, 400, "PNG")
+        optimizer = ImageOptimizer(scale=1.0)
+        with patch.object(Image, "MAX_IMAGE_PIXELS", 100), self.assertLogs(
+            level="WARNING"
+        ) as logs:
+            self.assertEqual(
+                (original, "a.png"), optimizer.optimize(original, "a.png", (40, 40))
+            )
+        self.assertIn("DecompressionBombError", logs.output[0])
+
+    def test_rejects_invalid_options(self):
+        with self.assertRaises(ValueError):
+            ImageOptimizer(scale=0)
+        with self.assertRaises(ValueError):
+            ImageOptimizer(image_format="tiff")
+
+
+
+class MapImagesInOrderTests(unittest.TestCase):
+    def test_sequential_mode_runs_on_calling_thread(self):
+        thread_names = []
+
+        def work(item: int) -> int:
+            thread_names.append(threading.current_thread().name)
+            return item * 2
+
+        self.assertEqual([0, 2, 4], list(map_images_in_order(work, range(3))))
+        self.assertEqual({threading.current_thread().name}, set(thread_names))
+
+    def test_parallel_mode_keeps_input_order_and_bounds_concurrency(self):
+        active = 0
+        max_active = 0
+        lock = threading.Lock()
+
+        def work(item: int) -> int:
+            nonlocal active, max_active
+            with lock:
+                active += 1
+                max_active = max(max_active, active)
+            time.sleep(0.001 * (item % 3))
+            with lock:
+                active -= 1
+            return item
+
+        results = list(map_images_in_order(work, range(40), max_workers=4))
+
+        self.assertEqual(list(range(40)), results)
+        self.assertLessEqual(max_active, 4)
+
+    def test_parallel_mode_propagates_worker_errors(self):
+        def work(item: int) -> int:
+            if item == 3:
+                raise RuntimeError("boom")
+            return item
+
+        with self.assertRaises(RuntimeError):
+            list(map_images_in_order(work, range(6), max_workers=2))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from time import perf_counter
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+HEAVY_MODULES = ("openpyxl", "bs4", "lxml", "PIL", "condif2css", "xlsx2html")
+# `import xx2html` may add at most this many bare interpreter start-ups (best
+# of several runs each): ~1x today, mostly `typing`; loading openpyxl is ~15x.
+IMPORT_BUDGET_RATIO = 2.0
+IMPORT_RUNS = 5
+
+
+def _get_env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(SRC_DIR), env.get("PYTHONPATH")])
+    )
+    return env
+
+
+def _time_python(code):
+    started_at = perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True, env=_get_env())
+    return perf_counter() - started_at
+
+
+def _run_python(code):
+    env = _get_env()
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        env=env,
+        text=True,
+    )
+    return json.loads(completed.stdout)
+
+
+def _loaded_after(statement):
+    return _run_python(
+        "import json, sys\n"
+        f"{statement}\n"
+        f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))"
+    )
+
+
+class LazyImportTests(unittest.TestCase):
+    def test_package_import_loads_no_heavy_dependencies(self):
+        self.assertEqual([], _loaded_after("import xx2html"))
+        self.assertEqual([], _loaded_after("from xx2html.cova import initialize"))
+        self.assertEqual([], _loaded_after("import xx2html; xx2html.__version__"))
+
+    def test_core_and_light_submodules_load_no_heavy_dependencies(self):
+        for statement in (
+            "import xx2html.core",
+            "import xx2html.core.multifile, xx2html.core.report",
+            "from xx2html.core import PRECOMPRESSED_SUFFIXES, get_class_map_path",
+            "import xx2html.cli",
+        ):
+            with self.subTest(statement=statement):
+                self.assertEqual([], _loaded_after(statement))
+
+    def test_patches_are_applied_on_first_use(self):
+        state = _run_python(
+            "import json, xx2html\n"
+            "import xx2html.core.patches as patches\n"
+            "from openpyxl.worksheet._reader import WorkSheetParser\n"
+            "original = WorkSheetParser.parse_cell\n"
+            "before = patches._PATCHES_APPLIED\n"
+            "xx2html.create_xlsx_transform(\n"
+            "    '{enc_sheet_name}{sheet_name}{table_generated_html}',\n"
+            "    '{enc_sheet_name}{sheet_name}',\n"
+            "    '{sheets_generated_html}{sheets_names_generated_html}{source_filename}'\n"
+            "    '{fonts_html}{core_css_html}{user_css_html}{generated_css_html}'\n"
+            "    '{generated_incell_css_html}{conditional_css_html}',\n"
+            "    '', '', '', '',\n"
+            ")\n"
+            "print(json.dumps([before, patches._PATCHES_APPLIED,\n"
+            "                  WorkSheetParser.parse_cell is original]))"
+        )
+        self.assertEqual([False, True, False], state)
+
+    def test_public_names_resolve_on_first_access(self):
+        state = _run_python(
+            "import json, xx2html\n"
+            "transform = xx2html.create_xlsx_transform\n"
+            "import xx2html.core\n"
+            "print(json.dumps({\n"
+            "    'same': transform is xx2html.core.create_xlsx_transform,\n"
+            "    'patched': xx2html.core.patches._PATCHES_APPLIED,\n"
+            "    'report': xx2html.TransformReport.__module__,\n"
+            "    'version': isinstance(xx2html.__version__, str),\n"
+            "    'dir': sorted(set(xx2html.__all__) - set(dir(xx2html))),\n"
+            "}))"
+        )
+        self.assertEqual(
+            {
+                "same": True,
+                "patched": False,
+                "report": "xx2html.core.report",
+                "version": True,
+                "dir": [],
+            },
+            state,
+        )
+
+    def test_unknown_attribute_raises(self):
+        import xx2html
+
+        with self.assertRaises(AttributeError):
+            xx2html.missing_name  # noqa: B018
+
+    def test_import_time_budget(self):
+        # Relative to a bare interpreter in the same run, so slow machines scale both.
+        bare = min(_time_python("pass") for _ in range(IMPORT_RUNS))
+        package = min(_time_python("import xx2html") for _ in range(IMPORT_RUNS))
+        self.assertLess(package - bare, IMPORT_BUDGET_RATIO * bare)
+
+if __name__ == "__main__":
+    unittest.main()
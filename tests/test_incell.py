@@ -1,10 +1,19 @@
 import io
+import json
 import unittest
 from zipfile import ZIP_DEFLATED, ZipFile
 
 from PIL import Image
 
-from xx2html.core.incell import get_incell_css
+from xx2html.core.images import ImageOptimizer
+from xx2html.core.incell import (
+    INCELL_FIT_HEIGHT_CLASS,
+    INCELL_FIT_WIDTH_CLASS,
+    get_incell_css,
+    get_incell_fit_class,
+    get_incell_image_boxes,
+    get_incell_image_sizes,
+)
 
 
 def _make_png(width: int, height: int) -> bytes:
@@ -14,61 +23,92 @@ def _make_png(width: int, height: int) -> bytes:
     return buffer.getvalue()
 
 
+def _build_archive(files: dict[str, bytes]) -> io.BytesIO:
+    zip_buffer = io.BytesIO()
+    with ZipFile(zip_buffer, mode="w", compression=ZIP_DEFLATED) as zf:
+        for name, payload in files.items():
+            zf.writestr(name, payload)
+    zip_buffer.seek(0)
+    return zip_buffer
+
+
 class InCellCssTests(unittest.TestCase):
-    def test_wide_image_uses_full_width_auto_height(self):
-        zip_buffer = io.BytesIO()
-        with ZipFile(zip_buffer, mode="w", compression=ZIP_DEFLATED) as zf:
-            zf.writestr("xl/media/image1.png", _make_png(400, 100))
+    def test_wide_image_uses_width_fit_class(self):
+        self.assertEqual(
+            INCELL_FIT_WIDTH_CLASS,
+            get_incell_fit_class({"width": 100, "height": 100}, (400, 100)),
+        )
+
+    def test_tall_image_uses_height_fit_class(self):
+        self.assertEqual(
+            INCELL_FIT_HEIGHT_CLASS,
+            get_incell_fit_class({"width": 100, "height": 100}, (100, 400)),
+        )
+
+    def test_unknown_sizes_keep_default_fit(self):
+        self.assertIsNone(get_incell_fit_class({"width": 100, "height": 100}, None))
+        self.assertIsNone(get_incell_fit_class({"width": 0, "height": 100}, (10, 10)))
+
+    def test_get_incell_image_sizes_reads_referenced_images(self):
+        zip_buffer = _build_archive(
+            {
+                "xl/media/image1.png": _make_png(400, 100),
+                "xl/media/image3.png": b"not-a-valid-image",
+            }
+        )
+        with ZipFile(zip_buffer, mode="r") as zf:
+            with self.assertLogs(level="WARNING") as log_ctx:
+                sizes = get_incell_image_sizes(
+                    {
+                        "1": "xl/media/image1.png",
+                        "2": "xl/media/missing.png",
+                        "3": "xl/media/image3.png",
+                    },
+                    zf,
+                )
+
+        self.assertEqual({"1": (400, 100)}, sizes)
+        self.assertTrue(any("Unable to read image size" in msg for msg in log_ctx.output))
 
-        zip_buffer.seek(0)
+    def test_css_has_one_content_rule_per_image_and_shared_fit_rules(self):
+        zip_buffer = _build_archive({"xl/media/image1.png": _make_png(400, 100)})
         with ZipFile(zip_buffer, mode="r") as zf:
             css = get_incell_css(
                 vm_ids={"1"},
-                vm_ids_dimension_references={"cell_1": {"width": 100, "height": 100}},
-                vm_cell_vm_ids={"cell_1": "1"},
                 incell_images_refs={"1": "xl/media/image1.png"},
                 archive=zf,
             )
 
-        self.assertIn(".vm-richvaluerel_rid1 img", css)
-        self.assertIn(".cell_1 img", css)
-        self.assertIn("width: 100%;", css)
-        self.assertIn("height: auto;", css)
+        self.assertEqual(1, css.count(".vm-richvaluerel_rid1 img"))
+        self.assertIn("aspect-ratio: 400 / 100;", css)
+        self.assertIn(".incell-image.incell-fit-width img", css)
+        self.assertIn(".incell-image.incell-fit-height img", css)
         self.assertIn("object-fit: contain;", css)
+        self.assertNotIn(".cell_", css)
 
-    def test_tall_image_uses_auto_width_full_height(self):
-        zip_buffer = io.BytesIO()
-        with ZipFile(zip_buffer, mode="w", compression=ZIP_DEFLATED) as zf:
-            zf.writestr("xl/media/image2.png", _make_png(100, 400))
-
-        zip_buffer.seek(0)
+    def test_precomputed_sizes_are_reused(self):
+        zip_buffer = _build_archive({"xl/media/image1.png": _make_png(400, 100)})
         with ZipFile(zip_buffer, mode="r") as zf:
             css = get_incell_css(
-                vm_ids={"2"},
-                vm_ids_dimension_references={"cell_2": {"width": 100, "height": 100}},
-                vm_cell_vm_ids={"cell_2": "2"},
-                incell_images_refs={"2": "xl/media/image2.png"},
+                vm_ids={"1"},
+                incell_images_refs={"1": "xl/media/image1.png"},
                 archive=zf,
+                incell_image_sizes={"1": (40, 30)},
             )
 
-        self.assertIn(".vm-richvaluerel_rid2 img", css)
-        self.assertIn(".cell_2 img", css)
-        self.assertIn("width: auto;", css)
-        self.assertIn("height: 100%;", css)
-        self.assertIn("object-fit: contain;", css)
+        self.assertIn("aspect-ratio: 40 / 30;", css)
 
-    def test_missing_vm_reference_logs_warning_and_skips_vm_content_rule(self):
-        zip_buffer = io.BytesIO()
-        with ZipFile(zip_buffer, mode="w", compression=ZIP_DEFLATED) as zf:
-            zf.writestr("xl/media/image1.png", _make_png(50, 50))
+    def test_no_vm_ids_returns_empty_css(self):
+        zip_buffer = _build_archive({})
+        with ZipFile(zip_buffer, mode="r") as zf:
+            self.assertEqual("", get_incell_css(set(), {}, zf))
 
-        zip_buffer.seek(0)
+    def test_missing_vm_reference_logs_warning_and_skips_vm_content_rule(self):
+        zip_buffer = _build_archive({"xl/media/image1.png": _make_png(50, 50)})
         with ZipFile(zip_buffer, mode="r") as zf:
             with self.assertLogs(level="WARNING") as log_ctx:
                 css = get_incell_css(
                     vm_ids={"1"},
-                    vm_ids_dimension_references={"cell_1": {"width": 120, "height": 80}},
-                    vm_cell_vm_ids={"cell_1": "1"},
                     incell_images_refs={},
                     archive=zf,
                 )
@@ -77,71 +117,118 @@ class InCellCssTests(unittest.TestCase):
             any("not found in incell images references" in msg for msg in log_ctx.output)
         )
         self.assertNotIn(".vm-richvaluerel_rid1 img", css)
-        self.assertIn(".cell_1 img", css)
+        self.assertIn(".incell-image img", css)
         self.assertIn("width: 100%;", css)
         self.assertIn("height: 100%;", css)
 
     def test_missing_image_file_logs_warning_and_skips_vm_content_rule(self):
-        zip_buffer = io.BytesIO()
-        with ZipFile(zip_buffer, mode="w", compression=ZIP_DEFLATED):
-            pass
-
-        zip_buffer.seek(0)
+        zip_buffer = _build_archive({})
         with ZipFile(zip_buffer, mode="r") as zf:
             with self.assertLogs(level="WARNING") as log_ctx:
                 css = get_incell_css(
                     vm_ids={"2"},
-                    vm_ids_dimension_references={"cell_2": {"width": 90, "height": 90}},
-                    vm_cell_vm_ids={"cell_2": "2"},
                     incell_images_refs={"2": "xl/media/missing.png"},
                     archive=zf,
                 )
 
         self.assertTrue(any("not found in excel file" in msg for msg in log_ctx.output))
         self.assertNotIn(".vm-richvaluerel_rid2 img", css)
-        self.assertIn(".cell_2 img", css)
 
-    def test_unreadable_image_falls_back_to_default_fit_rules(self):
-        zip_buffer = io.BytesIO()
-        with ZipFile(zip_buffer, mode="w", compression=ZIP_DEFLATED) as zf:
-            zf.writestr("xl/media/image3.png", b"not-a-valid-image")
-
-        zip_buffer.seek(0)
+    def test_unreadable_image_keeps_content_rule_without_aspect_ratio(self):
+        zip_buffer = _build_archive({"xl/media/image3.png": b"not-a-valid-image"})
         with ZipFile(zip_buffer, mode="r") as zf:
             with self.assertLogs(level="WARNING") as log_ctx:
                 css = get_incell_css(
                     vm_ids={"3"},
-                    vm_ids_dimension_references={"cell_3": {"width": 100, "height": 100}},
-                    vm_cell_vm_ids={"cell_3": "3"},
                     incell_images_refs={"3": "xl/media/image3.png"},
                     archive=zf,
                 )
 
         self.assertTrue(any("Unable to read image size" in msg for msg in log_ctx.output))
         self.assertIn(".vm-richvaluerel_rid3 img", css)
-        self.assertIn(".cell_3 img", css)
-        self.assertIn("width: 100%;", css)
-        self.assertIn("height: 100%;", css)
+        self.assertNotIn("aspect-ratio", css)
+
+    def test_get_incell_image_boxes_keeps_largest_box_per_vm_id(self):
+        boxes = get_incell_image_boxes(
+            {
+                "cell_a": {"width": 120, "height": 40},
+                "cell_b": {"width": 60, "height": 80},
+                "cell_c": {"width": 10, "height": 10},
+                "cell_orphan": {"width": 999, "height": 999},
+            },
+            {"cell_a": "1", "cell_b": "1", "cell_c": "2"},
+        )
+        self.assertEqual({"1": (120, 80), "2": (10, 10)}, boxes)
+
+    def test_image_optimizer_downsizes_embedded_payload(self):
+        original = _make_png(1200, 300)
+        zip_buffer = _build_archive({"xl/media/image1.png": original})
+        with ZipFile(zip_buffer, mode="r") as zf:
+            plain_css = get_incell_css({"1"}, {"1": "xl/media/image1.png"}, zf)
+            optimized_css = get_incell_css(
+                {"1"},
+                {"1": "xl/media/image1.png"},
+                zf,
+                image_optimizer=ImageOptimizer(scale=1.0),
+                incell_image_boxes={"1": (120, 30)},
+            )
 
-    def test_missing_cell_vm_mapping_uses_default_cell_fit_rules(self):
-        zip_buffer = io.BytesIO()
-        with ZipFile(zip_buffer, mode="w", compression=ZIP_DEFLATED) as zf:
-            zf.writestr("xl/media/image1.png", _make_png(64, 64))
+        self.assertIn("aspect-ratio: 1200 / 300;", optimized_css)
+        self.assertLess(len(optimized_css), len(plain_css))
 
-        zip_buffer.seek(0)
+    def test_parallel_image_workers_produce_identical_css(self):
+        files = {
+            f"xl/media/image{index}.png": _make_png(10 + index, 20 + index)
+            for index in range(1, 13)
+        }
+        refs = {str(index): f"xl/media/image{index}.png" for index in range(1, 13)}
+        zip_buffer = _build_archive(files)
         with ZipFile(zip_buffer, mode="r") as zf:
-            css = get_incell_css(
-                vm_ids={"1"},
-                vm_ids_dimension_references={"cell_missing_vm": {"width": 80, "height": 120}},
-                vm_cell_vm_ids={},
-                incell_images_refs={"1": "xl/media/image1.png"},
-                archive=zf,
+            sequential_sizes = get_incell_image_sizes(refs, zf)
+            parallel_sizes = get_incell_image_sizes(refs, zf, image_workers=4)
+            sequential_css = get_incell_css(set(refs), refs, zf)
+            parallel_css = get_incell_css(set(refs), refs, zf, image_workers=4)
+
+        self.assertEqual(sequential_sizes, parallel_sizes)
+        self.assertEqual(sequential_css, parallel_css)
+        self.assertLess(
+            parallel_css.index(".vm-richvaluerel_rid10 img"),
+            parallel_css.index(".vm-richvaluerel_rid2 img"),
+        )
+
+    def test_lazy_payloads_move_image_data_out_of_css(self):
+        files = {
+            f"xl/media/image{index}.png": _make_png(10 + index, 20) for index in range(1, 4)
+        }
+        refs = {str(index): f"xl/media/image{index}.png" for index in range(1, 4)}
+        zip_buffer = _build_archive(files)
+        with ZipFile(zip_buffer, mode="r") as zf:
+            sequential_payloads = io.StringIO()
+            sequential_css = get_incell_css(
+                set(refs), refs, zf, payload_write=sequential_payloads.write
+            )
+            parallel_payloads = io.StringIO()
+            parallel_css = get_incell_css(
+                set(refs),
+                refs,
+                zf,
+                image_workers=2,
+                payload_write=parallel_payloads.write,
             )
 
-        self.assertIn(".vm-richvaluerel_rid1 img", css)
-        self.assertIn(".cell_missing_vm img", css)
-        self.assertIn("width: 100%;", css)
-        self.assertIn("height: 100%;", css)
+        self.assertNotIn("content:url", sequential_css)
+        self.assertIn("aspect-ratio: 11 / 20;", sequential_css)
+        payloads = json.loads(sequential_payloads.getvalue())
+        self.assertEqual({"1", "2", "3"}, set(payloads))
+        self.assertTrue(payloads["1"].startswith("data:image/png;base64,"))
+        self.assertEqual(sequential_css, parallel_css)
+        self.assertEqual(sequential_payloads.getvalue(), parallel_payloads.getvalue())
+
+    def test_lazy_payloads_are_an_empty_object_without_images(self):
+        payloads = io.StringIO()
+        with ZipFile(_build_archive({}), mode="r") as zf:
+            self.assertEqual("", get_incell_css(set(), {}, zf, payload_write=payloads.write))
+        self.assertEqual({}, json.loads(payloads.getvalue()))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,179 @@
+import codecs
+import io
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from xx2html import create_xlsx_transform, render_xlsx_html
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+SOURCE = FIXTURES_DIR / "incell_image.xlsx"
+
+SHEET_HTML = (
+    '<section id="{enc_sheet_name}" data-sheet="{sheet_name}">'
+    "{table_generated_html}"
+    "</section>"
+)
+SHEETNAME_HTML = '<a class="sheet-nav" href="#{enc_sheet_name}">{sheet_name}</a>'
+INDEX_HTML = (
+    "<!doctype html><html><head>"
+    "{fonts_html}{core_css_html}{user_css_html}{generated_css_html}"
+    "{generated_incell_css_html}{conditional_css_html}"
+    '</head><body data-source="{source_filename}">'
+    "{sheets_names_generated_html}{sheets_generated_html}</body></html>"
+)
+
+
+def _build_transform(index_html=INDEX_HTML, **kwargs):
+    return create_xlsx_transform(
+        sheet_html=SHEET_HTML,
+        sheetname_html=SHEETNAME_HTML,
+        index_html=index_html,
+        fonts_html="",
+        core_css="",
+        user_css="",
+        safari_js="",
+        apply_cf=True,
+        **kwargs,
+    )
+
+
+class _UnseekableStream(io.RawIOBase):
+    def __init__(self, data):
+        self._stream = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._stream.readinto(buffer)
+
+
+class InMemoryTransformTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        transform = _build_transform()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dest = Path(tmp_dir) / "out.html"
+            ok, err = transform(str(SOURCE), str(dest), "en_US")
+            if not ok:
+                raise AssertionError(err)
+            cls.file_html = dest.read_text(encoding="utf-8")
+        cls.data = SOURCE.read_bytes()
+
+    def setUp(self):
+        self.transform = _build_transform()
+
+    def _expected(self, source_label):
+        return self.file_html.replace(
+            f'data-source="{SOURCE}"', f'data-source="{source_label}"'
+        )
+
+    def test_bytes_source_to_text_stream(self):
+        output = io.StringIO()
+        with patch("xx2html.core.transform._write_html_atomically") as write_file:
+            ok, err = self.transform(self.data, output, "en_US")
+
+        self.assertEqual((True, None), (ok, err))
+        write_file.assert_not_called()
+        self.assertIn("data:image/png;base64,", output.getvalue())
+        self.assertEqual(self._expected("bytes"), output.getvalue())
+
+    def test_memoryview_source_to_binary_stream(self):
+        output = io.BytesIO()
+        ok, err = self.transform(memoryview(self.data), output, "en_US")
+        self.assertEqual((True, None), (ok, err))
+        self.assertEqual(
+            self._expected("bytes"), output.getvalue().decode("utf-8")
+        )
+
+    def test_text_writers_that_are_not_textiobase_get_str(self):
+        class TextSink:
+            def __init__(self):
+                self.parts = []
+
+            def write(self, text):
+                if not isinstance(text, str):
+                    raise TypeError("text only")
+                self.parts.append(text)
+
+        sink = TextSink()
+        self.assertEqual((True, None), self.transform(self.data, sink, "en_US"))
+        self.assertEqual(self._expected("bytes"), "".join(sink.parts))
+
+        buffer = io.BytesIO()
+        writer = codecs.getwriter("utf-8")(buffer)
+        self.assertEqual((True, None), self.transform(self.data, writer, "en_US"))
+        self.assertEqual(self._expected("bytes"), buffer.getvalue().decode("utf-8"))
+
+    def test_binary_file_destination(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dest = Path(tmp_dir) / "out.html"
+            with open(dest, "wb") as dest_file:
+                ok, err = self.transform(self.data, dest_file, "en_US")
+            self.assertEqual((True, None), (ok, err))
+            self.assertEqual(
+                self._expected("bytes"), dest.read_text(encoding="utf-8")
+            )
+
+    def test_file_like_sources_stay_open(self):
+        with open(SOURCE, "rb") as source_file:
+            html = render_xlsx_html(self.transform, source_file, "en_US")
+            self.assertFalse(source_file.closed)
+        self.assertEqual(self.file_html, html)
+
+        html = render_xlsx_html(
+            self.transform, io.BufferedReader(_UnseekableStream(self.data)), "en_US"
+        )
+        self.assertEqual(self._expected("stream"), html)
+
+    def test_in_memory_source_label_renders_as_text(self):
+        transform = _build_transform(
+            index_html=INDEX_HTML.replace("<body ", "<body><h1>{source_filename}</h1><i ")
+        )
+        for source, label in (
+            (self.data, "bytes"),
+            (io.BufferedReader(_UnseekableStream(self.data)), "stream"),
+        ):
+            with self.subTest(label=label):
+                html = render_xlsx_html(transform, source, "en_US")
+                self.assertIn(f"<h1>{label}</h1>", html)
+
+    def test_render_raises_on_failure(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        with self.assertRaisesRegex(RuntimeError, "BadZipFile"):
+            render_xlsx_html(self.transform, b"not a workbook", "en_US")
+
+    def test_sibling_file_options_need_a_path_destination(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        for kwargs in ({"multi_file": True}, {"precompress": True}):
+            with self.subTest(**kwargs):
+                ok, err = _build_transform(**kwargs)(self.data, io.StringIO(), "en_US")
+                self.assertFalse(ok)
+                self.assertIn("need a path destination", err)
+
+    def test_path_like_source_and_dest(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dest = Path(tmp_dir) / "out.html"
+            ok, err = self.transform(SOURCE, dest, "en_US")
+            self.assertEqual((True, None), (ok, err))
+            self.assertEqual(self.file_html, dest.read_text(encoding="utf-8"))
+
+    def test_mmap_source_matches_file_output(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dest = Path(tmp_dir) / "out.html"
+            ok, err = _build_transform(mmap_source=True)(str(SOURCE), dest, "en_US")
+            self.assertEqual((True, None), (ok, err))
+            self.assertEqual(self.file_html, dest.read_text(encoding="utf-8"))
+
+        # Non-path sources ignore the option.
+        html = render_xlsx_html(_build_transform(mmap_source=True), self.data, "en_US")
+        self.assertEqual(self._expected("bytes"), html)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,7 +20,7 @@ INDEX_HTML = (
 )
 
 
-def _render_fixture(source_file: Path, apply_cf: bool) -> str:
+def _render_fixture(source_file: Path, apply_cf: bool, **kwargs) -> str:
     transform = create_xlsx_transform(
         sheet_html=SHEET_HTML,
         sheetname_html=SHEETNAME_HTML,
@@ -30,6 +30,7 @@ def _render_fixture(source_file: Path, apply_cf: bool) -> str:
         user_css="",
         safari_js="",
         apply_cf=apply_cf,
+        **kwargs,
     )
 
     with tempfile.TemporaryDirectory() as tmp_dir:
@@ -56,9 +57,43 @@ class FixturesIntegrationTests(unittest.TestCase):
         self.assertIn("incell-image", html)
         self.assertIn("content:url(\"data:image/png;base64", html)
         self.assertIn("object-fit: contain;", html)
+        self.assertIn("incell-fit-height", html)
         self.assertIn('loading="lazy"', html)
         self.assertIn('decoding="async"', html)
 
+    def test_incell_image_fixture_with_image_optimization(self):
+        html = _render_fixture(
+            FIXTURES_DIR / "incell_image.xlsx",
+            apply_cf=False,
+            image_scale=1.0,
+            image_format="webp",
+            image_workers=2,
+        )
+
+        self.assertIn("vm-richvaluerel_rid1", html)
+        self.assertIn("content:url(\"data:image/", html)
+
+    def test_incell_image_fixture_with_lazy_images(self):
+        html = _render_fixture(
+            FIXTURES_DIR / "incell_image.xlsx", apply_cf=False, lazy_images=True
+        )
+
+        self.assertNotIn("content:url(", html)
+        self.assertIn('data-xx2html-vm="1"', html)
+        self.assertIn('id="xx2html-incell-images"', html)
+        self.assertIn("IntersectionObserver", html)
+        self.assertLess(html.index("IntersectionObserver"), html.index("</body>"))
+
+    def test_merged_cells_fixture_with_virtualized_rows(self):
+        html = _render_fixture(
+            FIXTURES_DIR / "merged_cells_cf.xlsx", apply_cf=True, virtualize_rows=1
+        )
+
+        self.assertIn('class="xx2html-virtual"', html)
+        self.assertIn("data-xx2html-block", html)
+        self.assertNotIn('id="Data!C1"', html)
+        self.assertEqual(1, html.count("function setup(root)"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from xx2html import create_xlsx_transform
+from xx2html.core.multifile import get_assets_dir, get_content_hashed_name
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+SHEET_HTML = (
+    '<section id="{enc_sheet_name}" data-sheet="{sheet_name}">'
+    "{table_generated_html}"
+    "</section>"
+)
+SHEETNAME_HTML = '<a class="sheet-nav" href="#{enc_sheet_name}">{sheet_name}</a>'
+INDEX_HTML = (
+    "<!doctype html><html><head>"
+    "{fonts_html}{core_css_html}{user_css_html}{generated_css_html}"
+    "{generated_incell_css_html}{conditional_css_html}"
+    "</head><body>{sheets_names_generated_html}{sheets_generated_html}"
+    "<!-- {source_filename} --></body></html>"
+)
+
+
+def _build_transform(**kwargs):
+    return create_xlsx_transform(
+        sheet_html=SHEET_HTML,
+        sheetname_html=SHEETNAME_HTML,
+        index_html=INDEX_HTML,
+        fonts_html="",
+        core_css="",
+        user_css="",
+        safari_js="",
+        multi_file=True,
+        **kwargs,
+    )
+
+
+class MultiFileOutputTests(unittest.TestCase):
+    def test_content_hashed_names_are_stable(self):
+        self.assertEqual(
+            get_content_hashed_name("sheet_000", ".html", "<p>a</p>"),
+            get_content_hashed_name("sheet_000", ".html", "<p>a</p>"),
+        )
+        self.assertNotEqual(
+            get_content_hashed_name("sheet_000", ".html", "<p>a</p>"),
+            get_content_hashed_name("sheet_000", ".html", "<p>b</p>"),
+        )
+        self.assertEqual(
+            os.path.join("out", "report_files"),
+            get_assets_dir(os.path.join("out", "report.html")),
+        )
+
+    def test_writes_index_shell_shared_stylesheet_and_sheet_fragments(self):
+        transform = _build_transform(apply_cf=True)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dest = Path(tmp_dir) / "report.html"
+            ok, err = transform(
+                str(FIXTURES_DIR / "merged_cells_cf.xlsx"), str(dest), "en_US"
+            )
+            self.assertTrue(ok, err)
+
+            index_html = dest.read_text(encoding="utf-8")
+            assets = sorted(os.listdir(Path(tmp_dir) / "report_files"))
+            fragments = [name for name in assets if name.startswith("sheet_000.")]
+            stylesheets = [name for name in assets if name.startswith("styles.")]
+            self.assertEqual(1, len(fragments))
+            self.assertEqual(1, len(stylesheets))
+
+            fragment_html = (Path(tmp_dir) / "report_files" / fragments[0]).read_text(
+                encoding="utf-8"
+            )
+            stylesheet = (Path(tmp_dir) / "report_files" / stylesheets[0]).read_text(
+                encoding="utf-8"
+            )
+
+        self.assertIn(f'href="report_files/{stylesheets[0]}"', index_html)
+        self.assertIn(f'data-xx2html-fragment="report_files/{fragments[0]}"', index_html)
+        self.assertIn('class="sheet-nav"', index_html)
+        self.assertNotIn("<td", index_html)
+        self.assertNotIn("/*conditional formatting*/", index_html)
+        self.assertIn('id="Data!C1"', fragment_html)
+        self.assertIn('rowspan="2"', fragment_html)
+        self.assertIn("/*conditional formatting*/", stylesheet)
+        self.assertIn(".xx2h_x0000", stylesheet)
+
+    def test_rerun_keeps_unchanged_fragments_and_prunes_stale_ones(self):
+        transform = _build_transform()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dest = Path(tmp_dir) / "report.html"
+            assets_dir = Path(tmp_dir) / "report_files"
+            source = str(FIXTURES_DIR / "merged_cells_cf.xlsx")
+
+            self.assertTrue(transform(source, str(dest), "en_US")[0])
+            first_assets = sorted(os.listdir(assets_dir))
+            stale = assets_dir / "sheet_000.0123456789ab.html"
+            stale.write_text("old", encoding="utf-8")
+            unrelated = assets_dir / "notes.txt"
+            unrelated.write_text("keep", encoding="utf-8")
+
+            self.assertTrue(transform(source, str(dest), "en_US")[0])
+            second_assets = sorted(os.listdir(assets_dir))
+
+        self.assertEqual(sorted(first_assets + ["notes.txt"]), second_assets)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import gzip
+import importlib.util
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from xx2html import create_xlsx_transform
+from xx2html.core import _write_html_atomically
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+SHEET_HTML = (
+    '<section id="{enc_sheet_name}" data-sheet="{sheet_name}">'
+    "{table_generated_html}"
+    "</section>"
+)
+SHEETNAME_HTML = '<a class="sheet-nav" href="#{enc_sheet_name}">{sheet_name}</a>'
+INDEX_HTML = (
+    "<!doctype html><html><head>"
+    "{fonts_html}{core_css_html}{user_css_html}{generated_css_html}"
+    "{generated_incell_css_html}{conditional_css_html}"
+    "</head><body>{sheets_names_generated_html}{sheets_generated_html}"
+    "<!-- {source_filename} --></body></html>"
+)
+
+HAS_ZSTANDARD = importlib.util.find_spec("zstandard") is not None
+
+
+def _build_transform(**kwargs):
+    return create_xlsx_transform(
+        sheet_html=SHEET_HTML,
+        sheetname_html=SHEETNAME_HTML,
+        index_html=INDEX_HTML,
+        fonts_html="",
+        core_css="",
+        user_css="",
+        safari_js="",
+        **kwargs,
+    )
+
+
+def _temp_files(directory):
+    return [name for name in os.listdir(directory) if name.endswith(".tmp")]
+
+
+class PrecompressedOutputTests(unittest.TestCase):
+    def test_gzip_sibling_decompresses_to_the_html_output(self):
+        transform = _build_transform(precompress=True)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dest = Path(tmp_dir) / "report.html"
+            ok, err = transform(
+                str(FIXTURES_DIR / "merged_cells_cf.xlsx"), str(dest), "en_US"
+            )
+            self.assertTrue(ok, err)
+
+            html_bytes = dest.read_bytes()
+            gzip_bytes = Path(f"{dest}.gz").read_bytes()
+            self.assertEqual([], _temp_files(tmp_dir))
+
+        self.assertEqual(html_bytes, gzip.decompress(gzip_bytes))
+        self.assertLess(len(gzip_bytes), len(html_bytes))
+
+    def test_gzip_sibling_is_deterministic(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dest = os.path.join(tmp_dir, "out.html")
+            _write_html_atomically(dest, "<p>same</p>" * 100, precompress=True)
+            first = Path(f"{dest}.gz").read_bytes()
+            _write_html_atomically(dest, "<p>same</p>" * 100, precompress=True)
+            second = Path(f"{dest}.gz").read_bytes()
+
+        self.assertEqual(first, second)
+
+    def test_stale_siblings_are_removed_when_not_written(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dest = os.path.join(tmp_dir, "out.html")
+            Path(f"{dest}.gz").write_bytes(b"old")
+            Path(f"{dest}.zst").write_bytes(b"old")
+
+            _write_html_atomically(dest, "<p>new</p>")
+
+            self.assertEqual(["out.html"], os.listdir(tmp_dir))
+
+    def test_zstd_sibling_is_skipped_without_zstandard(self):
+        with tempfile.TemporaryDirectory() as tmp_dir, patch(
+            "xx2html.core.transform._get_zstd_compressor", return_value=None
+        ):
+            dest = os.path.join(tmp_dir, "out.html")
+            _write_html_atomically(dest, "<p>x</p>", precompress=True)
+
+            self.assertEqual(["out.html", "out.html.gz"], sorted(os.listdir(tmp_dir)))
+
+    @unittest.skipUnless(HAS_ZSTANDARD, "zstandard is not installed")
+    def test_zstd_sibling_decompresses_to_the_html_output(self):
+        import zstandard
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dest = os.path.join(tmp_dir, "out.html")
+            _write_html_atomically(dest, "<p>zstd</p>" * 100, precompress=True)
+            zstd_bytes = Path(f"{dest}.zst").read_bytes()
+            html_bytes = Path(dest).read_bytes()
+
+        reader = zstandard.ZstdDecompressor().stream_reader(zstd_bytes)
+        self.assertEqual(html_bytes, reader.read())
+
+    def test_failed_write_leaves_previous_output_and_no_temp_files(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dest = os.path.join(tmp_dir, "out.html")
+            _write_html_atomically(dest, "<p>old</p>", precompress=True)
+
+            with patch("xx2html.core.transform.GzipFile.write", side_effect=OSError("disk full")):
+                with self.assertRaises(OSError):
+                    _write_html_atomically(dest, "<p>new</p>", precompress=True)
+
+            self.assertEqual("<p>old</p>", Path(dest).read_text(encoding="utf-8"))
+            self.assertEqual(b"<p>old</p>", gzip.decompress(Path(f"{dest}.gz").read_bytes()))
+            self.assertEqual([], _temp_files(tmp_dir))
+
+    def test_multi_file_assets_get_gzip_siblings(self):
+        transform = _build_transform(multi_file=True, precompress=True)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dest = Path(tmp_dir) / "report.html"
+            source = str(FIXTURES_DIR / "merged_cells_cf.xlsx")
+            self.assertTrue(transform(source, str(dest), "en_US")[0])
+            first_assets = sorted(os.listdir(Path(tmp_dir) / "report_files"))
+            self.assertTrue(transform(source, str(dest), "en_US")[0])
+            second_assets = sorted(os.listdir(Path(tmp_dir) / "report_files"))
+
+        assets = [name for name in first_assets if not name.endswith((".gz", ".zst"))]
+        self.assertTrue(assets)
+        for name in assets:
+            self.assertIn(f"{name}.gz", first_assets)
+        self.assertEqual(first_assets, second_assets)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,210 @@
+import json
+import logging
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from openpyxl import Workbook
+from openpyxl.styles import Font
+from openpyxl.styles.differential import DifferentialStyle
+
+from xx2html import TransformReport, create_xlsx_transform
+from xx2html.core.report import DISABLED_REPORT, PHASES, SIZED_SLOTS
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+SHEET_HTML = (
+    '<section id="{enc_sheet_name}" data-sheet="{sheet_name}">'
+    "{table_generated_html}"
+    "</section>"
+)
+SHEETNAME_HTML = '<a class="sheet-nav" href="#{enc_sheet_name}">{sheet_name}</a>'
+INDEX_HTML = (
+    "<!doctype html><html><head>"
+    "{fonts_html}{core_css_html}{user_css_html}{generated_css_html}"
+    "{generated_incell_css_html}{conditional_css_html}"
+    "</head><body>{sheets_names_generated_html}{sheets_generated_html}"
+    "<!-- {source_filename} --></body></html>"
+)
+
+
+def _build_transform(**kwargs):
+    return create_xlsx_transform(
+        sheet_html=SHEET_HTML,
+        sheetname_html=SHEETNAME_HTML,
+        index_html=INDEX_HTML,
+        fonts_html="",
+        core_css="",
+        user_css="",
+        safari_js="",
+        **kwargs,
+    )
+
+
+def _build_workbook(path):
+    workbook = Workbook()
+    summary = workbook.active
+    summary.title = "Summary"
+    details = workbook.create_sheet("Details")
+    for row in range(1, 11):
+        for col in range(1, 4):
+            summary.cell(row=row, column=col, value=row * col)
+    details["A1"] = "merged"
+    details.merge_cells("A1:B2")
+    details.merge_cells("C3:C4")
+    workbook._differential_styles.add(DifferentialStyle(font=Font(bold=True)))
+    workbook.save(path)
+
+
+class TransformReportTests(unittest.TestCase):
+    def test_phase_and_count_accumulate(self):
+        report = TransformReport()
+        with report.phase("sheet_render", "A"):
+            pass
+        with report.phase("sheet_render", "B"):
+            pass
+        report.count("sheets")
+        report.count("sheets", 2)
+
+        self.assertEqual({"A", "B"}, set(report.sheet_phases))
+        self.assertAlmostEqual(
+            report.phases["sheet_render"],
+            report.sheet_phases["A"]["sheet_render"]
+            + report.sheet_phases["B"]["sheet_render"],
+        )
+        self.assertEqual({"sheets": 3}, report.counters)
+        json.dumps(report.as_dict())
+
+    def test_memory_is_recorded_per_phase_when_tracking(self):
+        report = TransformReport(track_memory=True)
+        tracemalloc.start()
+        try:
+            with report.phase("sheet_contents", "A"):
+                data = [bytes(1024) for _ in range(256)]
+        finally:
+            tracemalloc.stop()
+        del data
+        with report.phase("write"):
+            pass
+
+        contents = report.memory_phases["sheet_contents"]
+        self.assertGreaterEqual(contents["peak_bytes"], 256 * 1024)
+        self.assertGreaterEqual(contents["current_bytes"], 256 * 1024)
+        self.assertGreater(contents["peak_rss_bytes"], 0)
+        # Without tracemalloc running only RSS is known.
+        self.assertEqual(0, report.memory_phases["write"]["peak_bytes"])
+        self.assertEqual({}, TransformReport().memory_phases)
+
+    def test_disabled_report_records_nothing(self):
+        with DISABLED_REPORT.phase("write", "A"):
+            pass
+        DISABLED_REPORT.count("sheets")
+
+        self.assertEqual({}, DISABLED_REPORT.phases)
+        self.assertEqual({}, DISABLED_REPORT.sheet_phases)
+        self.assertEqual({}, DISABLED_REPORT.counters)
+
+
+class TransformTimingTests(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def test_transform_fills_phases_and_counters(self):
+        transform = _build_transform(apply_cf=True, image_scale=1.0)
+        report = TransformReport()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ok, err = transform(
+                str(FIXTURES_DIR / "incell_image.xlsx"),
+                str(Path(tmp_dir) / "out.html"),
+                "en_US",
+                report=report,
+            )
+
+        self.assertTrue(ok, err)
+        self.assertEqual(set(PHASES), set(report.phases))
+        self.assertTrue(all(seconds >= 0 for seconds in report.phases.values()))
+        self.assertGreaterEqual(report.total_seconds, sum(report.phases.values()))
+        self.assertEqual(report.counters["sheets"], len(report.sheet_phases))
+        self.assertGreater(report.counters["cells"], 0)
+        self.assertIn("image_cache_hits", report.counters)
+        self.assertIn("image_cache_misses", report.counters)
+        for sheet_phases in report.sheet_phases.values():
+            self.assertLessEqual(
+                {"sheet_contents", "cf_processing", "sheet_render"}, set(sheet_phases)
+            )
+
+    def test_report_is_filled_up_to_the_failing_phase(self):
+        transform = _build_transform()
+        report = TransformReport()
+        with tempfile.TemporaryDirectory() as tmp_dir, patch(
+            "xx2html.core.transform.cova_render_table", side_effect=RuntimeError("boom")
+        ):
+            ok, err = transform(
+                str(FIXTURES_DIR / "incell_image.xlsx"),
+                str(Path(tmp_dir) / "out.html"),
+                "en_US",
+                report,
+            )
+
+        self.assertFalse(ok)
+        self.assertIn("boom", err or "")
+        self.assertIn("sheet_render", report.phases)
+        self.assertNotIn("write", report.phases)
+        self.assertGreater(report.total_seconds, 0)
+
+    def test_size_breakdown_per_slot_and_sheet(self):
+        transform = _build_transform(apply_cf=True)
+        report = TransformReport()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source = Path(tmp_dir) / "sizes.xlsx"
+            _build_workbook(source)
+            dest = Path(tmp_dir) / "out.html"
+            with patch(
+                "xx2html.core.transform.process_conditional_formatting",
+                side_effect=lambda worksheet, fail_ok: (
+                    {"rule": (worksheet.title, "B3", None, 0, None)}
+                    if worksheet.title == "Summary"
+                    else {}
+                ),
+            ):
+                ok, err = transform(str(source), str(dest), "en_US", report=report)
+            output_bytes = dest.stat().st_size
+
+        self.assertTrue(ok, err)
+        self.assertEqual(set(SIZED_SLOTS), set(report.slot_bytes))
+        self.assertEqual(output_bytes, report.output_bytes)
+        self.assertEqual({"Summary", "Details"}, set(report.sheet_sizes))
+        summary = report.sheet_sizes["Summary"]
+        details = report.sheet_sizes["Details"]
+        self.assertEqual(30, summary["cells"])
+        self.assertEqual(0, summary["merged_ranges"])
+        self.assertEqual(2, details["merged_ranges"])
+        self.assertEqual(1, summary["cf_relations"])
+        self.assertNotIn("cf_relations", details)
+        self.assertEqual(0, summary["images"])
+        self.assertGreater(summary["css_rules"], 0)
+        self.assertLessEqual(
+            summary["bytes"] + details["bytes"],
+            report.slot_bytes["sheets_generated_html"],
+        )
+        self.assertGreater(summary["bytes"], details["bytes"])
+        json.dumps(report.as_dict())
+
+    def test_transform_without_report_still_works(self):
+        transform = _build_transform()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ok, err = transform(
+                str(FIXTURES_DIR / "incell_image.xlsx"),
+                str(Path(tmp_dir) / "out.html"),
+                "en_US",
+            )
+
+        self.assertTrue(ok, err)
+        self.assertEqual({}, DISABLED_REPORT.phases)
+
+
+if __name__ == "__main__":
+    unittest.main()
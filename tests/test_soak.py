@@ -0,0 +1,84 @@
+import importlib.util
+import logging
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent / "benchmarks"
+
+
+def _load_soak_module():
+    spec = importlib.util.spec_from_file_location(
+        "run_soak", BENCHMARKS_DIR / "run_soak.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+soak = _load_soak_module()
+
+
+def _result(rss_step=0, gc_step=0, fd_step=0, **kwargs):
+    return soak.SoakResult(
+        samples=[
+            soak.SoakSample(
+                iteration=iteration,
+                rss_bytes=50_000_000 + rss_step * iteration,
+                open_fds=4 + fd_step * iteration,
+                gc_objects=40_000 + gc_step * iteration,
+            )
+            for iteration in range(100, 1100, 100)
+        ],
+        **kwargs,
+    )
+
+
+class CheckSoakTests(unittest.TestCase):
+    def test_flat_run_passes(self):
+        result = _result()
+        self.assertEqual([], soak.check_soak(result))
+        self.assertEqual(
+            {"rss_bytes": 0.0, "gc_objects": 0.0, "open_fds": 0.0}, result.slopes()
+        )
+
+    def test_growth_beyond_thresholds_fails(self):
+        problems = soak.check_soak(_result(rss_step=8192, gc_step=5, fd_step=1))
+        self.assertEqual(3, len(problems))
+        self.assertTrue(problems[0].startswith("rss_bytes grows by 8192.000"))
+
+    def test_leaked_handles_and_failures_fail(self):
+        problems = soak.check_soak(_result(leaked_handles=2, failures=1))
+        self.assertEqual(
+            [
+                "2 ZipFile/Workbook objects outlived a conversion",
+                "1 conversions of valid workbooks failed",
+            ],
+            problems,
+        )
+
+    def test_unknown_fd_counts_are_skipped(self):
+        result = _result()
+        result.samples[0].open_fds = None
+        self.assertNotIn("open_fds", result.slopes())
+
+
+class SoakRunTests(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def test_short_soak_releases_handles(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            result = soak.run_soak(
+                iterations=24, warmup=0, sample_every=4, corpus_dir=Path(tmp_dir)
+            )
+        self.assertEqual(6, len(result.samples))
+        self.assertEqual(0, result.failures)
+        self.assertEqual(0, result.leaked_handles)
+
+
+if __name__ == "__main__":
+    unittest.main()
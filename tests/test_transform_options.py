@@ -5,7 +5,7 @@ from pathlib import Path
 from bs4 import BeautifulSoup, Comment
 from openpyxl import Workbook
 
-import xx2html.core as core_module
+import xx2html.core.transform as core_module
 from xx2html import create_xlsx_transform
 
 
@@ -66,6 +66,22 @@ class TransformOptionsTests(unittest.TestCase):
         with self.assertRaises(ValueError):
             _build_transform(max_cols=0)
 
+    def test_create_transform_validates_image_options(self):
+        with self.assertRaises(ValueError):
+            _build_transform(image_scale=0)
+        with self.assertRaises(TypeError):
+            _build_transform(image_scale="2")
+        with self.assertRaises(ValueError):
+            _build_transform(image_format="tiff")
+        with self.assertRaises(ValueError):
+            _build_transform(image_workers=0)
+
+    def test_create_transform_validates_virtualize_rows(self):
+        with self.assertRaises(ValueError):
+            _build_transform(virtualize_rows=0)
+        with self.assertRaises(TypeError):
+            _build_transform(virtualize_rows=1.5)
+
     def test_create_transform_allows_index_template_without_safari_js(self):
         transform = create_xlsx_transform(
             sheet_html=SHEET_HTML,
@@ -1,13 +1,22 @@
+import base64
+import io
+import re
+import tempfile
 import unittest
+from pathlib import Path
 
 from condif2css.css import CssBuilder, CssRulesRegistry
-from openpyxl import Workbook
+from openpyxl import Workbook, load_workbook
+from openpyxl.drawing.image import Image as DrawingImage
+from PIL import Image
 
+from xx2html.core.images import ImageOptimizer
 from xx2html.core.types import CovaCell
 from xx2html.core.utils import (
     CELL_HEIGHT__DEFAULT,
     COL_WIDTH__DEFAULT,
     cova_render_table,
+    drawing_images_to_data,
     get_worksheet_contents,
 )
 
@@ -87,6 +96,55 @@ class UtilsTests(unittest.TestCase):
 
         self.assertIn('<img alt="" loading="lazy" decoding="async" />', html)
 
+    def test_cova_render_table_lazy_images_defer_payloads(self):
+        html = cova_render_table(
+            {
+                "rows": [
+                    [
+                        {
+                            "attrs": {"id": "Sheet1!A1"},
+                            "column": 1,
+                            "row": 1,
+                            "value": "X",
+                            "formatted_value": "",
+                            "style": {},
+                            "classes": {"incell-image"},
+                            "vm_id": "1",
+                        }
+                    ]
+                ],
+                "cols": [
+                    {
+                        "attrs": {},
+                        "index": "A",
+                        "width": 65,
+                        "style": {"visibility": "visible"},
+                        "hidden": False,
+                        "collapsed": False,
+                    }
+                ],
+                "images": {
+                    (1, 1): [
+                        {
+                            "width": 10,
+                            "height": 10,
+                            "style": {},
+                            "src": "data:image/png;base64,AAAA",
+                        }
+                    ]
+                },
+                "vm_ids": {"1"},
+                "vm_ids_dimension_references": {},
+                "vm_cell_vm_ids": {},
+                "table_width": 65,
+            },
+            lazy_images=True,
+        )
+
+        self.assertIn('data-xx2html-vm="1"', html)
+        self.assertIn('data-xx2html-src="data:image/png;base64,AAAA"', html)
+        self.assertNotIn('src="data:', html.replace("data-xx2html-src", ""))
+
     def test_get_worksheet_contents_vm_dimensions_fall_back_when_effective_size_is_zero(self):
         workbook = Workbook()
         worksheet = workbook.active
@@ -127,6 +185,87 @@ class UtilsTests(unittest.TestCase):
             contents["vm_ids_dimension_references"]["cell_0_0_0"],
         )
 
+    def test_get_worksheet_contents_assigns_shared_incell_fit_class(self):
+        workbook = Workbook()
+        worksheet = workbook.active
+        worksheet.title = "Data"
+        worksheet["A1"] = "Image"
+        worksheet["A2"] = "Image"
+
+        style = worksheet.parent._cell_styles[worksheet["A1"].style_id]
+        for row_index in (1, 2):
+            vm_cell = CovaCell(
+                worksheet, row=row_index, column=1, style_array=style, vm_id="1"
+            )
+            vm_cell._value = "Image"
+            vm_cell.data_type = "s"
+            worksheet._cells[(row_index, 1)] = vm_cell
+
+        contents = get_worksheet_contents(
+            worksheet,
+            css_rules_registry=CssRulesRegistry(),
+            css_builder=CssBuilder(lambda _color: None),
+            get_css_from_cell=lambda _cell, _merged: set(),
+            locale="en_US",
+            ws_index=0,
+            incell_image_sizes={"1": (400, 100)},
+        )
+
+        for row in contents["rows"]:
+            classes = row[0]["classes"]
+            self.assertIn("incell-fit-width", classes)
+            self.assertIn("vm-richvaluerel_rid1", classes)
+            self.assertFalse(any(name.startswith("cell_") for name in classes))
+
+
+    def test_drawing_images_are_resampled_with_image_optimizer(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            image_path = Path(tmp_dir) / "photo.png"
+            workbook_path = Path(tmp_dir) / "drawing.xlsx"
+            Image.new("RGB", (1600, 1200), (1, 2, 3)).save(image_path)
+
+            workbook = Workbook()
+            drawing_image = DrawingImage(str(image_path))
+            drawing_image.width = 160
+            drawing_image.height = 120
+            workbook.active.add_image(drawing_image, "B2")
+            workbook.save(workbook_path)
+            workbook.close()
+
+            loaded = load_workbook(workbook_path)
+            optimized = drawing_images_to_data(
+                loaded.active, ImageOptimizer(scale=1.0, image_format="webp")
+            )
+            loaded.close()
+
+        self.assertEqual([(2, 2)], list(optimized))
+        [image_data] = optimized[(2, 2)]
+        self.assertEqual("absolute", image_data["style"]["position"])
+        self.assertEqual((160, 120), (image_data["width"], image_data["height"]))
+        self.assertTrue(image_data["src"].startswith("data:image/webp;base64,"))
+        encoded = re.sub(r"^data:[^,]+,", "", image_data["src"])
+        with Image.open(io.BytesIO(base64.b64decode(encoded))) as decoded:
+            self.assertEqual((160, 120), decoded.size)
+
+    def test_drawing_images_can_be_encoded_on_image_workers(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            workbook_path = Path(tmp_dir) / "drawing.xlsx"
+            workbook = Workbook()
+            for index, anchor in enumerate(("A1", "C3", "A1")):
+                image_path = Path(tmp_dir) / f"photo{index}.png"
+                Image.new("RGB", (10 + index, 10), (index, 0, 0)).save(image_path)
+                workbook.active.add_image(DrawingImage(str(image_path)), anchor)
+            workbook.save(workbook_path)
+            workbook.close()
+
+            loaded = load_workbook(workbook_path)
+            images = drawing_images_to_data(loaded.active, image_workers=3)
+            loaded.close()
+
+        self.assertEqual([(1, 1), (3, 3)], sorted(images))
+        self.assertEqual(2, len(images[(1, 1)]))
+        self.assertEqual([10, 12], [image["width"] for image in images[(1, 1)]])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,144 @@
+import json
+import unittest
+
+from bs4 import BeautifulSoup
+
+from xx2html.core.cf import apply_cf_styles_to_contents
+from xx2html.core.geometry import SheetGeometry
+from xx2html.core.links import update_links_in_fragment
+from xx2html.core.virtual import cova_render_virtual_table
+
+
+def _cell(column: int, row: int, value: str, **kwargs) -> dict:
+    cell = {
+        "attrs": {"id": f"Data!{chr(64 + column)}{row}"},
+        "column": column,
+        "row": row,
+        "value": value,
+        "formatted_value": value,
+        "style": {},
+        "classes": {"xx2h_x0000"},
+        "vm_id": None,
+    }
+    cell.update(kwargs)
+    return cell
+
+
+def _contents(rows: list[list[dict]]) -> dict:
+    return {
+        "rows": rows,
+        "cols": [
+            {
+                "attrs": {},
+                "index": letter,
+                "width": 65,
+                "style": {"visibility": "visible"},
+                "hidden": False,
+                "collapsed": False,
+            }
+            for letter in ("A", "B")
+        ],
+        "images": {},
+        "vm_ids": set(),
+        "vm_ids_dimension_references": {},
+        "vm_cell_vm_ids": {},
+        "table_width": 130,
+        "geometry": SheetGeometry([19] * len(rows), [65, 65], 19, 65),
+    }
+
+
+def _parse(html: str) -> tuple[dict, list]:
+    soup = BeautifulSoup(html, "html.parser")
+    meta = json.loads(soup.find("script", attrs={"data-xx2html-meta": True}).string)
+    blocks = [
+        json.loads(node.string)
+        for node in soup.find_all("script", attrs={"data-xx2html-block": True})
+    ]
+    return meta, blocks
+
+
+class VirtualTableTests(unittest.TestCase):
+    def test_rows_are_split_into_json_blocks_with_indexed_classes(self):
+        rows = [[_cell(1, row, f"v{row}"), _cell(2, row, "x")] for row in range(1, 6)]
+        rows[0][1]["classes"] = {"xx2h_x0001", "xx2h_x0000"}
+
+        html = cova_render_virtual_table(_contents(rows), "Data", block_rows=2)
+        meta, blocks = _parse(html)
+
+        self.assertEqual(3, len(blocks))
+        self.assertEqual([19] * 5, meta["heights"])
+        self.assertEqual([65, 65], meta["widths"])
+        self.assertEqual(["xx2h_x0000", "xx2h_x0000 xx2h_x0001"], meta["classes"])
+        self.assertEqual([[1, 0, "v1"], [2, 1, "x"]], blocks[0][0])
+        self.assertEqual([[1, 0, "v5"], [2, 0, "x"]], blocks[2][0])
+        self.assertNotIn("<td id=", html)
+        self.assertIn("<tbody data-xx2html-rows", html)
+
+    def test_spans_styles_and_in_cell_images_are_encoded(self):
+        rows = [
+            [
+                _cell(
+                    1,
+                    1,
+                    "",
+                    attrs={"id": "Data!A1", "colspan": 2, "rowspan": 3},
+                    style={"position": "relative"},
+                    vm_id="4",
+                )
+            ],
+            [],
+            [],
+            [_cell(1, 4, "after")],
+        ]
+        meta, blocks = _parse(cova_render_virtual_table(_contents(rows), "Data"))
+
+        self.assertEqual(
+            [1, 0, "", {"cs": 2, "rs": 3, "st": "position: relative", "vm": "4"}],
+            blocks[0][0][0],
+        )
+        self.assertEqual({"2": 1, "3": 1}, meta["origins"])
+
+    def test_values_are_script_safe_and_survive_token_unquoting(self):
+        rows = [[_cell(1, 1, "</script><b>"), _cell(2, 1, "-")], [_cell(1, 2, "$")]]
+        html = cova_render_virtual_table(_contents(rows), "Data")
+        html = html.replace('"$"', "$").replace('"-"', "-")
+
+        self.assertNotIn("</script><b>", html)
+        _, blocks = _parse(html)
+        self.assertEqual("</script><b>", blocks[0][0][0][2])
+        self.assertEqual("-", blocks[0][0][1][2])
+        self.assertEqual("$", blocks[0][1][0][2])
+
+    def test_cell_html_can_be_rewritten(self):
+        rows = [[_cell(1, 1, '<a href="#Other!A1">go</a>')]]
+        _, blocks = _parse(
+            cova_render_virtual_table(
+                _contents(rows),
+                "Data",
+                rewrite_cell_html=lambda cell_html: update_links_in_fragment(
+                    cell_html, {"Other": "sheet_001"}
+                ),
+            )
+        )
+
+        self.assertIn("#sheet_001", blocks[0][0][0][2])
+        self.assertNotIn("<html", blocks[0][0][0][2])
+
+    def test_conditional_formatting_classes_are_applied_to_contents(self):
+        contents = _contents([[_cell(1, 1, "a"), _cell(2, 1, "b")]])
+        apply_cf_styles_to_contents(
+            contents, [("Data", "B1", {"xx2h_cf0000"}), ("Other", "A1", {"x"})]
+        )
+
+        self.assertEqual({"xx2h_x0000"}, contents["rows"][0][0]["classes"])
+        self.assertEqual(
+            {"xx2h_x0000", "xx2h_cf0000"}, contents["rows"][0][1]["classes"]
+        )
+
+    def test_rejects_invalid_block_size(self):
+        with self.assertRaises(ValueError):
+            cova_render_virtual_table(_contents([]), "Data", block_rows=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,7 +6,11 @@ from zipfile import ZIP_DEFLATED, ZipFile
 from lxml import etree
 
 import xx2html.core.vm as vm_module
-from xx2html.core.vm import _get_xml_from_archive, get_incell_images_refs
+from xx2html.core.vm import (
+    _get_xml_from_archive,
+    get_incell_images_refs,
+    get_incell_images_refs_streaming,
+)
 
 
 class VmTests(unittest.TestCase):
@@ -258,6 +262,67 @@ class VmTests(unittest.TestCase):
         self.assertIsInstance(err, RuntimeError)
         self.assertEqual("boom", str(err))
 
+    def test_streaming_refs_match_tree_refs(self):
+        rich_values = "".join(
+            f'<rd:rv s="{index % 3}"><rd:v>{index % 4}</rd:v><rd:v>5</rd:v></rd:rv>'
+            for index in range(30)
+        )
+        zip_buffer = self._build_archive(
+            rels_xml="""
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+  <Relationship Id="rId1" Type="http://example" Target="../media/image1.png"/>
+  <Relationship Id="rId2" Type="http://example" Target="../media/image2.png"/>
+  <Relationship Id="rId3" Type="http://example" Target="../media/image3.png"/>
+</Relationships>
+""".strip(),
+            structure_xml="""
+<rd:richValueStructures xmlns:rd="http://schemas.microsoft.com/office/spreadsheetml/2017/richdata">
+  <rd:s t="_localImage"><rd:k n="_rvRel:LocalImageIdentifier" t="i"/></rd:s>
+  <rd:s t="_webImage" />
+  <!-- comment -->
+  <rd:s t="_localImage" />
+</rd:richValueStructures>
+""".strip(),
+            richvalue_xml=(
+                '<rd:richValueData xmlns:rd="http://schemas.microsoft.com/office/spreadsheetml/2017/richdata">'
+                f'{rich_values}<rd:rv s="0"><rd:v>0</rd:v></rd:rv>'
+                '<rd:rv s="0"><rd:v>x</rd:v><rd:v>5</rd:v></rd:rv>'
+                "</rd:richValueData>"
+            ),
+            metadata_xml=(
+                '<metadata xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<cellMetadata><bk><rc v="7" /></bk></cellMetadata><valueMetadata>'
+                + "".join(f'<bk><rc t="1" v="{index}" /></bk>' for index in range(32))
+                + "</valueMetadata></metadata>"
+            ),
+        )
+        with ZipFile(zip_buffer, mode="r") as zf:
+            tree_refs, tree_err = get_incell_images_refs(zf)
+            streaming_refs, streaming_err = get_incell_images_refs_streaming(zf)
+
+        self.assertIsNone(tree_err)
+        self.assertIsNone(streaming_err)
+        self.assertTrue(tree_refs)
+        self.assertNotIn("32", tree_refs)
+        self.assertEqual(tree_refs, streaming_refs)
+
+    def test_streaming_refs_report_missing_parts_and_invalid_xml(self):
+        with ZipFile(self._build_archive(), mode="r") as zf:
+            refs, err = get_incell_images_refs_streaming(zf)
+        self.assertEqual({}, refs)
+        self.assertIsInstance(err, FileNotFoundError)
+
+        zip_buffer = self._build_archive(
+            rels_xml=self._valid_rels_xml(),
+            structure_xml=self._valid_structure_xml(),
+            richvalue_xml="<rd:richValueData",
+            metadata_xml=self._valid_metadata_xml(),
+        )
+        with ZipFile(zip_buffer, mode="r") as zf:
+            refs, err = get_incell_images_refs_streaming(zf)
+        self.assertEqual({}, refs)
+        self.assertIsInstance(err, etree.XMLSyntaxError)
+
 
 if __name__ == "__main__":
     unittest.main()
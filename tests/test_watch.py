@@ -0,0 +1,78 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from time import monotonic
+from unittest.mock import patch
+
+from xx2html.watch import InotifyWaiter, PollingWaiter, create_waiter
+
+
+def _stop_after(seconds):
+    deadline = monotonic() + seconds
+    return lambda: monotonic() > deadline
+
+
+class PollingWaiterTests(unittest.TestCase):
+    def test_reports_snapshot_changes_and_stops(self):
+        snapshots = iter([1, 1, 2])
+        waiter = PollingWaiter(lambda: next(snapshots), interval=0.01)
+
+        self.assertTrue(waiter.wait(_stop_after(5)))
+        self.assertFalse(waiter.wait(lambda: True))
+        waiter.close()
+
+    def test_falls_back_to_polling_without_inotify(self):
+        with (
+            patch("xx2html.watch.sys.platform", "linux"),
+            patch("xx2html.watch.InotifyWaiter", side_effect=OSError(38, "ENOSYS")),
+            self.assertLogs(level="WARNING"),
+        ):
+            waiter = create_waiter(["."], lambda: 1, interval=2.0)
+        self.assertIsInstance(waiter, PollingWaiter)
+        self.assertEqual(2.0, waiter.interval)
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+class InotifyWaiterTests(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+        (self.root / "sub").mkdir()
+        (self.root / "out").mkdir()
+        self.waiter = InotifyWaiter([str(self.root)], exclude=[str(self.root / "out")])
+        self.waiter.settle = 0.05
+        self.addCleanup(self.waiter.close)
+
+    def _write_soon(self, path):
+        timer = threading.Timer(0.1, path.write_bytes, args=(b"data",))
+        timer.start()
+        self.addCleanup(timer.join)
+
+    def test_reports_workbook_changes_in_subdirectories(self):
+        self._write_soon(self.root / "sub" / "book.xlsx")
+        self.assertTrue(self.waiter.wait(_stop_after(5)))
+
+    def test_ignores_other_files_and_excluded_directories(self):
+        self._write_soon(self.root / "notes.txt")
+        (self.root / "out" / "copy.xlsx").write_bytes(b"data")
+        os.mkdir(self.root / "out" / "nested")
+        self.assertFalse(self.waiter.wait(_stop_after(0.5)))
+
+    def test_watches_directories_created_later(self):
+        (self.root / "new").mkdir()
+        self.assertTrue(self.waiter.wait(_stop_after(5)))
+        self._write_soon(self.root / "new" / "book.xlsx")
+        self.assertTrue(self.waiter.wait(_stop_after(5)))
+
+    def test_create_waiter_prefers_inotify(self):
+        waiter = create_waiter([str(self.root)], lambda: None)
+        self.addCleanup(waiter.close)
+        self.assertIsInstance(waiter, InotifyWaiter)
+
+
+if __name__ == "__main__":
+    unittest.main()